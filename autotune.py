@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+并发数自动调节（--autotune）
+详情获取阶段的合适并发数取决于本机出口带宽、TED的响应时间和时段，手工设定往往偏大或偏小。
+调节器按固定请求数划分观察窗口，每个窗口结束时根据吞吐量、P90延迟和错误率决定并发上限：
+  - 错误率或延迟超出阈值：上限减半（退避）
+  - 吞吐量明显提升：继续增加（开始阶段翻倍，首次受阻后每次加1）
+  - 加大并发后吞吐量没有提升：退回上一档；连续保持若干窗口后再试探加1，适应网络状况变化
+每次决策都写入日志
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class ConcurrencyTuner:
+    """
+    可动态调整上限的并发闸门：工作线程数按 max_workers 创建，
+    每次请求通过 call() 执行，同时执行的请求数不超过当前上限 limit
+    """
+
+    def __init__(self, min_workers: int = 1, max_workers: int = 16, window: int = 20,
+                 max_latency: float = 5.0, max_error_rate: float = 0.05, min_gain: float = 0.1,
+                 probe_after: int = 3):
+        self.min_workers = max(1, min_workers)
+        self.max_workers = max(self.min_workers, max_workers)
+        self.window = max(1, window)
+        self.max_latency = max_latency
+        self.max_error_rate = max_error_rate
+        self.min_gain = min_gain
+        self.probe_after = probe_after
+        self.limit = self.min_workers
+        self.decisions: List[Dict] = []
+        self._cond = threading.Condition()
+        self._active = 0
+        self._latencies: List[float] = []
+        self._errors = 0
+        self._window_start = time.perf_counter()
+        self._slow_start = True
+        self._holds = 0
+        self._last_throughput: Optional[float] = None
+        self._last_ramp_from: Optional[int] = None  # 上一窗口是否刚加大并发（记录加大前的上限）
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """在并发上限内执行一次请求；抛出异常或返回假值都计为错误"""
+        with self._cond:
+            while self._active >= self.limit:
+                self._cond.wait()
+            self._active += 1
+        start = time.perf_counter()
+        ok = False
+        try:
+            result = fn(*args, **kwargs)
+            ok = bool(result)
+            return result
+        finally:
+            latency = time.perf_counter() - start
+            with self._cond:
+                self._active -= 1
+                self._record(latency, ok)
+                self._cond.notify_all()
+
+    def _record(self, latency: float, ok: bool):
+        self._latencies.append(latency)
+        if not ok:
+            self._errors += 1
+        if len(self._latencies) >= self.window:
+            self._evaluate()
+
+    def _evaluate(self):
+        """一个观察窗口结束：根据吞吐量、延迟、错误率调整上限（调用方持有锁）"""
+        now = time.perf_counter()
+        count = len(self._latencies)
+        throughput = count / max(now - self._window_start, 1e-9)
+        p90 = sorted(self._latencies)[min(count - 1, int(count * 0.9))]
+        error_rate = self._errors / count
+        before = self.limit
+
+        if error_rate > self.max_error_rate or p90 > self.max_latency:
+            self.limit = max(self.min_workers, self.limit // 2)
+            self._slow_start = False
+            action = "退避"
+            reason = (f"错误率 {error_rate:.0%} 超过 {self.max_error_rate:.0%}" if error_rate > self.max_error_rate
+                      else f"P90延迟 {p90:.2f}s 超过 {self.max_latency:.2f}s")
+        elif self._last_ramp_from is not None and self._last_throughput is not None \
+                and throughput < self._last_throughput * (1 + self.min_gain):
+            # 刚加大的并发没有带来吞吐量提升，退回上一档
+            self.limit = self._last_ramp_from
+            self._slow_start = False
+            self._holds = 0
+            action = "回退"
+            reason = f"吞吐量 {throughput:.1f}/s 未比 {self._last_throughput:.1f}/s 明显提升"
+        elif self.limit < self.max_workers and (
+                self._slow_start or self._last_ramp_from is not None or self._holds >= self.probe_after):
+            # 开始阶段、上次加大有效、或已连续保持多个窗口时继续加大
+            self.limit = min(self.max_workers, self.limit * 2 if self._slow_start else self.limit + 1)
+            self._holds = 0
+            action = "增加" if self._slow_start else "试探"
+            reason = f"吞吐量 {throughput:.1f}/s，延迟和错误率正常"
+        else:
+            self._holds += 1
+            action = "保持"
+            reason = f"吞吐量 {throughput:.1f}/s"
+
+        self._last_ramp_from = before if self.limit > before else None
+        self._last_throughput = throughput
+        decision = {'action': action, 'before': before, 'after': self.limit, 'throughput': throughput,
+                    'p90': p90, 'error_rate': error_rate}
+        self.decisions.append(decision)
+        logger.info(f"并发调节[{action}] {before} -> {self.limit}：{reason}"
+                    f"（P90延迟 {p90:.2f}s，错误率 {error_rate:.0%}）")
+
+        self._latencies = []
+        self._errors = 0
+        self._window_start = now
+
+    def log_summary(self):
+        """输出调节结果"""
+        if not self.decisions:
+            logger.info(f"并发调节：请求数不足一个观察窗口，并发数保持 {self.limit}")
+            return
+        peak = max(self.decisions, key=lambda d: d['throughput'])
+        logger.info(f"并发调节完成：最终并发 {self.limit}，共 {len(self.decisions)} 次决策，"
+                    f"最高吞吐量 {peak['throughput']:.1f}/s（并发 {peak['before']}）")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量任务（--batch jobs.json）
+一个任务文件描述多组筛选条件（主题子集、年份范围、时长范围、前N/后N数量、输出文件），
+先规划所有任务需要的列表和详情：每个主题的列表只展开一次（使用单主题列表缓存，未变化的主题不再展开），
+每个视频的详情只获取一次，
+浏览器和HTTP会话在全部任务间共用；再由本地目录为每个任务计算前N/后N并写出结果和演讲稿，
+同一视频的演讲稿也只获取一次。十组条件的成本大致等于一次抓取
+
+任务文件格式（未填写的字段使用config中的值）：
+[
+  {"name": "love_short", "topics": ["love", "trust"], "start_year": 2018, "end_year": 2022,
+   "min_duration": 6, "max_duration": 12, "count": 50, "output": "love_short.xlsx"},
+  {"name": "all_default"}
+]
+"""
+
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List
+
+from config import TOPICS, START_YEAR, END_YEAR, MIN_DURATION, MAX_DURATION, TOP_VIDEOS_COUNT
+from ted_scraper_edge import TEDEdgeScraper, TEDVideo, fetch_views_and_dates, fetch_transcripts, load_topic_listings
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class BatchJob:
+    """单个任务的筛选条件"""
+    name: str
+    topics: List[str] = field(default_factory=lambda: list(TOPICS))
+    start_year: int = START_YEAR
+    end_year: int = END_YEAR
+    min_duration: float = MIN_DURATION
+    max_duration: float = MAX_DURATION
+    count: int = TOP_VIDEOS_COUNT
+    output: str = ""
+
+    def __post_init__(self):
+        self.topics = [t.strip().lower() for t in self.topics if t.strip()]
+        if not self.output:
+            self.output = f"ted_videos_{self.name}.xlsx"
+
+def load_jobs(path: str) -> List[BatchJob]:
+    """读取任务文件（JSON数组，或 {"jobs": [...]}），任务名缺失时按序号命名"""
+    with open(path, 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+    if isinstance(spec, dict):
+        spec = spec.get('jobs', [])
+    jobs = []
+    for idx, item in enumerate(spec, 1):
+        item = dict(item)
+        item.setdefault('name', f"job{idx}")
+        jobs.append(BatchJob(**item))
+    names = [job.name for job in jobs]
+    if len(set(names)) != len(names):
+        raise ValueError(f"任务名重复: {names}")
+    return jobs
+
+def plan_topics(jobs: List[BatchJob]) -> List[str]:
+    """所有任务涉及的主题（去重并保持首次出现的顺序），每个主题的列表只展开一次"""
+    topics = []
+    for job in jobs:
+        for topic in job.topics:
+            if topic not in topics:
+                topics.append(topic)
+    return topics
+
+def run_batch(scraper: TEDEdgeScraper, jobs_file: str, sort: str = 'newest', use_api: bool = False):
+    """批量任务：共用一次列表展开和详情获取，为每个任务分别输出前N/后N和演讲稿"""
+    from talk_store import TalkStore
+    jobs = load_jobs(jobs_file)
+    topics = plan_topics(jobs)
+    logger.info(f"批量任务 {len(jobs)} 个，需要展开 {len(topics)} 个主题列表: {', '.join(topics)}")
+
+    store = TalkStore(scraper.catalogue_db)
+    try:
+        videos = load_topic_listings(scraper, store, topics, sort)
+        listing_ids = [v.id for v in videos]
+
+        # 详情只需覆盖至少一个任务的主题和时长范围内的视频，每个视频只获取一次
+        needed: Dict[str, TEDVideo] = {}
+        for job in jobs:
+            for video in store.query_videos(min_minutes=job.min_duration, max_minutes=job.max_duration,
+                                            topics=job.topics, ids=listing_ids):
+                needed.setdefault(video.id, video)
+        logger.info(f"需要获取详情的视频 {len(needed)} 个（列表共 {len(videos)} 个）")
+        fetch_started = datetime.now().isoformat(timespec='seconds')
+        fetch_views_and_dates(scraper, list(needed.values()), store=store, use_api=use_api)
+
+        # 各任务直接查询目录；前面任务已获取的演讲稿保存在目录中，后面的任务不再重复获取
+        for job in jobs:
+            logger.info(f"任务 [{job.name}]: 主题 {len(job.topics)} 个，{job.start_year}-{job.end_year} 年，"
+                        f"{job.min_duration}-{job.max_duration} 分钟，前/后 {job.count} 个")
+            top_videos, bottom_videos = store.query_top_bottom(
+                job.count, job.start_year, job.end_year, job.min_duration, job.max_duration,
+                topics=job.topics, ids=listing_ids, checked_since=None if scraper.replaying else fetch_started)
+            fetch_transcripts(scraper, top_videos, bottom_videos, store, use_api=use_api, file_prefix=f"{job.name}_")
+            scraper.save_results(top_videos, bottom_videos, job.output)
+        logger.info("批量任务执行完成！")
+    finally:
+        store.close()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+导入耗时基准：对比冷启动时
+1. 仅导入 ted_scraper_edge（延迟导入后的实际开销）
+2. 导入 ted_scraper_edge 并立即导入全部重依赖（等价于原先模块顶部全部导入）
+3. 运行非浏览器命令 `ted_scraper_edge.py --print-url`
+
+用法：python bench_import_time.py [重复次数]
+"""
+
+import os
+import subprocess
+import statistics
+import sys
+import time
+
+HEAVY_IMPORTS = (
+    "import selenium.webdriver, selenium.webdriver.support.ui, "
+    "selenium.webdriver.support.expected_conditions, webdriver_manager.microsoft, "
+    "bs4, pandas, openpyxl"
+)
+
+CASES = [
+    ("延迟导入 import ted_scraper_edge", ["-c", "import ted_scraper_edge"]),
+    ("全部依赖 import ted_scraper_edge + 重依赖", ["-c", f"import ted_scraper_edge; {HEAVY_IMPORTS}"]),
+    ("CLI ted_scraper_edge.py --print-url", ["ted_scraper_edge.py", "--print-url"]),
+]
+
+def run_once(args) -> float:
+    """在全新解释器中运行一次，返回耗时（秒）"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *args], cwd=os.path.dirname(os.path.abspath(__file__)),
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print("=" * 60)
+    print(f"        导入耗时基准（每项 {repeat} 次取中位数）")
+    print("=" * 60)
+
+    # 预热一次，排除首次编译.pyc的影响
+    for _, args in CASES:
+        run_once(args)
+
+    results = {}
+    for name, args in CASES:
+        samples = [run_once(args) for _ in range(repeat)]
+        results[name] = statistics.median(samples)
+        print(f"{name:<45} {results[name] * 1000:8.1f} ms")
+
+    lazy = results[CASES[0][0]]
+    eager = results[CASES[1][0]]
+    print(f"\n非浏览器命令冷启动加速: {eager / lazy:.1f}x（节省 {(eager - lazy) * 1000:.1f} ms）")
+
+if __name__ == "__main__":
+    main()
@@ -46,17 +46,95 @@ BOTTOM_VIDEOS_COUNT = 100
 REQUEST_DELAY = 1
 TOPIC_DELAY = 2
 
+# 流水线模式（--pipeline）：阶段间队列长度、详情页并发获取线程数
+PIPELINE_QUEUE_SIZE = 100
+PIPELINE_DETAIL_WORKERS = 4
+
+# 演讲稿分析（--analyze）：进程数（0表示使用全部CPU核）、每个进程任务包含的演讲稿篇数
+ANALYTICS_WORKERS = 0
+ANALYTICS_CHUNK_SIZE = 50
+
+# 页面归档（--record / --replay）：归档目录、回放时并行解析视频页的进程数（0表示使用全部CPU核）
+ARCHIVE_DIR = "ted_archive"
+ARCHIVE_REPLAY_WORKERS = 0
+
+# 并发自动调节（--autotune，流水线模式的详情获取阶段）：并发数范围、每个观察窗口的请求数、
+# 允许的P90延迟（秒）和错误率，超出即减半并发
+AUTOTUNE_MIN_WORKERS = 1
+AUTOTUNE_MAX_WORKERS = 16
+AUTOTUNE_WINDOW = 20
+AUTOTUNE_MAX_LATENCY = 5.0
+AUTOTUNE_MAX_ERROR_RATE = 0.05
+
+# 时间预算模式（--time-budget）：为写出结果预留的时间（秒，应大于单个页面加载超时，进行中的请求在此期间完成）、
+# 详情和演讲稿获取的线程数、覆盖率报告文件
+TIME_BUDGET_RESERVE = 60
+TIME_BUDGET_WORKERS = 4
+COVERAGE_REPORT_FILE = "coverage_report.json"
+
 # 输出文件名
 OUTPUT_FILENAME = "ted_videos_results.xlsx"
 
+# 本地视频目录数据库（SQLite）：保存已知视频的静态信息和播放量时间序列
+CATALOGUE_DB = "ted_catalogue.db"
+
+# Parquet导出（--parquet）：输出目录（按 year/topic 分区，多主题视频在每个主题分区各一行）与每个行组的行数
+PARQUET_DIR = "ted_parquet"
+PARQUET_ROW_GROUP_SIZE = 5000
+
+# 列表"Show 24 more"的点击上限（约4800个视频），防止网站错误导致无限点击；
+# 按热度排序的列表不受此限制（列表尾部就是播放量后N，必须展开到底）
+LISTING_MAX_CLICKS = 200
+
+# 单主题列表缓存的有效期（小时）：有效期内直接使用缓存；过期后先比较"of N"总数，变化时才重新展开该主题列表
+TOPIC_CACHE_HOURS = 24
+
+# 增量刷新（--refresh）时播放量的过期时间（小时），超过该时间的视频才重新访问详情页
+REFRESH_STALE_HOURS = 24
+
+# 逐个访问详情页时，每获取多少个视频的播放量批量写入一次本地目录（中断时最多丢失这么多条）
+VIEWS_COMMIT_EVERY = 50
+
 # /talks 搜索参数排序方式，目前是从全部视频搜索，排序暂无影响，未来可以拓展为newest排序获取前100个，oldest排序获取前100个加快搜索速度
-# newest 或 oldest
+# newest、oldest 或 popular（按热度排序时列表顺序即播放量的粗略排名，只需获取列表两端的视频详情）
 SORT = "newest"
 
+# 热度区间选择（sort为popular时）：每次从列表两端各扩大的视频数、前N/后N连续多少批无变化即视为稳定
+SELECTION_STEP = 50
+SELECTION_STABLE_BATCHES = 2
+
+# TED GraphQL API（--api 模式）：接口地址与每次请求批量查询的视频数
+API_URL = "https://www.ted.com/graphql"
+API_BATCH_SIZE = 50
+
+# sitemap发现模式（--discover sitemap）的sitemap索引地址
+SITEMAP_URL = "https://www.ted.com/sitemap.xml"
+
 # 浏览器设置
 BROWSER_HEADLESS = True  # 是否使用无头模式
 BROWSER_WINDOW_SIZE = "1920,1080"
 
+# Edge驱动缓存文件：记录已解析的驱动路径和浏览器版本，浏览器未升级时启动无需联网
+DRIVER_CACHE_FILE = "./drivers/driver_cache.json"
+
+# 浏览器回收：访问页面数、浏览器进程内存(MB，需安装psutil)、连续超时次数任一达到阈值即重启浏览器，防止长时间运行内存持续增长
+DRIVER_MAX_PAGES = 300
+DRIVER_MAX_RSS_MB = 1500
+DRIVER_MAX_TIMEOUTS = 3
+
+# 浏览器重启失败时的重试次数和首次退避时间（秒，之后逐次翻倍）；全部失败只让当前页面失败，下次访问页面时再尝试启动
+DRIVER_RESTART_ATTEMPTS = 3
+DRIVER_RESTART_BACKOFF = 5
+
+# 单个页面加载超时（秒）
+PAGE_LOAD_TIMEOUT = 30
+
+# 浏览器持久化配置目录：保留Cookie同意状态和站点缓存，设为 "" 则每次使用临时配置
+EDGE_PROFILE_DIR = "./edge_profile"
+
+# TED的Cookie同意记录（点击"Accept all"后写入）：浏览器中存在该Cookie时跳过等待Cookie弹窗，过期或被清除后重新等待
+COOKIE_CONSENT_NAME = "OptanonAlertBoxClosed"
+
 # 日志级别
 LOG_LEVEL = "INFO"
 
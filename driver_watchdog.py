@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+浏览器看门狗
+长时间运行时Edge进程内存会持续增长直到页面超时，看门狗统计已访问页面数、
+连续超时次数，并定期读取浏览器进程树的内存占用（需要psutil，未安装时跳过内存检查），
+任一超过阈值即建议回收（重启）浏览器
+"""
+
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+class DriverWatchdog:
+    """浏览器页面数/内存/超时看门狗"""
+
+    def __init__(self, max_pages: int = 300, max_rss_mb: float = 1500, max_timeouts: int = 3,
+                 rss_check_interval: int = 10):
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.max_timeouts = max_timeouts
+        self.rss_check_interval = rss_check_interval
+        self.recycle_count = 0
+        self.reset()
+
+    def reset(self):
+        """浏览器（重新）启动后清零计数"""
+        self.pages = 0
+        self.consecutive_timeouts = 0
+        self.last_rss_mb = None
+
+    def record_page(self):
+        """记录一次成功的页面访问"""
+        self.pages += 1
+        self.consecutive_timeouts = 0
+
+    def record_timeout(self):
+        """记录一次页面加载超时"""
+        self.pages += 1
+        self.consecutive_timeouts += 1
+
+    def browser_rss_mb(self, driver) -> Optional[float]:
+        """读取驱动进程及其全部子进程（即Edge浏览器各进程）的常驻内存总和（MB）"""
+        try:
+            import psutil
+        except ImportError:
+            return None
+        try:
+            root = psutil.Process(driver.service.process.pid)
+            processes = [root] + root.children(recursive=True)
+            total = 0
+            for process in processes:
+                try:
+                    total += process.memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+            return total / (1024 * 1024)
+        except Exception as e:
+            logger.debug(f"读取浏览器内存失败: {e}")
+            return None
+
+    def recycle_reason(self, driver) -> Optional[str]:
+        """返回需要回收浏览器的原因，无需回收时返回None"""
+        if self.consecutive_timeouts >= self.max_timeouts:
+            return f"连续超时 {self.consecutive_timeouts} 次"
+        if self.max_pages and self.pages >= self.max_pages:
+            return f"已访问 {self.pages} 个页面"
+        if self.max_rss_mb and self.pages and self.pages % self.rss_check_interval == 0:
+            self.last_rss_mb = self.browser_rss_mb(driver)
+            if self.last_rss_mb is not None:
+                logger.info(f"浏览器内存占用: {self.last_rss_mb:.0f} MB（已访问 {self.pages} 个页面）")
+                if self.last_rss_mb >= self.max_rss_mb:
+                    return f"浏览器内存 {self.last_rss_mb:.0f} MB 超过阈值 {self.max_rss_mb} MB"
+        return None
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+页面内嵌数据（__NEXT_DATA__）提取
+TED页面是Next.js应用，页面源码中内嵌一段JSON，包含结构化的视频数据（字段与GraphQL接口一致）；
+一次定位 <script id="__NEXT_DATA__"> 并解析JSON，直接映射为TEDVideo，
+代替逐个元素的CSS选择器查找，也不受Tailwind类名变化影响
+"""
+
+import json
+import logging
+from typing import Any, Dict, Iterator, List, Optional
+
+from ted_scraper_edge import TEDVideo
+from ted_api import apply_talk_data, transcript_text, video_from_talk_data
+
+logger = logging.getLogger(__name__)
+
+NEXT_DATA_MARKER = 'id="__NEXT_DATA__"'
+
+def extract_next_data(html: str) -> Optional[Dict]:
+    """从页面源码中取出 __NEXT_DATA__ 的JSON（只做一次字符串定位，不解析整个DOM），没有或解析失败返回None"""
+    if not html:
+        return None
+    marker = html.find(NEXT_DATA_MARKER)
+    if marker < 0:
+        return None
+    start = html.find('>', marker)
+    end = html.find('</script>', start)
+    if start < 0 or end < 0:
+        return None
+    try:
+        return json.loads(html[start + 1:end])
+    except ValueError as e:
+        logger.warning(f"__NEXT_DATA__ 解析失败: {e}")
+        return None
+
+def _looks_like_talk(node: Dict) -> bool:
+    """视频节点：有slug和标题，并且带有时长/播放量/演讲者之一"""
+    return (isinstance(node.get('slug'), str) and bool(node.get('title'))
+            and any(key in node for key in ('duration', 'viewedCount', 'presenterDisplayName')))
+
+def iter_talk_nodes(payload: Any) -> Iterator[Dict]:
+    """遍历内嵌JSON，产出所有视频节点（列表页的视频可能位于任意层级）"""
+    stack = [payload]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if _looks_like_talk(node):
+                yield node
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+
+def talks_from_html(html: str, base_url: str = "https://www.ted.com") -> List[TEDVideo]:
+    """列表页：把内嵌JSON中的视频映射为TEDVideo（按slug去重，保持页面顺序）"""
+    payload = extract_next_data(html)
+    if payload is None:
+        return []
+    videos = []
+    seen = set()
+    for node in iter_talk_nodes(payload):
+        if node['slug'] in seen:
+            continue
+        seen.add(node['slug'])
+        videos.append(video_from_talk_data(node, base_url))
+    return videos
+
+def talk_page_data(html: str) -> Optional[Dict]:
+    """
+    视频详情页：返回 props.pageProps.videoData（字段与GraphQL的video一致），
+    若页面同时内嵌了演讲稿（transcriptData），合并为 transcript 字段
+    """
+    payload = extract_next_data(html)
+    if payload is None:
+        return None
+    page_props = (payload.get('props') or {}).get('pageProps') or {}
+    talk = page_props.get('videoData')
+    if not isinstance(talk, dict):
+        return None
+    transcript_data = page_props.get('transcriptData') or {}
+    transcript = transcript_text(transcript_data.get('translation'))
+    if transcript:
+        talk = dict(talk, transcript=transcript)
+    return talk
+
+def apply_talk_page(video: TEDVideo, html: str) -> bool:
+    """用详情页内嵌数据填充TEDVideo，页面没有内嵌数据时返回False（调用方回退到正则/ld+json）"""
+    talk = talk_page_data(html)
+    if talk is None:
+        return False
+    apply_talk_data(video, talk)
+    return True
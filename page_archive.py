@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+页面录制与回放归档
+录制模式（--record）把每次获取的列表页和视频页写入WARC格式的压缩归档：
+每条记录是 pages.warc.gz 中一个独立的gzip成员，index.jsonl 记录 URL、抓取时间、偏移和长度，
+读取时直接定位到记录解压，不需要顺序扫描整个归档；
+回放模式（--replay）完全从归档重跑程序，不访问网络，视频页在进程池中并行解析。
+TED修改页面结构或修复提取逻辑后，只需回放归档即可重新得到全部字段。
+回放结果写入归档目录中单独的目录数据库（每次回放重建），播放量以录制时间记录，
+不会把归档中的旧播放量写入正式目录、也不会推迟 --refresh 对正式目录的刷新
+"""
+
+import gzip
+import json
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from ted_scraper_edge import TEDVideo
+
+logger = logging.getLogger(__name__)
+
+WARC_FILE = "pages.warc.gz"
+INDEX_FILE = "index.jsonl"
+REPLAY_CATALOGUE = "replay_catalogue.db"
+
+class PageArchive:
+    """WARC风格的页面归档，mode 为 record（追加写入）或 replay（只读）"""
+
+    def __init__(self, root_dir: str, mode: str = "record"):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"未知的归档模式: {mode}")
+        self.root_dir = root_dir
+        self.replay = mode == "replay"
+        self.warc_path = os.path.join(root_dir, WARC_FILE)
+        self.index_path = os.path.join(root_dir, INDEX_FILE)
+        self.index: Dict[str, List[Dict]] = {}  # url -> 按抓取时间排列的记录位置
+        self._lock = threading.Lock()
+        self._warc = self._index_file = None
+
+        if self.replay and not os.path.exists(self.index_path):
+            raise FileNotFoundError(f"归档不存在: {self.index_path}")
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.index.setdefault(entry['url'], []).append(entry)
+        if not self.replay:
+            os.makedirs(root_dir, exist_ok=True)
+            self._warc = open(self.warc_path, 'ab')
+            self._index_file = open(self.index_path, 'a', encoding='utf-8')
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self.index.values())
+
+    def record(self, url: str, html: str, kind: str = "talk"):
+        """追加一条响应记录（线程安全，流水线的多个详情线程可同时写入）"""
+        if self.replay or not html:
+            return
+        body = html.encode('utf-8')
+        date = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        header = (
+            "WARC/1.0\r\n"
+            "WARC-Type: response\r\n"
+            f"WARC-Target-URI: {url}\r\n"
+            f"WARC-Date: {date}\r\n"
+            f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>\r\n"
+            "Content-Type: text/html; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "\r\n"
+        ).encode('utf-8')
+        member = gzip.compress(header + body + b"\r\n\r\n")
+        with self._lock:
+            offset = self._warc.tell()
+            self._warc.write(member)
+            self._warc.flush()
+            entry = {'url': url, 'date': date, 'kind': kind, 'offset': offset, 'length': len(member)}
+            self._index_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._index_file.flush()
+            self.index.setdefault(url, []).append(entry)
+
+    def get(self, url: str, at: Optional[str] = None) -> Optional[str]:
+        """读取URL的页面：默认取最新一条，at（ISO时间）给出时取该时间及之前的最新一条；没有记录返回None"""
+        entries = [e for e in self.index.get(url, []) if at is None or e['date'] <= at]
+        if not entries:
+            return None
+        entry = entries[-1]
+        with open(self.warc_path, 'rb') as f:
+            f.seek(entry['offset'])
+            record = gzip.decompress(f.read(entry['length']))
+        _, _, body = record.partition(b"\r\n\r\n")
+        return body[:-4].decode('utf-8') if body.endswith(b"\r\n\r\n") else body.decode('utf-8')
+
+    def observed_at(self, url: str) -> Optional[str]:
+        """URL最新一条记录的抓取时间，转换为目录数据库使用的本地时间格式；没有记录返回None"""
+        entries = self.index.get(url)
+        if not entries:
+            return None
+        recorded = datetime.strptime(entries[-1]['date'], '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+        return recorded.astimezone().replace(tzinfo=None).isoformat(timespec='seconds')
+
+    @property
+    def replay_catalogue(self) -> str:
+        """回放使用的目录数据库路径（位于归档目录中，与正式目录分开）"""
+        return os.path.join(self.root_dir, REPLAY_CATALOGUE)
+
+    def urls(self, kind: Optional[str] = None) -> List[str]:
+        """归档中的URL（可按 listing / talk 过滤）"""
+        return [url for url, entries in self.index.items() if kind is None or entries[-1]['kind'] == kind]
+
+    def close(self):
+        for handle in (self._warc, self._index_file):
+            if handle:
+                handle.close()
+        self._warc = self._index_file = None
+
+# 进程池中每个进程对同一归档只打开一次、创建一次解析器（单进程时按归档目录重建，避免沿用上一个归档）
+_worker = None
+
+def _parse_archived_page(args) -> Optional[TEDVideo]:
+    """进程池任务：从归档读取视频页并提取播放量、日期、时长和演讲稿"""
+    global _worker
+    root_dir, url = args
+    if _worker is None or _worker[0].root_dir != root_dir:
+        from ted_scraper_edge import TEDEdgeScraper
+        _worker = (PageArchive(root_dir, "replay"), TEDEdgeScraper())
+    archive, scraper = _worker
+    html = archive.get(url)
+    if html is None:
+        return None
+    video = TEDVideo(title="", speaker="", duration="", views=0, publish_date="", topic="", url=url)
+    scraper.get_video_details(video, html)
+    return video
+
+def replay_details(archive: PageArchive, videos: List[TEDVideo], workers: int = 0) -> List[TEDVideo]:
+    """回放模式下并行解析归档中的视频页并写回TEDVideo，返回归档中没有页面的视频"""
+    targets = [v for v in videos if v.url in archive.index]
+    missing = [v for v in videos if v.url not in archive.index]
+    workers = min(workers or os.cpu_count() or 1, max(1, len(targets)))
+    logger.info(f"从归档解析 {len(targets)} 个视频页（{workers} 个进程），归档中缺少 {len(missing)} 个")
+    tasks = [(archive.root_dir, v.url) for v in targets]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parsed = list(executor.map(_parse_archived_page, tasks, chunksize=16))
+    else:
+        parsed = [_parse_archived_page(task) for task in tasks]
+
+    for video, result in zip(targets, parsed):
+        if result is None:
+            missing.append(video)
+            continue
+        video.views = result.views
+        video.publish_date = result.publish_date
+        video.transcript = result.transcript
+        for field in ('title', 'speaker', 'duration', 'topic'):
+            if getattr(result, field) and (not getattr(video, field) or getattr(video, field).startswith('未知')):
+                setattr(video, field, getattr(result, field))
+    return missing
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parquet列式导出
+把本地目录中的全部视频（含演讲稿和所有元数据）导出为按 年份/主题 分区的Parquet数据集，
+从SQLite按批读取、按行组写入，内存占用与目录大小无关；
+下游可以按列读取或内存映射，无需再解析xlsx和大量txt文件。
+视频的主题来自目录的主题归属表 talk_topics（主题列表缓存记录的成员关系，以及视频自带的主题文本），
+多主题的视频在它的每个主题分区中各有一行，按主题筛选时分区裁剪不会漏掉视频；
+不按主题筛选读取全部数据时，用 is_primary 列（视频最先记录的主题）保证每个视频只取一行。
+先写入同级临时目录再替换输出目录；已存在的输出目录必须带有本程序写入的标记文件才会被替换
+
+用法：python parquet_export.py [输出目录]
+"""
+
+import itertools
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+from typing import Iterator
+
+from config import CATALOGUE_DB, PARQUET_DIR, PARQUET_ROW_GROUP_SIZE
+from talk_store import TalkStore, split_topics
+
+logger = logging.getLogger(__name__)
+
+# 导出目录中的标记文件（以下划线开头，pyarrow读取数据集时自动忽略），只有带标记的目录才会被覆盖
+MARKER_FILE = "_ted_parquet_export"
+
+COLUMNS = [
+    ("id", "string"),
+    ("title", "string"),
+    ("speaker", "string"),
+    ("url", "string"),
+    ("duration", "string"),
+    ("duration_seconds", "int32"),
+    ("views", "int64"),
+    ("views_checked_at", "string"),
+    ("publish_date", "string"),
+    ("year", "int32"),
+    ("topics", "string"),
+    ("topic", "string"),
+    ("is_primary", "bool_"),
+    ("transcript", "large_string"),
+    ("transcript_chars", "int32"),
+    ("first_seen_at", "string"),
+]
+
+def _schema(pa):
+    return pa.schema([(name, getattr(pa, type_name)()) for name, type_name in COLUMNS])
+
+def _iter_batches(pa, db_path: str, batch_size: int) -> Iterator:
+    """
+    按批从目录读取视频，每批转换为一个RecordBatch，每个 (视频, 主题) 一行；
+    主题按 talk_topics 的记录顺序联表读取，旧数据库中只记录在 talks.topic 文本里的主题追加在后面；
+    pyarrow在自己的线程中消费该迭代器，因此在迭代器内部单独打开数据库连接
+    """
+    schema = _schema(pa)
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.execute("""
+        SELECT t.id, t.title, t.speaker, t.url, t.duration, t.duration_seconds, t.views, t.views_checked_at,
+               t.publish_date, t.year, t.topic, t.transcript, t.first_seen_at, tt.topic AS listed_topic
+        FROM talks t LEFT JOIN talk_topics tt ON tt.talk_id = t.id
+        ORDER BY t.year, t.id, tt.rowid
+    """)
+    # 同一视频的联表行相邻，合并为 (视频行, 主题列表)
+    talks = (list(group) for _, group in itertools.groupby(cursor, key=lambda r: r['id']))
+    while True:
+        chunk = list(itertools.islice(talks, batch_size))
+        if not chunk:
+            conn.close()
+            break
+        columns = {name: [] for name, _ in COLUMNS}
+        for rows in chunk:
+            row = rows[0]
+            topics = [r['listed_topic'] for r in rows if r['listed_topic']]
+            topics += [t for t in split_topics(row['topic']) if t not in topics]
+            transcript = row['transcript'] or ""
+            for index, topic in enumerate(topics or ["unknown"]):
+                values = {
+                    "id": row['id'],
+                    "title": row['title'],
+                    "speaker": row['speaker'],
+                    "url": row['url'],
+                    "duration": row['duration'],
+                    "duration_seconds": row['duration_seconds'],
+                    "views": row['views'],
+                    "views_checked_at": row['views_checked_at'],
+                    "publish_date": row['publish_date'],
+                    "year": row['year'],
+                    "topics": ",".join(topics),
+                    "topic": topic,
+                    "is_primary": index == 0,
+                    "transcript": transcript or None,
+                    "transcript_chars": len(transcript),
+                    "first_seen_at": row['first_seen_at'],
+                }
+                for name, value in values.items():
+                    columns[name].append(value)
+        yield pa.RecordBatch.from_pydict(columns, schema=schema)
+
+def _replace_directory(new_dir: str, root_dir: str):
+    """用新导出的目录替换 root_dir；只删除带有标记文件的旧导出目录"""
+    if not os.path.exists(root_dir):
+        os.replace(new_dir, root_dir)
+        return
+    trash = tempfile.mkdtemp(prefix=os.path.basename(root_dir) + ".old-", dir=os.path.dirname(root_dir) or ".")
+    os.rmdir(trash)
+    os.replace(root_dir, trash)
+    os.replace(new_dir, root_dir)
+    shutil.rmtree(trash)
+
+def export_catalogue(store: TalkStore, root_dir: str = PARQUET_DIR, row_group_size: int = PARQUET_ROW_GROUP_SIZE) -> bool:
+    """
+    把目录导出为 root_dir/year=YYYY/topic=xxx/part-N.parquet，成功返回True；
+    root_dir 已存在时必须是空目录或上次的导出目录（带标记文件），否则拒绝覆盖
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+    except ImportError:
+        logger.error("Parquet导出需要安装pyarrow: pip install pyarrow")
+        return False
+
+    root_dir = os.path.abspath(root_dir)
+    if os.path.exists(root_dir) and os.listdir(root_dir) and not os.path.exists(os.path.join(root_dir, MARKER_FILE)):
+        logger.error(f"{root_dir} 已存在且不是Parquet导出目录（缺少标记文件 {MARKER_FILE}），为避免误删不会覆盖")
+        return False
+
+    total = store.conn.execute("SELECT COUNT(*) FROM talks").fetchone()[0]
+    staging = tempfile.mkdtemp(prefix=os.path.basename(root_dir) + ".tmp-", dir=os.path.dirname(root_dir))
+    try:
+        partitioning = ds.partitioning(pa.schema([("year", pa.int32()), ("topic", pa.string())]), flavor="hive")
+        ds.write_dataset(
+            _iter_batches(pa, store.db_path, row_group_size),
+            staging,
+            schema=_schema(pa),
+            format="parquet",
+            partitioning=partitioning,
+            basename_template="part-{i}.parquet",
+            max_rows_per_group=row_group_size,
+            min_rows_per_group=min(row_group_size, 1024),
+            existing_data_behavior="overwrite_or_ignore",
+        )
+        with open(os.path.join(staging, MARKER_FILE), 'w', encoding='utf-8') as f:
+            f.write("ted_scraper parquet export\n")
+        _replace_directory(staging, root_dir)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    logger.info(f"Parquet数据集已导出到 {root_dir}（{total} 个视频，按 year/topic 分区）")
+    return True
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    catalogue = TalkStore(CATALOGUE_DB)
+    try:
+        export_catalogue(catalogue, sys.argv[1] if len(sys.argv) > 1 else PARQUET_DIR)
+    finally:
+        catalogue.close()
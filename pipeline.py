@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式流水线
+各阶段之间用有界队列连接，每个阶段可以有多个工作线程：
+上游产出一条，下游就处理一条，总耗时接近最慢的阶段而不是所有阶段之和；
+队列有界，上游过快时会阻塞等待，内存占用不会随列表长度增长
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_END = object()  # 流结束标记
+
+class Stage:
+    """流水线阶段：fn(item) 返回处理后的item，返回None表示丢弃"""
+
+    def __init__(self, name: str, fn: Callable[[Any], Optional[Any]], workers: int = 1):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.passed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def _count(self, attr: str, seconds: float):
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+            self.busy_seconds += seconds
+
+class StreamingPipeline:
+    """有界队列连接的多阶段流水线"""
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self.stages: List[Stage] = []
+        self.produced = 0
+        self.incomplete = False  # 数据源出错提前结束时为True：结果只包含已产出的部分
+
+    def add_stage(self, name: str, fn: Callable[[Any], Optional[Any]], workers: int = 1) -> "StreamingPipeline":
+        self.stages.append(Stage(name, fn, workers))
+        return self
+
+    def _produce(self, source: Iterable, out_queue: queue.Queue, consumers: int):
+        try:
+            for item in source:
+                self.produced += 1
+                out_queue.put(item)
+        except Exception as e:
+            logger.error(f"流水线数据源出错，停止产出: {e}")
+            self.incomplete = True
+        finally:
+            for _ in range(consumers):
+                out_queue.put(_END)
+
+    def _work(self, stage: Stage, in_queue: queue.Queue, out_queue: queue.Queue, consumers: int, remaining: list):
+        while True:
+            item = in_queue.get()
+            if item is _END:
+                with stage._lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                # 本阶段最后一个工作线程退出时，通知下游的每个工作线程
+                if last:
+                    for _ in range(consumers):
+                        out_queue.put(_END)
+                return
+            start = time.perf_counter()
+            try:
+                result = stage.fn(item)
+            except Exception as e:
+                logger.warning(f"流水线阶段 [{stage.name}] 处理失败: {e}")
+                stage._count('failed', time.perf_counter() - start)
+                continue
+            if result is None:
+                stage._count('dropped', time.perf_counter() - start)
+            else:
+                stage._count('passed', time.perf_counter() - start)
+                out_queue.put(result)
+
+    def run(self, source: Iterable) -> List[Any]:
+        """运行流水线直到数据源耗尽，返回到达末端的全部item（保持到达顺序）"""
+        queues = [queue.Queue(self.queue_size) for _ in range(len(self.stages) + 1)]
+        threads = [threading.Thread(
+            target=self._produce, args=(source, queues[0], self.stages[0].workers if self.stages else 1),
+            name="pipeline-source", daemon=True)]
+        for idx, stage in enumerate(self.stages):
+            consumers = self.stages[idx + 1].workers if idx + 1 < len(self.stages) else 1
+            remaining = [stage.workers]
+            for n in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._work, args=(stage, queues[idx], queues[idx + 1], consumers, remaining),
+                    name=f"pipeline-{stage.name}-{n}", daemon=True))
+
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        results = []
+        while True:
+            item = queues[-1].get()
+            if item is _END:
+                break
+            results.append(item)
+
+        for thread in threads:
+            thread.join()
+        self.log_stats(time.perf_counter() - start)
+        return results
+
+    def log_stats(self, elapsed: float):
+        """输出各阶段统计"""
+        logger.info(f"流水线完成，耗时 {elapsed:.1f} 秒，数据源产出 {self.produced} 条"
+                    f"{'（数据源出错，未完整产出）' if self.incomplete else ''}")
+        for stage in self.stages:
+            logger.info(f"  [{stage.name}] 线程 {stage.workers}，通过 {stage.passed}，丢弃 {stage.dropped}，"
+                        f"失败 {stage.failed}，累计处理 {stage.busy_seconds:.1f} 秒")
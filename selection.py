@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按热度排序的区间选择（--sort popular）
+/talks 列表按热度（popular）排序时，列表顺序就是播放量的粗略排名：播放量前N一定出现在列表头部附近，
+后N出现在尾部附近。因此只需从列表两端逐批获取详情，每次向内扩大区间，
+直到最近连续几批视频的播放量都已越过当前第N名（头部低于第N高，尾部高于第N低），
+即可认为年份/时长范围内的前N和后N已经稳定，中间的大量视频无需访问；两端区间相遇时结果与全量访问完全一致。
+获取失败（播放量为0）的视频不参与排名，整批都获取失败时不算作稳定
+"""
+
+import logging
+from typing import Callable, List
+
+from ted_scraper_edge import TEDVideo
+
+logger = logging.getLogger(__name__)
+
+class PopularityBracket:
+    """
+    ranked: 按热度从高到低排列（已做时长筛选）的视频；
+    fetch(batch): 获取一批视频的播放量和发布时间；in_window(video): 是否在年份范围内
+    """
+
+    def __init__(self, ranked: List[TEDVideo], count: int, fetch: Callable[[List[TEDVideo]], None],
+                 in_window: Callable[[TEDVideo], bool], step: int = 50, stable_batches: int = 2):
+        self.ranked = ranked
+        self.count = count
+        self.fetch = fetch
+        self.in_window = in_window
+        self.step = max(1, step)
+        self.stable_batches = max(1, stable_batches)
+        self.head = 0                 # 头部区间 ranked[:head] 已获取
+        self.tail = len(ranked)       # 尾部区间 ranked[tail:] 已获取
+
+    @property
+    def fetch_count(self) -> int:
+        return self.head + len(self.ranked) - self.tail
+
+    def _eligible(self, videos: List[TEDVideo]) -> List[TEDVideo]:
+        """年份范围内且成功获取到播放量的视频"""
+        return [v for v in videos if v.views and self.in_window(v)]
+
+    def _head_quiet(self, batch: List[TEDVideo]) -> bool:
+        """这一批的播放量全部低于头部当前第N高，说明列表顺序已越过前N的边界"""
+        top = sorted(self._eligible(self.ranked[:self.head]), key=lambda v: v.views, reverse=True)
+        if len(top) < self.count:
+            return False
+        fetched = [v for v in batch if v.views]
+        threshold = top[self.count - 1].views
+        return bool(fetched) and all(v.views < threshold for v in fetched)
+
+    def _tail_quiet(self, batch: List[TEDVideo]) -> bool:
+        """这一批的播放量全部高于尾部当前第N低，说明列表顺序已越过后N的边界"""
+        bottom = sorted(self._eligible(self.ranked[self.tail:]), key=lambda v: v.views)
+        if len(bottom) < self.count:
+            return False
+        fetched = [v for v in batch if v.views]
+        threshold = bottom[self.count - 1].views
+        return bool(fetched) and all(v.views > threshold for v in fetched)
+
+    def run(self) -> tuple:
+        """逐批扩大两端区间直到前N和后N稳定，返回 (前N, 后N)，两组均按播放量从高到低排列"""
+        head_quiet = tail_quiet = 0
+        while self.head < self.tail:
+            if head_quiet < self.stable_batches:
+                batch = self.ranked[self.head:min(self.head + self.step, self.tail)]
+                self.fetch(batch)
+                self.head += len(batch)
+                head_quiet = head_quiet + 1 if self._head_quiet(batch) else 0
+            if self.head < self.tail and tail_quiet < self.stable_batches:
+                batch = self.ranked[max(self.tail - self.step, self.head):self.tail]
+                self.fetch(batch)
+                self.tail -= len(batch)
+                tail_quiet = tail_quiet + 1 if self._tail_quiet(batch) else 0
+            logger.info(f"区间选择：头部已获取 {self.head} 个，尾部已获取 {len(self.ranked) - self.tail} 个"
+                        f"（头部稳定 {head_quiet}/{self.stable_batches} 批，尾部稳定 {tail_quiet}/{self.stable_batches} 批）")
+            if head_quiet >= self.stable_batches and tail_quiet >= self.stable_batches:
+                break
+
+        covered = self.ranked if self.head >= self.tail else self.ranked[:self.head] + self.ranked[self.tail:]
+        eligible = sorted(self._eligible(covered), key=lambda v: v.views, reverse=True)
+        top = eligible[:self.count]
+        bottom = eligible[-self.count:] if len(eligible) >= self.count else []
+        logger.info(f"区间选择完成：获取详情 {self.fetch_count}/{len(self.ranked)} 个视频"
+                    f"{'（两端区间已相遇，结果为全量排名）' if self.head >= self.tail else ''}")
+        return top, bottom
@@ -12,6 +12,9 @@ import requests
 import zipfile
 import platform
 import logging
+import json
+import re
+import shutil
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -79,6 +82,37 @@ def get_edge_version():
         logger.warning(f"无法自动获取Edge版本: {e}")
         return None
 
+def get_edge_binary_path():
+    """获取本机Edge浏览器可执行文件路径"""
+    if platform.system() == "Windows":
+        candidates = [
+            r"C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe",
+            r"C:\Program Files\Microsoft\Edge\Application\msedge.exe"
+        ]
+    elif platform.system() == "Darwin":
+        candidates = [
+            '/Applications/Microsoft Edge.app/Contents/MacOS/Microsoft Edge',
+            '/Applications/Microsoft Edge Canary.app/Contents/MacOS/Microsoft Edge Canary'
+        ]
+    else:
+        candidates = [shutil.which('microsoft-edge') or '', shutil.which('microsoft-edge-stable') or '']
+
+    for path in candidates:
+        if path and os.path.exists(path):
+            return path
+    return None
+
+def get_edge_fingerprint():
+    """获取Edge浏览器可执行文件的指纹（路径+修改时间+大小），用于无需启动浏览器即可判断版本是否变化"""
+    path = get_edge_binary_path()
+    if not path:
+        return None
+    try:
+        stat = os.stat(os.path.realpath(path))
+        return f"{path}|{int(stat.st_mtime)}|{stat.st_size}"
+    except OSError:
+        return None
+
 def get_major_version(version):
     """获取主版本号"""
     if version:
@@ -157,6 +191,94 @@ def check_existing_driver():
     
     return None
 
+def get_driver_version(driver_path):
+    """获取Edge驱动版本（msedgedriver --version）"""
+    try:
+        process = subprocess.Popen([driver_path, '--version'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        output = process.communicate(timeout=10)[0].decode()
+        match = re.search(r'(\d+\.\d+\.\d+\.\d+)', output)
+        if match:
+            return match.group(1)
+    except Exception as e:
+        logger.debug(f"无法获取驱动版本 {driver_path}: {e}")
+    return None
+
+def load_driver_cache(cache_file):
+    """读取驱动缓存文件"""
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_driver_cache(cache_file, cache):
+    """写入驱动缓存文件"""
+    try:
+        cache_dir = os.path.dirname(cache_file)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        with open(cache_file, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, indent=2)
+    except OSError as e:
+        logger.warning(f"写入驱动缓存失败: {e}")
+
+def resolve_driver_path(cache_file="./drivers/driver_cache.json"):
+    """
+    解析可用的Edge驱动路径，结果缓存到本地：
+    1. 浏览器指纹未变且缓存的驱动仍存在 -> 直接返回缓存路径（不联网、不启动任何进程）
+    2. 浏览器版本未变 -> 更新指纹后返回缓存路径
+    3. 否则依次尝试本地已有驱动（主版本号需与浏览器一致）和 webdriver_manager 自动下载，并写入缓存
+    找不到时返回None，由调用方回退到系统PATH
+    """
+    cache = load_driver_cache(cache_file)
+    cached_path = cache.get('driver_path')
+    cached_ok = bool(cached_path) and os.path.exists(cached_path)
+    fingerprint = get_edge_fingerprint()
+
+    if cached_ok and fingerprint and cache.get('fingerprint') == fingerprint:
+        logger.info(f"使用缓存的Edge驱动: {cached_path} (浏览器版本 {cache.get('browser_version')})")
+        return cached_path
+
+    browser_version = get_edge_version()
+    if cached_ok and not fingerprint and not browser_version:
+        # 无法定位浏览器，也就无法校验版本，只能信任缓存
+        logger.info(f"无法检测Edge版本，使用缓存的Edge驱动: {cached_path}")
+        return cached_path
+    if cached_ok and browser_version and cache.get('browser_version') == browser_version:
+        cache['fingerprint'] = fingerprint
+        save_driver_cache(cache_file, cache)
+        logger.info(f"浏览器版本未变化，使用缓存的Edge驱动: {cached_path}")
+        return cached_path
+
+    logger.info(f"Edge驱动缓存失效（浏览器版本: {browser_version or '未知'}），重新解析驱动...")
+    browser_major = get_major_version(browser_version)
+    driver_path = None
+
+    existing_driver = check_existing_driver()
+    if existing_driver:
+        driver_major = get_major_version(get_driver_version(existing_driver))
+        if browser_major is None or driver_major == browser_major:
+            driver_path = existing_driver
+        else:
+            logger.info(f"本地驱动主版本 {driver_major} 与浏览器主版本 {browser_major} 不一致，跳过")
+
+    if not driver_path:
+        try:
+            from webdriver_manager.microsoft import EdgeChromiumDriverManager
+            logger.info("尝试自动下载Edge驱动...")
+            driver_path = EdgeChromiumDriverManager().install()
+        except Exception as e:
+            logger.warning(f"自动下载失败: {e}")
+            return None
+
+    save_driver_cache(cache_file, {
+        'driver_path': os.path.abspath(driver_path),
+        'browser_version': browser_version,
+        'fingerprint': fingerprint
+    })
+    logger.info(f"Edge驱动已解析并缓存: {driver_path}")
+    return driver_path
+
 def test_driver(driver_path):
     """测试Edge驱动是否可用"""
     try:
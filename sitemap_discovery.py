@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基于sitemap的视频发现（不需要浏览器）
+通过普通HTTP读取TED的sitemap索引和视频sitemap，使用流式XML解析逐条处理
+（内存占用与sitemap大小无关），并根据lastmod只输出上次运行之后新增或变化的视频
+"""
+
+import gzip
+import logging
+import re
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from typing import Iterator, Optional, Tuple
+
+import requests
+
+from ted_scraper_edge import TEDVideo, talk_id_from_url
+
+logger = logging.getLogger(__name__)
+
+# 视频详情页URL：/talks/<slug>，不含更深的子页面（如 /transcript）
+TALK_URL_PATTERN = re.compile(r'^https?://[^/]+/talks/[^/?#]+/?$')
+
+def parse_lastmod(value: Optional[str]) -> Optional[datetime]:
+    """解析sitemap的lastmod（W3C日期时间，可只有日期），统一为UTC时间"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+def _local_name(tag: str) -> str:
+    """去掉XML命名空间，{ns}url -> url"""
+    return tag.rsplit('}', 1)[-1]
+
+def iter_sitemap_entries(stream) -> Iterator[Tuple[str, Optional[str]]]:
+    """
+    流式解析sitemap（urlset或sitemapindex），逐条产出 (loc, lastmod)；
+    每处理完一条就清空已解析的元素，内存占用保持恒定
+    """
+    root = None
+    for event, elem in ET.iterparse(stream, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            continue
+        name = _local_name(elem.tag)
+        if name not in ('url', 'sitemap'):
+            continue
+        loc = lastmod = None
+        for child in elem:
+            child_name = _local_name(child.tag)
+            if child_name == 'loc':
+                loc = (child.text or '').strip()
+            elif child_name == 'lastmod':
+                lastmod = (child.text or '').strip()
+        if loc:
+            yield loc, lastmod
+        elem.clear()
+        if root is not None:
+            root.clear()
+
+class SitemapDiscovery:
+    """TED sitemap 视频发现"""
+
+    def __init__(self, index_url: str = "https://www.ted.com/sitemap.xml", session: Optional[requests.Session] = None,
+                 sitemap_filter: str = r'talk', timeout: float = 30):
+        self.index_url = index_url
+        self.session = session or requests.Session()
+        self.sitemap_filter = re.compile(sitemap_filter)
+        self.timeout = timeout
+        self.max_lastmod: Optional[datetime] = None  # 本次发现中见到的最新lastmod，作为下次运行的起点
+
+    def _iter_url(self, url: str) -> Iterator[Tuple[str, Optional[str]]]:
+        """以流的方式下载一个sitemap并逐条解析，支持 .xml.gz"""
+        with self.session.get(url, stream=True, timeout=self.timeout) as resp:
+            resp.raise_for_status()
+            resp.raw.decode_content = True
+            stream = resp.raw
+            if url.endswith('.gz'):
+                stream = gzip.GzipFile(fileobj=resp.raw)
+            yield from iter_sitemap_entries(stream)
+
+    def iter_talk_sitemaps(self) -> Iterator[Tuple[str, Optional[str]]]:
+        """遍历sitemap索引，只产出视频相关的子sitemap"""
+        for loc, lastmod in self._iter_url(self.index_url):
+            if self.sitemap_filter.search(loc):
+                yield loc, lastmod
+
+    def discover(self, since: Optional[str] = None) -> Iterator[TEDVideo]:
+        """
+        产出lastmod晚于since的视频（since为空则产出全部）；
+        子sitemap自身的lastmod早于since时整个跳过，不再下载
+        """
+        since_dt = parse_lastmod(since)
+        sitemap_count = talk_count = 0
+        for sitemap_url, sitemap_lastmod in self.iter_talk_sitemaps():
+            sitemap_dt = parse_lastmod(sitemap_lastmod)
+            if since_dt and sitemap_dt and sitemap_dt <= since_dt:
+                logger.debug(f"子sitemap未变化，跳过: {sitemap_url}")
+                continue
+            sitemap_count += 1
+            logger.info(f"读取视频sitemap: {sitemap_url}")
+            for loc, lastmod in self._iter_url(sitemap_url):
+                if not TALK_URL_PATTERN.match(loc):
+                    continue
+                lastmod_dt = parse_lastmod(lastmod)
+                if lastmod_dt and (self.max_lastmod is None or lastmod_dt > self.max_lastmod):
+                    self.max_lastmod = lastmod_dt
+                if since_dt and lastmod_dt and lastmod_dt <= since_dt:
+                    continue
+                talk_count += 1
+                url = loc.rstrip('/')
+                yield TEDVideo(title="", speaker="", duration="", views=0, publish_date="",
+                               topic="", url=url, id=talk_id_from_url(url))
+        logger.info(f"sitemap发现完成：读取 {sitemap_count} 个子sitemap，新增或变化的视频 {talk_count} 个")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地替身服务器（仅测试使用）
+在本机随机端口启动一个多线程HTTP服务，请求交给传入的处理函数，
+用于在不访问TED网站的情况下测试API客户端、sitemap解析等HTTP逻辑
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Tuple
+
+# 处理函数：(method, path, body) -> (状态码, Content-Type, 响应体)
+Handler = Callable[[str, str, bytes], Tuple[int, str, bytes]]
+
+class StandinServer:
+    """本地替身服务器，支持 with 语句自动启动/关闭"""
+
+    def __init__(self, handler: Handler):
+        self.handler = handler
+        self.requests = []  # 记录收到的请求 (method, path)
+        self._lock = threading.Lock()
+        server = self
+
+        class _RequestHandler(BaseHTTPRequestHandler):
+            def _dispatch(self, method):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b""
+                with server._lock:
+                    server.requests.append((method, self.path))
+                status, content_type, payload = server.handler(method, self.path, body)
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                self._dispatch('GET')
+
+            def do_POST(self):
+                self._dispatch('POST')
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), _RequestHandler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
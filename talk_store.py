@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TED视频本地目录（SQLite）
+每个视频ID一行，保存静态信息（标题、演讲者、时长、主题等）、当前播放量和演讲稿，
+并记录每次观测到的播放量时间序列、各个/talks列表最近一次读到的"of N"总数，
+以及按单个主题和排序方式缓存的列表成员（任意主题组合由各主题集合按视频ID合并得到）；
+发布年份、时长秒数、播放量和主题均建有索引，时长/时间/主题筛选和前N/后N排名直接用SQL查询完成
+"""
+
+import re
+import sqlite3
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ted_scraper_edge import TEDVideo, talk_id_from_url
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS talks (
+    id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    title TEXT,
+    speaker TEXT,
+    duration TEXT,
+    publish_date TEXT,
+    topic TEXT,
+    views INTEGER,
+    views_checked_at TEXT,
+    transcript TEXT,
+    first_seen_at TEXT,
+    year INTEGER,
+    duration_seconds INTEGER
+);
+CREATE TABLE IF NOT EXISTS talk_topics (
+    talk_id TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    PRIMARY KEY (talk_id, topic)
+);
+CREATE TABLE IF NOT EXISTS views_history (
+    talk_id TEXT NOT NULL,
+    observed_at TEXT NOT NULL,
+    views INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_views_history_talk ON views_history (talk_id, observed_at);
+CREATE TABLE IF NOT EXISTS listings (
+    url TEXT PRIMARY KEY,
+    total_count INTEGER,
+    checked_at TEXT
+);
+CREATE TABLE IF NOT EXISTS listing_talks (
+    listing_url TEXT NOT NULL,
+    talk_id TEXT NOT NULL,
+    PRIMARY KEY (listing_url, talk_id)
+);
+CREATE TABLE IF NOT EXISTS topic_listings (
+    topic TEXT NOT NULL,
+    sort TEXT NOT NULL,
+    total_count INTEGER,
+    checked_at TEXT,
+    PRIMARY KEY (topic, sort)
+);
+CREATE TABLE IF NOT EXISTS topic_listing_talks (
+    topic TEXT NOT NULL,
+    sort TEXT NOT NULL,
+    talk_id TEXT NOT NULL,
+    PRIMARY KEY (topic, sort, talk_id)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# 查询用索引（在旧数据库补齐列之后创建）
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_talks_year ON talks (year);
+CREATE INDEX IF NOT EXISTS idx_talks_duration ON talks (duration_seconds);
+CREATE INDEX IF NOT EXISTS idx_talks_views ON talks (views);
+CREATE INDEX IF NOT EXISTS idx_talk_topics_topic ON talk_topics (topic, talk_id);
+"""
+
+def _now() -> str:
+    """当前时间（ISO格式，精确到秒），同一格式下字符串比较即时间比较"""
+    return datetime.now().isoformat(timespec='seconds')
+
+def duration_seconds(duration: str) -> Optional[int]:
+    """时长文本（mm:ss 或 h:mm:ss）转秒数，无法识别返回None"""
+    if not duration or not re.match(r'^\d+(:\d{1,2}){1,2}$', duration.strip()):
+        return None
+    total = 0
+    for part in duration.strip().split(':'):
+        total = total * 60 + int(part)
+    return total
+
+def publish_year(publish_date: str) -> Optional[int]:
+    """发布时间文本中的年份"""
+    match = re.match(r'(\d{4})', publish_date or "")
+    return int(match.group(1)) if match else None
+
+def split_topics(topic: str) -> List[str]:
+    """逗号分隔的主题文本 -> 小写主题列表"""
+    return [t.strip().lower() for t in (topic or "").split(',') if t.strip()]
+
+class TalkStore:
+    """TED视频本地目录"""
+
+    def __init__(self, db_path: str = "ted_catalogue.db"):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+        self.conn.executescript(INDEXES)
+        self.conn.commit()
+
+    def _migrate(self):
+        """旧版本数据库补齐 year / duration_seconds 列并回填；不区分排序方式的旧主题列表缓存直接重建"""
+        listing_columns = {r['name'] for r in self.conn.execute("PRAGMA table_info(topic_listings)")}
+        if 'sort' not in listing_columns:
+            self.conn.execute("DROP TABLE topic_listings")
+            self.conn.execute("DROP TABLE IF EXISTS topic_listing_talks")
+            self.conn.executescript(SCHEMA)
+            logger.info("主题列表缓存已升级为按排序方式区分，旧缓存将在下次运行时重新抓取")
+        columns = {r['name'] for r in self.conn.execute("PRAGMA table_info(talks)")}
+        added = False
+        for column in ('year', 'duration_seconds'):
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE talks ADD COLUMN {column} INTEGER")
+                added = True
+        if added:
+            rows = self.conn.execute("SELECT id, duration, publish_date FROM talks").fetchall()
+            self.conn.executemany(
+                "UPDATE talks SET year = ?, duration_seconds = ? WHERE id = ?",
+                [(publish_year(r['publish_date']), duration_seconds(r['duration']), r['id']) for r in rows]
+            )
+            logger.info(f"目录数据库已升级，回填 {len(rows)} 个视频的年份和时长")
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+    def _video_id(self, video: TEDVideo) -> str:
+        """视频ID缺失时从URL补全"""
+        if not video.id:
+            video.id = talk_id_from_url(video.url)
+        return video.id
+
+    def upsert_static(self, videos: Iterable[TEDVideo]):
+        """批量写入视频静态信息（不覆盖已记录的播放量和发布时间，空字段不覆盖已有值）"""
+        now = _now()
+        videos = [v for v in videos if v.url]
+        rows = [
+            (self._video_id(v), v.url, v.title, v.speaker, v.duration, duration_seconds(v.duration), v.topic, now)
+            for v in videos
+        ]
+        self.conn.executemany("""
+            INSERT INTO talks (id, url, title, speaker, duration, duration_seconds, topic, first_seen_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                url = excluded.url,
+                title = CASE WHEN excluded.title NOT IN ('', '未知标题') THEN excluded.title ELSE talks.title END,
+                speaker = CASE WHEN excluded.speaker NOT IN ('', '未知演讲者') THEN excluded.speaker ELSE talks.speaker END,
+                duration = CASE WHEN excluded.duration NOT IN ('', '未知时长') THEN excluded.duration ELSE talks.duration END,
+                duration_seconds = COALESCE(excluded.duration_seconds, talks.duration_seconds),
+                topic = CASE WHEN excluded.topic != '' THEN excluded.topic ELSE talks.topic END
+        """, rows)
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO talk_topics (talk_id, topic) VALUES (?, ?)",
+            [(v.id, topic) for v in videos for topic in split_topics(v.topic)]
+        )
+        self.conn.commit()
+        logger.info(f"目录已更新 {len(rows)} 个视频的静态信息")
+
+    def record_views_many(self, videos: Iterable[TEDVideo], observed_at: Optional[str] = None):
+        """批量记录播放量观测：更新当前值并追加到时间序列（播放量为0视为获取失败，跳过）"""
+        observed_at = observed_at or _now()
+        updates, history = [], []
+        for video in videos:
+            if not video.views:
+                continue
+            talk_id = self._video_id(video)
+            updates.append((video.views, observed_at, video.publish_date, video.publish_date,
+                            publish_year(video.publish_date), talk_id))
+            history.append((talk_id, observed_at, video.views))
+        self.conn.executemany("""
+            UPDATE talks SET views = ?, views_checked_at = ?,
+                publish_date = CASE WHEN ? != '' THEN ? ELSE publish_date END,
+                year = COALESCE(?, year)
+            WHERE id = ?
+        """, updates)
+        self.conn.executemany("INSERT INTO views_history (talk_id, observed_at, views) VALUES (?, ?, ?)", history)
+        self.conn.commit()
+
+    def record_views(self, video: TEDVideo, observed_at: Optional[str] = None):
+        """记录一次播放量观测"""
+        self.record_views_many([video], observed_at)
+
+    def upsert_videos(self, videos: List[TEDVideo], observed_at: Optional[str] = None):
+        """批量写入抓取结果：静态信息、播放量观测和已获取的演讲稿"""
+        self.upsert_static(videos)
+        self.record_views_many(videos, observed_at)
+        self.conn.executemany(
+            "UPDATE talks SET transcript = ? WHERE id = ?",
+            [(v.transcript, v.id) for v in videos if v.transcript]
+        )
+        self.conn.commit()
+
+    def save_transcript(self, video: TEDVideo):
+        """保存演讲稿，刷新时已有演讲稿的视频无需再次访问页面"""
+        if video.transcript:
+            self.conn.execute("UPDATE talks SET transcript = ? WHERE id = ?", (video.transcript, self._video_id(video)))
+            self.conn.commit()
+
+    def _row_to_video(self, row: sqlite3.Row) -> TEDVideo:
+        return TEDVideo(
+            title=row['title'] or "",
+            speaker=row['speaker'] or "",
+            duration=row['duration'] or "",
+            views=row['views'] or 0,
+            publish_date=row['publish_date'] or "",
+            topic=row['topic'] or "",
+            url=row['url'],
+            transcript=row['transcript'] or "",
+            id=row['id']
+        )
+
+    def load_videos(self, ids: Optional[Iterable[str]] = None) -> List[TEDVideo]:
+        """按ID读取视频（不传ID则读取全部），返回顺序与传入ID一致"""
+        if ids is None:
+            rows = self.conn.execute("SELECT * FROM talks ORDER BY first_seen_at, id").fetchall()
+            return [self._row_to_video(r) for r in rows]
+        ids = list(ids)
+        by_id = {}
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for r in self.conn.execute(f"SELECT * FROM talks WHERE id IN ({placeholders})", chunk):
+                by_id[r['id']] = self._row_to_video(r)
+        return [by_id[i] for i in ids if i in by_id]
+
+    def select_stale(self, videos: List[TEDVideo], max_age_hours: float) -> List[TEDVideo]:
+        """筛选需要访问详情页的视频：新视频、没有发布时间的视频，以及播放量超过过期时间的视频"""
+        cutoff = (datetime.now() - timedelta(hours=max_age_hours)).isoformat(timespec='seconds')
+        checked: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        ids = [self._video_id(v) for v in videos]
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for r in self.conn.execute(
+                    f"SELECT id, views_checked_at, publish_date FROM talks WHERE id IN ({placeholders})", chunk):
+                checked[r['id']] = (r['views_checked_at'], r['publish_date'])
+        stale = []
+        for video in videos:
+            checked_at, publish_date = checked.get(video.id, (None, None))
+            if not checked_at or not publish_date or checked_at < cutoff:
+                stale.append(video)
+        return stale
+
+    def _where(self, start_year: Optional[int] = None, end_year: Optional[int] = None,
+               min_minutes: Optional[float] = None, max_minutes: Optional[float] = None,
+               topics: Optional[List[str]] = None, ids: Optional[Iterable[str]] = None) -> Tuple[str, list]:
+        """构造筛选条件；ids写入临时表后联表，避免超长IN列表"""
+        clauses, params = [], []
+        if start_year is not None:
+            clauses.append("t.year >= ?")
+            params.append(start_year)
+        if end_year is not None:
+            clauses.append("t.year <= ?")
+            params.append(end_year)
+        if min_minutes is not None:
+            clauses.append("t.duration_seconds >= ?")
+            params.append(int(min_minutes * 60))
+        if max_minutes is not None:
+            clauses.append("t.duration_seconds <= ?")
+            params.append(int(max_minutes * 60))
+        if topics:
+            wanted = [t.strip().lower() for t in topics]
+            clauses.append(f"t.id IN (SELECT talk_id FROM talk_topics WHERE topic IN ({','.join('?' * len(wanted))}))")
+            params.extend(wanted)
+        if ids is not None:
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS query_ids (id TEXT PRIMARY KEY)")
+            self.conn.execute("DELETE FROM query_ids")
+            self.conn.executemany("INSERT OR IGNORE INTO query_ids (id) VALUES (?)", [(i,) for i in ids])
+            clauses.append("t.id IN (SELECT id FROM query_ids)")
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query_videos(self, start_year: Optional[int] = None, end_year: Optional[int] = None,
+                     min_minutes: Optional[float] = None, max_minutes: Optional[float] = None,
+                     topics: Optional[List[str]] = None, ids: Optional[Iterable[str]] = None) -> List[TEDVideo]:
+        """按年份、时长、主题（命中任一即可）和ID范围查询视频，未指定的条件不限制"""
+        where, params = self._where(start_year, end_year, min_minutes, max_minutes, topics, ids)
+        rows = self.conn.execute(f"SELECT t.* FROM talks t{where} ORDER BY t.first_seen_at, t.id", params).fetchall()
+        logger.info(f"目录查询返回 {len(rows)} 个视频")
+        return [self._row_to_video(r) for r in rows]
+
+    def query_top_bottom(self, count: int, start_year: Optional[int] = None, end_year: Optional[int] = None,
+                         min_minutes: Optional[float] = None, max_minutes: Optional[float] = None,
+                         topics: Optional[List[str]] = None, ids: Optional[Iterable[str]] = None,
+                         checked_since: Optional[str] = None) -> tuple:
+        """
+        用播放量索引直接取前N和后N（与 get_top_and_bottom_videos 一致：
+        两组均按播放量从高到低排列，满足条件的视频不足N个时后N为空）；
+        只有成功获取到播放量的视频参与排名，获取失败的视频不会以0播放量进入后N；
+        给出checked_since（ISO时间）时只使用该时间之后获取的播放量，本次获取失败的视频不会带着上次的旧播放量参与排名
+        """
+        where, params = self._where(start_year, end_year, min_minutes, max_minutes, topics, ids)
+        where += (" AND " if where else " WHERE ") + "t.views > 0"
+        if checked_since:
+            stale = self.conn.execute(f"SELECT COUNT(*) FROM talks t{where} AND t.views_checked_at < ?",
+                                      params + [checked_since]).fetchone()[0]
+            if stale:
+                logger.warning(f"{stale} 个视频本次未获取到播放量（只有 {checked_since} 之前的旧数据），不参与排名")
+            where += " AND t.views_checked_at >= ?"
+            params = params + [checked_since]
+        total = self.conn.execute(f"SELECT COUNT(*) FROM talks t{where}", params).fetchone()[0]
+        top_rows = self.conn.execute(
+            f"SELECT t.* FROM talks t{where} ORDER BY t.views DESC, t.id LIMIT ?", params + [count]).fetchall()
+        bottom_rows = []
+        if total >= count:
+            bottom_rows = self.conn.execute(
+                f"SELECT t.* FROM talks t{where} ORDER BY t.views ASC, t.id DESC LIMIT ?", params + [count]).fetchall()
+        logger.info(f"目录中满足条件的视频 {total} 个")
+        return [self._row_to_video(r) for r in top_rows], [self._row_to_video(r) for r in reversed(bottom_rows)]
+
+    def get_listing(self, listing_url: str) -> Tuple[int, List[str]]:
+        """读取列表上次记录的总数和视频ID，未记录时返回 (0, [])"""
+        row = self.conn.execute("SELECT total_count FROM listings WHERE url = ?", (listing_url,)).fetchone()
+        if not row:
+            return 0, []
+        ids = [r['talk_id'] for r in self.conn.execute(
+            "SELECT talk_id FROM listing_talks WHERE listing_url = ?", (listing_url,))]
+        return row['total_count'] or 0, ids
+
+    def set_listing(self, listing_url: str, total_count: int, videos: List[TEDVideo]):
+        """记录列表的总数和成员"""
+        self.conn.execute("""
+            INSERT INTO listings (url, total_count, checked_at) VALUES (?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET total_count = excluded.total_count, checked_at = excluded.checked_at
+        """, (listing_url, total_count, _now()))
+        self.conn.execute("DELETE FROM listing_talks WHERE listing_url = ?", (listing_url,))
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO listing_talks (listing_url, talk_id) VALUES (?, ?)",
+            [(listing_url, self._video_id(v)) for v in videos]
+        )
+        self.conn.commit()
+
+    def get_topic_listing(self, topic: str, sort: str = 'newest') -> Tuple[int, Optional[str], List[str]]:
+        """
+        读取单个主题在某种排序下的列表缓存：("of N"总数, 检查时间, 视频ID)，未缓存时返回 (0, None, [])；
+        列表展开有点击上限，超长列表只包含排序靠前的部分，因此不同排序分别缓存
+        """
+        topic = topic.strip().lower()
+        row = self.conn.execute("SELECT total_count, checked_at FROM topic_listings WHERE topic = ? AND sort = ?",
+                                (topic, sort)).fetchone()
+        if not row:
+            return 0, None, []
+        ids = [r['talk_id'] for r in self.conn.execute(
+            "SELECT talk_id FROM topic_listing_talks WHERE topic = ? AND sort = ? ORDER BY rowid", (topic, sort))]
+        return row['total_count'] or 0, row['checked_at'], ids
+
+    def set_topic_listing(self, topic: str, total_count: int, videos: List[TEDVideo], sort: str = 'newest'):
+        """记录单个主题列表的总数和成员（替换旧成员），同时记录视频的主题归属"""
+        topic = topic.strip().lower()
+        self.conn.execute("""
+            INSERT INTO topic_listings (topic, sort, total_count, checked_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(topic, sort) DO UPDATE SET total_count = excluded.total_count, checked_at = excluded.checked_at
+        """, (topic, sort, total_count, _now()))
+        self.conn.execute("DELETE FROM topic_listing_talks WHERE topic = ? AND sort = ?", (topic, sort))
+        ids = [self._video_id(v) for v in videos]
+        self.conn.executemany("INSERT OR IGNORE INTO topic_listing_talks (topic, sort, talk_id) VALUES (?, ?, ?)",
+                              [(topic, sort, talk_id) for talk_id in ids])
+        self.conn.executemany("INSERT OR IGNORE INTO talk_topics (topic, talk_id) VALUES (?, ?)",
+                              [(topic, talk_id) for talk_id in ids])
+        self.conn.commit()
+
+    def touch_topic_listing(self, topic: str, sort: str = 'newest'):
+        """主题列表总数未变化：只更新检查时间"""
+        self.conn.execute("UPDATE topic_listings SET checked_at = ? WHERE topic = ? AND sort = ?",
+                          (_now(), topic.strip().lower(), sort))
+        self.conn.commit()
+
+    def stale_topics(self, topics: Iterable[str], max_age_hours: float, sort: str = 'newest') -> List[str]:
+        """在该排序下未缓存或检查时间早于 max_age_hours 的主题（保持传入顺序）"""
+        cutoff = (datetime.now() - timedelta(hours=max_age_hours)).isoformat(timespec='seconds')
+        checked = {r['topic']: r['checked_at'] for r in self.conn.execute(
+            "SELECT topic, checked_at FROM topic_listings WHERE sort = ?", (sort,))}
+        return [t for t in (t.strip().lower() for t in topics) if not checked.get(t) or checked[t] < cutoff]
+
+    def topic_listing_union(self, topics: Iterable[str], sort: str = 'newest') -> List[str]:
+        """多个主题缓存集合按视频ID取并集（/talks 的多主题筛选为命中任一主题）"""
+        ids: Dict[str, None] = {}
+        for topic in topics:
+            for talk_id in self.get_topic_listing(topic, sort)[2]:
+                ids.setdefault(talk_id)
+        return list(ids)
+
+    def get_meta(self, key: str) -> Optional[str]:
+        """读取运行状态（如上次sitemap发现的lastmod）"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row['value'] if row else None
+
+    def set_meta(self, key: str, value: str):
+        """写入运行状态"""
+        self.conn.execute("""
+            INSERT INTO meta (key, value) VALUES (?, ?)
+            ON CONFLICT(key) DO UPDATE SET value = excluded.value
+        """, (key, value))
+        self.conn.commit()
+
+    def views_history(self, talk_id: str) -> List[Tuple[str, int]]:
+        """读取某个视频的播放量时间序列 [(观测时间, 播放量), ...]"""
+        return [(r['observed_at'], r['views']) for r in self.conn.execute(
+            "SELECT observed_at, views FROM views_history WHERE talk_id = ? ORDER BY observed_at", (talk_id,))]
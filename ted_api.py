@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TED GraphQL API 客户端
+TED网站前端通过 /graphql 接口获取视频数据，这里直接请求该接口：
+一次请求用GraphQL别名批量查询多个slug的播放量、发布时间、时长（可选演讲稿），
+替代逐个打开视频页面再用正则提取的方式
+"""
+
+import re
+import logging
+from typing import Dict, Iterator, List, Optional
+
+import requests
+
+from ted_scraper_edge import TEDVideo, talk_id_from_url
+
+logger = logging.getLogger(__name__)
+
+# 单个视频需要的字段
+VIDEO_FIELDS = """
+    id
+    slug
+    title
+    presenterDisplayName
+    duration
+    viewedCount
+    publishedAt
+    topics { nodes { name } }
+"""
+
+# 演讲稿字段（按段落和字幕片段组织）
+TRANSCRIPT_FIELDS = """
+    paragraphs { cues { text } }
+"""
+
+# 分页遍历全部视频
+LIST_QUERY = """
+query ($first: Int!, $after: String) {
+  videos(first: $first, after: $after, language: "en") {
+    pageInfo { hasNextPage endCursor }
+    nodes { %s }
+  }
+}
+""" % VIDEO_FIELDS
+
+class TEDAPIError(Exception):
+    """API请求失败"""
+
+class TEDGraphQLClient:
+    """TED GraphQL 批量客户端"""
+
+    def __init__(self, api_url: str = "https://www.ted.com/graphql", batch_size: int = 50,
+                 session: Optional[requests.Session] = None, timeout: float = 15):
+        self.api_url = api_url
+        self.batch_size = max(1, batch_size)
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.session.headers.update({
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+            'client-id': 'Zenith production'
+        })
+        self.request_count = 0
+
+    def _post(self, query: str, variables: Dict) -> Dict:
+        """发送一次GraphQL请求，返回data部分；部分字段报错时保留已返回的数据"""
+        self.request_count += 1
+        try:
+            resp = self.session.post(self.api_url, json={'query': query, 'variables': variables}, timeout=self.timeout)
+            resp.raise_for_status()
+            payload = resp.json()
+        except (requests.RequestException, ValueError) as e:
+            raise TEDAPIError(f"GraphQL请求失败: {e}") from e
+        if payload.get('errors'):
+            logger.warning(f"GraphQL返回错误: {payload['errors'][:3]}")
+        if payload.get('data') is None:
+            raise TEDAPIError(f"GraphQL未返回数据: {payload.get('errors')}")
+        return payload['data']
+
+    def _build_batch_query(self, count: int, with_transcript: bool) -> str:
+        """
+        构造批量查询：每个slug对应变量 $s{i}，视频别名为 t{i}，演讲稿别名为 x{i}；
+        translation 的 videoId 参数类型为 ID!，使用单独的变量 $v{i}（值同为slug），
+        避免严格校验时因类型不符拒绝整批查询（连同播放量一起丢失）
+        """
+        params = [f"$s{i}: String!" for i in range(count)]
+        if with_transcript:
+            params += [f"$v{i}: ID!" for i in range(count)]
+        params = ", ".join(params)
+        parts = []
+        for i in range(count):
+            parts.append(f"  t{i}: video(slug: $s{i}, language: \"en\") {{ {VIDEO_FIELDS} }}")
+            if with_transcript:
+                parts.append(f"  x{i}: translation(videoId: $v{i}, language: \"en\") {{ {TRANSCRIPT_FIELDS} }}")
+        return f"query ({params}) {{\n" + "\n".join(parts) + "\n}"
+
+    def fetch_talks(self, slugs: List[str], with_transcript: bool = False) -> Dict[str, Dict]:
+        """
+        按batch_size分批查询视频数据，返回 {slug: 视频数据}（演讲稿在 'transcript' 键中），
+        查询不到的slug不出现在结果中
+        """
+        results = {}
+        for start in range(0, len(slugs), self.batch_size):
+            batch = slugs[start:start + self.batch_size]
+            query = self._build_batch_query(len(batch), with_transcript)
+            variables = {f"s{i}": slug for i, slug in enumerate(batch)}
+            if with_transcript:
+                variables.update({f"v{i}": slug for i, slug in enumerate(batch)})
+            try:
+                data = self._post(query, variables)
+            except TEDAPIError as e:
+                logger.error(f"批量查询失败（{len(batch)} 个视频）: {e}")
+                continue
+            for i, slug in enumerate(batch):
+                talk = data.get(f"t{i}")
+                if not talk:
+                    continue
+                if with_transcript:
+                    talk['transcript'] = transcript_text(data.get(f"x{i}"))
+                results[slug] = talk
+            logger.info(f"API批量查询 {start + len(batch)}/{len(slugs)}，本批返回 {sum(1 for s in batch if s in results)} 个")
+        return results
+
+    def iter_talks(self, page_size: Optional[int] = None) -> Iterator[Dict]:
+        """按游标分页遍历全部视频"""
+        after = None
+        while True:
+            data = self._post(LIST_QUERY, {'first': page_size or self.batch_size, 'after': after})
+            connection = data.get('videos') or {}
+            for node in connection.get('nodes') or []:
+                yield node
+            page_info = connection.get('pageInfo') or {}
+            if not page_info.get('hasNextPage'):
+                break
+            after = page_info.get('endCursor')
+
+def transcript_text(translation: Optional[Dict]) -> str:
+    """把 paragraphs/cues 结构拼接为与网页ld+json一致的单行文本"""
+    if not translation:
+        return ""
+    texts = []
+    for paragraph in translation.get('paragraphs') or []:
+        for cue in paragraph.get('cues') or []:
+            text = (cue.get('text') or "").replace('\n', ' ').strip()
+            if text:
+                texts.append(text)
+    return " ".join(texts)
+
+def seconds_to_mmss(seconds) -> str:
+    """秒数转 mm:ss 文本（与列表页显示的时长格式一致）"""
+    try:
+        seconds = int(seconds)
+    except (TypeError, ValueError):
+        return "未知时长"
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+def apply_talk_data(video: TEDVideo, talk: Dict):
+    """用API数据填充TEDVideo（只覆盖API确实返回的字段）"""
+    if talk.get('viewedCount') is not None:
+        video.views = int(talk['viewedCount'])
+    match = re.match(r'(\d{4})', talk.get('publishedAt') or "")
+    if match:
+        video.publish_date = match.group(1)
+    if talk.get('duration'):
+        video.duration = seconds_to_mmss(talk['duration'])
+    if talk.get('title') and (not video.title or video.title == "未知标题"):
+        video.title = talk['title']
+    if talk.get('presenterDisplayName') and (not video.speaker or video.speaker == "未知演讲者"):
+        video.speaker = talk['presenterDisplayName']
+    topics = [n.get('name') for n in ((talk.get('topics') or {}).get('nodes') or []) if n.get('name')]
+    if topics and not video.topic:
+        video.topic = ",".join(topics)
+    if talk.get('transcript'):
+        video.transcript = talk['transcript']
+
+def video_from_talk_data(talk: Dict, base_url: str = "https://www.ted.com") -> TEDVideo:
+    """由API数据构造TEDVideo"""
+    slug = talk.get('slug') or ""
+    video = TEDVideo(title="", speaker="", duration="未知时长", views=0, publish_date="",
+                     topic="", url=f"{base_url}/talks/{slug}", id=slug)
+    apply_talk_data(video, talk)
+    return video
+
+def fetch_details_via_api(client: TEDGraphQLClient, videos: List[TEDVideo], with_transcript: bool = False) -> List[TEDVideo]:
+    """批量获取视频详情并写回TEDVideo，返回API未能返回数据的视频（由调用方回退到页面抓取）"""
+    for video in videos:
+        if not video.id:
+            video.id = talk_id_from_url(video.url)
+    talks = client.fetch_talks([v.id for v in videos if v.id], with_transcript=with_transcript)
+    missing = []
+    for video in videos:
+        talk = talks.get(video.id)
+        if talk:
+            apply_talk_data(video, talk)
+        else:
+            missing.append(video)
+    logger.info(f"API获取详情 {len(videos) - len(missing)}/{len(videos)} 个，共 {client.request_count} 次请求")
+    return missing
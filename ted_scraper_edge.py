@@ -6,6 +6,9 @@ TED视频筛选和文稿获取程序 - Edge浏览器版本
 1. 根据主题、时长、发布时间(2018-2022)筛选视频
 2. 获取播放量前100和后100的视频
 3. 提取这些视频的演讲文稿
+
+注意：selenium / BeautifulSoup / pandas(openpyxl) 均在用到的阶段才导入，
+仅构造URL或只走HTTP的命令不会付出浏览器和表格依赖的导入开销
 """
 
 import requests
@@ -15,21 +18,22 @@ import re
 import argparse
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Callable, Dict, Iterator, List, Optional
 from dataclasses import dataclass
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.edge.service import Service
-from selenium.webdriver.edge.options import Options
-from webdriver_manager.microsoft import EdgeChromiumDriverManager
-from bs4 import BeautifulSoup
-import pandas as pd
 import logging
 import os
 import urllib.parse
 from config import TOPICS, START_YEAR, END_YEAR, MIN_DURATION, MAX_DURATION, OUTPUT_FILENAME, SORT, TOP_VIDEOS_COUNT
+from config import DRIVER_CACHE_FILE, EDGE_PROFILE_DIR, COOKIE_CONSENT_NAME, CATALOGUE_DB, REFRESH_STALE_HOURS, API_URL, API_BATCH_SIZE, SITEMAP_URL
+from config import TOPIC_CACHE_HOURS, LISTING_MAX_CLICKS, VIEWS_COMMIT_EVERY
+from config import REQUEST_DELAY, PIPELINE_QUEUE_SIZE, PIPELINE_DETAIL_WORKERS
+from config import ANALYTICS_WORKERS, ANALYTICS_CHUNK_SIZE, ARCHIVE_DIR, ARCHIVE_REPLAY_WORKERS
+from config import SELECTION_STEP, SELECTION_STABLE_BATCHES
+from config import AUTOTUNE_MIN_WORKERS, AUTOTUNE_MAX_WORKERS, AUTOTUNE_WINDOW, AUTOTUNE_MAX_LATENCY, AUTOTUNE_MAX_ERROR_RATE
+from config import DRIVER_MAX_PAGES, DRIVER_MAX_RSS_MB, DRIVER_MAX_TIMEOUTS, PAGE_LOAD_TIMEOUT
+from config import DRIVER_RESTART_ATTEMPTS, DRIVER_RESTART_BACKOFF
+from setup_edge_driver import resolve_driver_path, save_driver_cache
+from driver_watchdog import DriverWatchdog
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -48,12 +52,26 @@ class TEDVideo:
     transcript: str = ""
     id: str = ""  # 添加ID用于更可靠的去重
 
+def talk_id_from_url(url: str) -> str:
+    """从视频URL提取slug作为视频ID，例如 https://www.ted.com/talks/foo_bar?language=en -> foo_bar"""
+    path = urllib.parse.urlparse(url).path.rstrip('/')
+    if '/talks/' not in path:
+        return ""
+    return path.split('/talks/', 1)[1].split('/')[0]
+
 class TEDEdgeScraper:
     """TED视频爬取器 - Edge浏览器版本"""
     
     def __init__(self):
         self.base_url = "https://www.ted.com"
         self.driver = None
+        self.last_listing_total = 0  # 最近一次展开列表时读到的"of N"总数
+        self.last_listing_complete = True  # 最近一次展开列表是否完整（出错或被提前停止时为False）
+        self.last_listing_reached_end = True  # 最近一次展开列表是否加载到了列表末尾（受点击上限截断时为False）
+        self.analyze_transcripts = False  # 保存结果时是否分析演讲稿并追加特征列（--analyze）
+        self.archive = None  # 页面归档（--record 录制 / --replay 回放）
+        self.catalogue_db = CATALOGUE_DB  # 本地目录数据库（回放模式使用归档目录中单独的数据库）
+        self.watchdog = DriverWatchdog(DRIVER_MAX_PAGES, DRIVER_MAX_RSS_MB, DRIVER_MAX_TIMEOUTS)
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36',
@@ -62,7 +80,12 @@ class TEDEdgeScraper:
         })
         
     def setup_driver(self):
-        """设置Edge浏览器驱动"""
+        """设置Edge浏览器驱动（驱动路径走本地缓存，浏览器使用持久化配置目录，同一次运行只启动一次）"""
+        if self.driver:
+            return
+        from selenium import webdriver
+        from selenium.webdriver.edge.service import Service
+        from selenium.webdriver.edge.options import Options
         try:
             edge_options = Options()
             edge_options.add_argument("--headless")  # 无头模式
@@ -71,45 +94,33 @@ class TEDEdgeScraper:
             edge_options.add_argument("--disable-gpu")
             edge_options.add_argument("--window-size=1920,1080")
             edge_options.add_argument("--ignore-certificate-errors")  # 添加此行解决SSL问题
+            if EDGE_PROFILE_DIR:
+                # 持久化配置目录：Cookie同意状态和站点缓存跨运行保留
+                profile_dir = os.path.abspath(EDGE_PROFILE_DIR)
+                os.makedirs(profile_dir, exist_ok=True)
+                edge_options.add_argument(f"--user-data-dir={profile_dir}")
             
-            # 尝试多种方式设置驱动
-            driver_path = None
-            
-            # 方法1：尝试自动下载Edge驱动
-            try:
-                logger.info("尝试自动下载Edge驱动...")
-                service = Service(EdgeChromiumDriverManager().install())
-                self.driver = webdriver.Edge(service=service, options=edge_options)
-                logger.info("Edge驱动自动下载成功")
-                return
-            except Exception as e:
-                logger.warning(f"自动下载失败: {e}")
-            
-            # 方法2：尝试使用本地Edge驱动文件
-            local_drivers = [
-                "./msedgedriver.exe",  # Windows Edge驱动
-                "./drivers/msedgedriver.exe",
-                "./edgedriver.exe",
-                "./drivers/edgedriver.exe",
-                "D:/Drivers/edgedriver_win32/msedgedriver.exe"
-            ]
-            
-            for driver_path in local_drivers:
-                if os.path.exists(driver_path):
-                    try:
-                        logger.info(f"使用本地Edge驱动: {driver_path}")
-                        service = Service(driver_path)
-                        self.driver = webdriver.Edge(service=service, options=edge_options)
-                        logger.info("Edge驱动设置成功")
-                        return
-                    except Exception as e:
-                        logger.warning(f"本地Edge驱动 {driver_path} 加载失败: {e}")
-                        continue
+            # 方法1：使用缓存的驱动路径（缓存失效时才检查本地驱动或自动下载）
+            driver_path = resolve_driver_path(DRIVER_CACHE_FILE)
+            if driver_path:
+                try:
+                    service = Service(driver_path)
+                    self.driver = webdriver.Edge(service=service, options=edge_options)
+                    self.driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+                    self.watchdog.reset()
+                    logger.info(f"Edge驱动设置成功: {driver_path}")
+                    return
+                except Exception as e:
+                    logger.warning(f"Edge驱动 {driver_path} 加载失败: {e}")
+                    # 缓存的驱动不可用，清除缓存以便下次重新解析
+                    save_driver_cache(DRIVER_CACHE_FILE, {})
             
-            # 方法3：尝试使用系统PATH中的Edge驱动
+            # 方法2：尝试使用系统PATH中的Edge驱动
             try:
                 logger.info("尝试使用系统PATH中的Edge驱动...")
                 self.driver = webdriver.Edge(options=edge_options)
+                self.driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+                self.watchdog.reset()
                 logger.info("Edge驱动设置成功")
                 return
             except Exception as e:
@@ -126,239 +137,465 @@ class TEDEdgeScraper:
             logger.error("3. 使用简化版爬取器（不需要浏览器）")
             raise
     
+    def accept_cookies(self):
+        """关闭Cookie弹窗；浏览器中已有同意Cookie（持久化配置目录跨运行保留）时直接跳过等待"""
+        try:
+            if self.driver.get_cookie(COOKIE_CONSENT_NAME):
+                logger.debug("浏览器中已有Cookie同意记录，跳过等待")
+                return
+        except Exception as e:
+            logger.debug(f"读取Cookie失败: {e}")
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        try:
+            WebDriverWait(self.driver, 5).until(
+                EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Accept all')]"))
+            ).click()
+            logger.info("成功关闭Cookie弹窗")
+            time.sleep(1)  # 给页面一点时间响应
+        except Exception as e:
+            logger.debug(f"未找到Cookie弹窗: {e}")
+    
     def close_driver(self):
         """关闭浏览器驱动"""
         if self.driver:
-            self.driver.quit()
+            try:
+                self.driver.quit()
+            except Exception as e:
+                logger.warning(f"关闭Edge驱动出错: {e}")
+            self.driver = None
             logger.info("Edge驱动已关闭")
     
+    def start_driver(self) -> bool:
+        """启动浏览器，失败时退避重试（DRIVER_RESTART_BACKOFF 秒起逐次翻倍），全部失败返回False而不抛出异常"""
+        delay = DRIVER_RESTART_BACKOFF
+        for attempt in range(1, DRIVER_RESTART_ATTEMPTS + 1):
+            try:
+                self.setup_driver()
+                return True
+            except Exception as e:
+                logger.warning(f"浏览器启动失败（第 {attempt}/{DRIVER_RESTART_ATTEMPTS} 次）: {e}")
+                if attempt < DRIVER_RESTART_ATTEMPTS:
+                    time.sleep(delay)
+                    delay *= 2
+        return False
+    
+    def recycle_driver(self, reason: str) -> bool:
+        """
+        重启浏览器释放内存；持久化配置目录保留Cookie和缓存，调用方的处理进度不受影响；
+        重启失败返回False（浏览器保持关闭，下次访问页面时再尝试启动）
+        """
+        self.watchdog.recycle_count += 1
+        logger.info(f"回收浏览器（第 {self.watchdog.recycle_count} 次）: {reason}")
+        self.close_driver()
+        return self.start_driver()
+    
+    def _load_page(self, url: str) -> bool:
+        """
+        通过看门狗访问页面：访问前按页面数/内存/连续超时判断是否需要回收浏览器，
+        超时后记录并在必要时回收浏览器重试一次，仍失败返回False；
+        浏览器无法（重新）启动时同样只让当前页面失败，不中断整个运行
+        """
+        from selenium.common.exceptions import TimeoutException, WebDriverException
+        
+        for attempt in range(2):
+            if not self.driver and not self.start_driver():
+                break
+            reason = self.watchdog.recycle_reason(self.driver)
+            if reason and not self.recycle_driver(reason):
+                break
+            try:
+                self.driver.get(url)
+                self.watchdog.record_page()
+                return True
+            except TimeoutException:
+                self.watchdog.record_timeout()
+                logger.warning(f"页面加载超时（连续 {self.watchdog.consecutive_timeouts} 次）: {url}")
+            except WebDriverException as e:
+                # 浏览器崩溃或会话失效，直接回收
+                logger.warning(f"浏览器会话异常: {e}")
+                if not self.recycle_driver("浏览器会话异常"):
+                    break
+        logger.error(f"页面加载失败: {url}")
+        return False
+    
+    @property
+    def replaying(self) -> bool:
+        """是否处于回放模式（所有页面从归档读取，不访问网络）"""
+        return self.archive is not None and self.archive.replay
+    
+    @property
+    def recording(self) -> bool:
+        """是否处于录制模式（获取到的页面写入归档）"""
+        return self.archive is not None and not self.archive.replay
+    
+    def observed_at(self, url: str) -> Optional[str]:
+        """播放量的观测时间：回放模式为页面的录制时间，否则为None（由目录使用当前时间）"""
+        return self.archive.observed_at(url) if self.replaying else None
+    
+    def _archive_page(self, url: str, html: Optional[str], kind: str = "talk"):
+        """录制模式下把获取到的页面写入归档"""
+        if self.recording and html:
+            self.archive.record(url, html, kind)
+    
+    def _archived_page(self, url: str) -> Optional[str]:
+        """回放模式下从归档读取页面，归档中没有时返回None"""
+        html = self.archive.get(url)
+        if html is None:
+            logger.warning(f"归档中没有该页面: {url}")
+        return html
+    
+    def _browser_page_source(self, url: str) -> Optional[str]:
+        """用浏览器加载页面并返回源码（录制模式写入归档；回放模式直接读取归档，不启动浏览器），失败返回None"""
+        if self.replaying:
+            return self._archived_page(url)
+        if not self._load_page(url):
+            return None
+        time.sleep(2)  # 给页面基本加载留出时间
+        html = self.driver.page_source
+        self._archive_page(url, html)
+        return html
+    
 
-    def get_videos_by_talks_url(self, talks_url: str) -> List[TEDVideo]:
-        """根据/talks URL抓取视频列表，直接从DOM提取数据"""
+    def _open_listing(self, talks_url: str) -> int:
+        """打开/talks列表页，等待首批视频卡片加载，返回"24 of n"中的总视频数（读取失败返回0）"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        
+        if not self._load_page(talks_url):
+            raise Exception(f"列表页加载失败: {talks_url}")
+        
+        # 等待Cookie弹窗（如果存在）并关闭
+        self.accept_cookies()
+        
+        # 等待视频卡片加载
+        logger.info("等待视频卡片加载...")
+        WebDriverWait(self.driver, 15).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, "div.xs-tui\\:col-span-1 > a.relative[href*='/talks/']"))
+        )
+        logger.info("视频卡片已加载")
+        
+        total_videos = 0
+        try:
+            # 提取"24 of n"中的总视频数
+            count_element = self.driver.find_element(
+                By.CSS_SELECTOR, "p.text-textPrimary-onLight.font-normal.body2"
+            )
+            count_text = count_element.text
+            logger.info(f"视频计数文本: {count_text}")
+            
+            # 使用正则提取总视频数
+            match = re.search(r'of (\d+)', count_text)
+            if match:
+                total_videos = int(match.group(1))
+                logger.info(f"总共有 {total_videos} 个视频")
+            else:
+                logger.warning("无法从文本中提取总视频数")
+        except Exception as e:
+            logger.warning(f"无法获取总视频数: {e}")
+        return total_videos
+    
+    def get_listing_total(self, talks_url: str) -> int:
+        """只读取/talks列表的视频总数（不展开列表），用于增量刷新时判断列表是否变化"""
+        if self.replaying:
+            html = self._archived_page(talks_url)
+            return self._parse_listing_html(html)[0] if html else 0
         if not self.driver:
             self.setup_driver()
+        try:
+            return self._open_listing(talks_url)
+        except Exception as e:
+            logger.error(f"读取视频总数失败: {e}")
+            return 0
+    
+    def _parse_card(self, card) -> Optional[TEDVideo]:
+        """解析单个视频卡片元素，URL缺失时返回None"""
+        from selenium.webdriver.common.by import By
         
-        videos = []
-        seen_urls = set()
+        # 1. 提取URL
+        url = card.get_attribute('href')
+        if not url:
+            return None
+        if not url.startswith('http'):
+            url = self.base_url + url
         
+        # 2. 提取标题
+        title = "未知标题"
         try:
-            logger.info(f"开始抓取视频: {talks_url}")
-            self.driver.get(talks_url)
-            
-            # 等待Cookie弹窗（如果存在）并关闭
+            # 尝试主要标题选择器
+            title_elem = card.find_element(By.CSS_SELECTOR, "span.text-textPrimary-onLight.font-bold.subheader2")
+            title = title_elem.text.strip() or "未知标题"
+        except:
             try:
-                WebDriverWait(self.driver, 5).until(
-                    EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Accept all')]"))
-                ).click()
-                logger.info("成功关闭Cookie弹窗")
-                time.sleep(1)  # 给页面一点时间响应
-            except Exception as e:
-                logger.debug(f"未找到Cookie弹窗: {e}")
-            
-            # 等待视频卡片加载
-            logger.info("等待视频卡片加载...")
-            WebDriverWait(self.driver, 15).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div.xs-tui\\:col-span-1 > a.relative[href*='/talks/']"))
-            )
-            logger.info("视频卡片已加载")
-            
-            # 等待视频卡片加载
-            logger.info("等待视频卡片加载...")
-            WebDriverWait(self.driver, 15).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div.xs-tui\\:col-span-1 > a.relative[href*='/talks/']"))
-            )
-            logger.info("视频卡片已加载")
-            
+                # 备用选择器
+                title_elem = card.find_element(By.CSS_SELECTOR, "img[alt]")
+                title = title_elem.get_attribute('alt') or "未知标题"
+            except:
+                pass
+        
+        # 3. 提取演讲者
+        speaker = "未知演讲者"
+        try:
+            # 尝试主要演讲者选择器（带uppercase的）
+            speaker_elem = card.find_element(By.CSS_SELECTOR, "p.text-textTertiary-onLight.label1.uppercase.font-semibold")
+            speaker = speaker_elem.text.strip()
+        except:
+            try:
+                # 备用演讲者选择器（不带uppercase的）
+                speaker_elem = card.find_element(By.CSS_SELECTOR, "p.text-textTertiary-onLight.label1:not(.uppercase)")
+                speaker = speaker_elem.text.strip()
+            except:
+                pass
+        
+        # 4. 提取时长
+        duration = "未知时长"
+        try:
+            # 方法1: 使用XPath精确定位时长元素
+            duration_elem = card.find_element(By.XPATH, 
+                ".//div[contains(@class, 'absolute') and contains(@class, 'bottom-2') and contains(@class, 'right-2')]//span[contains(@class, 'font-semibold')]")
+            duration = duration_elem.text.strip()
             
-            # === 获取总视频数并计算需要点击的次数 ===
-            total_videos = 0
+            # 验证是否是有效的时长格式 (MM:SS)
+            if not re.match(r'\d{1,2}:\d{2}', duration):
+                duration = "未知时长"
+        except:
+            pass
+        
+        return TEDVideo(
+            title=title,
+            speaker=speaker,
+            duration=duration,
+            views=0,
+            publish_date="",
+            topic="",
+            url=url,
+            id=talk_id_from_url(url)
+        )
+    
+    def iter_videos_by_talks_url(self, talks_url: str) -> Iterator[TEDVideo]:
+        """
+        根据/talks URL逐批产出视频：首批卡片加载后立即产出，
+        之后每点击一次"Show 24 more"就产出新加载的卡片，下游无需等待整个列表展开；
+        回放模式下直接解析归档中展开完成的列表页
+        """
+        self.last_listing_reached_end = False
+        if self.replaying:
+            html = self._archived_page(talks_url)
+            if html is None:
+                raise Exception(f"归档中没有列表页: {talks_url}")
+            self.last_listing_total, videos = self._parse_listing_html(html)
+            logger.info(f"从归档列表页解析到 {len(videos)} 个视频")
+            yield from videos
+            self.last_listing_reached_end = len(videos) >= self.last_listing_total
+            return
+        if not self.driver:
+            self.setup_driver()
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        card_selector = "div.xs-tui\\:col-span-1 > a.relative[href*='/talks/']"
+        
+        seen_urls = set()
+        parsed_cards = 0
+        json_videos: Dict[str, TEDVideo] = {}
+        
+        def new_videos():
+            """解析上次之后新加载的卡片：内嵌JSON中已有的视频直接使用，其余卡片才走DOM选择器"""
+            nonlocal parsed_cards
+            video_cards = self.driver.find_elements(By.CSS_SELECTOR, card_selector)
+            # 一次脚本调用取得全部卡片链接，避免逐个卡片读取属性
+            hrefs = self.driver.execute_script(
+                "return arguments[0].map(function(a) { return a.getAttribute('href') || ''; });",
+                video_cards[parsed_cards:]) or []
+            batch = []
+            for offset, card in enumerate(video_cards[parsed_cards:]):
+                video = json_videos.get(talk_id_from_url(urllib.parse.urljoin(self.base_url, hrefs[offset]))) \
+                    if offset < len(hrefs) else None
+                if video is None:
+                    try:
+                        video = self._parse_card(card)
+                    except Exception as e:
+                        logger.warning(f"解析视频卡片失败: {e}")
+                        continue
+                # 检查是否已存在
+                if video and video.url not in seen_urls:
+                    seen_urls.add(video.url)
+                    batch.append(video)
+                    logger.info(f"成功提取视频: {video.title} | {video.speaker} | {video.duration} | {video.url}")
+                elif video:
+                    logger.debug(f"跳过已存在视频: {video.title}")
+            parsed_cards = len(video_cards)
+            return batch
+        
+        logger.info(f"开始抓取视频: {talks_url}")
+        
+        # === 获取总视频数并计算需要点击的次数 ===
+        total_videos = self._open_listing(talks_url)
+        self.last_listing_total = total_videos
+        # 首屏视频随页面内嵌在__NEXT_DATA__中，整页只解析一次；之后点击加载的卡片不在其中
+        for video in self._extract_talks_from_json(self.driver.page_source):
+            json_videos[video.id] = video
+        logger.info(f"页面内嵌数据中包含 {len(json_videos)} 个视频")
+        if total_videos > 0:
+            # 计算需要点击的次数（向上取整）
+            clicks_needed = (total_videos + 23) // 24 - 1
+            logger.info(f"需要点击 'Show 24 more' 按钮 {clicks_needed} 次")
+        
+        yield from new_videos()
+        
+        max_clicks = self.listing_max_clicks(talks_url, total_videos)
+        logger.info(f"设置点击上限为 {max_clicks} 次")
+        exhausted = False
+        
+        # 点击"Show 24 more"按钮直到获取所有视频
+        for i in range(max_clicks):
             try:
-                # 提取"24 of n"中的总视频数
-                count_element = self.driver.find_element(
-                    By.CSS_SELECTOR, "p.text-textPrimary-onLight.font-normal.body2"
+                # 检查按钮是否存在
+                try:
+                    load_more_button = self.driver.find_element(
+                        By.XPATH, "//button//span[contains(text(), 'Show 24 more')]"
+                    )
+                except:
+                    logger.info("没有更多视频可加载，停止点击")
+                    exhausted = True
+                    break
+                
+                # 滚动到按钮位置确保可见
+                self.driver.execute_script(
+                    "arguments[0].scrollIntoView({block: 'center'});", 
+                    load_more_button
                 )
-                count_text = count_element.text
-                logger.info(f"视频计数文本: {count_text}")
+                time.sleep(0.5)
                 
-                # 使用正则提取总视频数
-                match = re.search(r'of (\d+)', count_text)
-                if match:
-                    total_videos = int(match.group(1))
-                    logger.info(f"总共有 {total_videos} 个视频")
-                    
-                    # 计算需要点击的次数（向上取整）
-                    clicks_needed = (total_videos + 23) // 24 - 1
-                    logger.info(f"需要点击 'Show 24 more' 按钮 {clicks_needed} 次")
-                else:
-                    logger.warning("无法从文本中提取总视频数")
-                    total_videos = 0
-            except Exception as e:
-                logger.warning(f"无法获取总视频数: {e}")
-            
-            # 设置点击上限（防止网站错误导致无限点击）
-            max_clicks = min(clicks_needed, 200) if total_videos > 0 else 50
-            logger.info(f"设置点击上限为 {max_clicks} 次")
-            
-            # 点击"Show 24 more"按钮直到获取所有视频
-            for i in range(max_clicks):
+                # 尝试点击按钮
                 try:
-                    # 检查按钮是否存在
-                    try:
-                        load_more_button = self.driver.find_element(
-                            By.XPATH, "//button//span[contains(text(), 'Show 24 more')]"
-                        )
-                    except:
-                        logger.info("没有更多视频可加载，停止点击")
-                        break
-                    
-                    # 滚动到按钮位置确保可见
+                    load_more_button.click()
+                    logger.info(f"成功点击 'Show 24 more' 按钮 (第 {i+1} 次)")
+                except:
+                    # 如果直接点击失败，尝试使用JavaScript点击
                     self.driver.execute_script(
-                        "arguments[0].scrollIntoView({block: 'center'});", 
+                        "arguments[0].click();", 
                         load_more_button
                     )
-                    time.sleep(0.5)
-                    
-                    # 尝试点击按钮
-                    try:
-                        load_more_button.click()
-                        logger.info(f"成功点击 'Show 24 more' 按钮 (第 {i+1} 次)")
-                    except:
-                        # 如果直接点击失败，尝试使用JavaScript点击
-                        self.driver.execute_script(
-                            "arguments[0].click();", 
-                            load_more_button
-                        )
-                        logger.info(f"使用JavaScript成功点击 'Show 24 more' 按钮 (第 {i+1} 次)")
-                    
-                    # 等待新内容加载
-                    try:
-                        WebDriverWait(self.driver, 10).until(
-                            lambda d: len(d.find_elements(
-                                By.CSS_SELECTOR, "div.xs-tui\\:col-span-1 > a.relative[href*='/talks/']")
-                            ) > 24 * (i + 1)
-                        )
-                        logger.info(f"检测到新视频内容已加载")
-                    except:
-                        logger.warning("等待新内容加载超时，继续...")
-                        time.sleep(3)
-                    
-                    # 验证新内容是否加载
-                    current_count = len(self.driver.find_elements(
-                        By.CSS_SELECTOR, "div.xs-tui\\:col-span-1 > a.relative[href*='/talks/']")
-                    )
-                    logger.info(f"当前已加载 {current_count} 个视频")
-                    
-                    # 检查是否已达到最大视频数
-                    if total_videos > 0 and current_count >= total_videos:
-                        logger.info("已加载所有视频，停止点击")
-                        break
-                        
-                except Exception as e:
-                    logger.warning(f"点击 'Show 24 more' 按钮失败 (第 {i+1} 次): {e}")
-                    break
-
-
-            # 找到所有视频卡片
-            video_cards = self.driver.find_elements(By.CSS_SELECTOR, "div.xs-tui\\:col-span-1 > a.relative[href*='/talks/']")
-            logger.info(f"找到 {len(video_cards)} 个视频卡片元素")
-
-            '''
-            # === debug info: 在找到视频卡片后，保存完整JSON ===
-            # 从页面源码中提取JSON数据
-            html = self.driver.page_source
-            # 保存HTML到文件
-            with open('videos.html', 'w', encoding='utf-8') as f:
-                f.write(html)
-            '''
-
-            for card in video_cards:
+                    logger.info(f"使用JavaScript成功点击 'Show 24 more' 按钮 (第 {i+1} 次)")
+                
+                # 等待新内容加载
                 try:
-                    # 1. 提取URL
-                    url = card.get_attribute('href')
-                    if not url:
-                        continue
-                    if not url.startswith('http'):
-                        url = self.base_url + url
-                    
-                    # 2. 提取标题
-                    title = "未知标题"
-                    try:
-                        # 尝试主要标题选择器
-                        title_elem = card.find_element(By.CSS_SELECTOR, "span.text-textPrimary-onLight.font-bold.subheader2")
-                        title = title_elem.text.strip() or "未知标题"
-                    except:
-                        try:
-                            # 备用选择器
-                            title_elem = card.find_element(By.CSS_SELECTOR, "img[alt]")
-                            title = title_elem.get_attribute('alt') or "未知标题"
-                        except:
-                            pass
-                    
-                    # 3. 提取演讲者
-                    speaker = "未知演讲者"
-                    try:
-                        # 尝试主要演讲者选择器（带uppercase的）
-                        speaker_elem = card.find_element(By.CSS_SELECTOR, "p.text-textTertiary-onLight.label1.uppercase.font-semibold")
-                        speaker = speaker_elem.text.strip()
-                    except:
-                        try:
-                            # 备用演讲者选择器（不带uppercase的）
-                            speaker_elem = card.find_element(By.CSS_SELECTOR, "p.text-textTertiary-onLight.label1:not(.uppercase)")
-                            speaker = speaker_elem.text.strip()
-                        except:
-                            pass
-                    
-                    # 4. 提取时长
-                    duration = "未知时长"
-                    try:
-                        # 方法1: 使用XPath精确定位时长元素
-                        duration_elem = card.find_element(By.XPATH, 
-                            ".//div[contains(@class, 'absolute') and contains(@class, 'bottom-2') and contains(@class, 'right-2')]//span[contains(@class, 'font-semibold')]")
-                        duration = duration_elem.text.strip()
-                        
-                        # 验证是否是有效的时长格式 (MM:SS)
-                        if not re.match(r'\d{1,2}:\d{2}', duration):
-                            duration = "未知时长"
-                    except:
-                        pass
-                    
-                    # 5. 检查是否已存在
-                    if url and url not in seen_urls:
-                        seen_urls.add(url)
-                        videos.append(TEDVideo(
-                            title=title,
-                            speaker=speaker,
-                            duration=duration,
-                            views=0,
-                            publish_date="",
-                            topic="",
-                            url=url
-                        ))
-                        logger.info(f"成功提取视频: {title} | {speaker} | {duration} | {url}")
-                    else:
-                        logger.debug(f"跳过已存在视频: {title}")
-                        
-                except Exception as e:
-                    logger.warning(f"解析视频卡片失败: {e}")
-                    continue
-            
-            logger.info(f"最终获取 {len(videos)} 个唯一视频")
+                    WebDriverWait(self.driver, 10).until(
+                        lambda d: len(d.find_elements(By.CSS_SELECTOR, card_selector)) > 24 * (i + 1)
+                    )
+                    logger.info(f"检测到新视频内容已加载")
+                except:
+                    logger.warning("等待新内容加载超时，继续...")
+                    time.sleep(3)
+                
+            except Exception as e:
+                logger.warning(f"点击 'Show 24 more' 按钮失败 (第 {i+1} 次): {e}")
+                break
             
-            '''
-            # debug info
-            logger.info(f"提取结果: {len(videos)} 个视频")
-            for i, video in enumerate(videos[:3], 1):  # 打印前3个
-                logger.info(f"  {i}. 标题: {video.title}")
-                logger.info(f"     演讲者: {video.speaker}")
-                logger.info(f"     时长: {video.duration}")
-                logger.info(f"     URL: {video.url}")
-            '''
-
-            return videos
+            # 产出新加载的视频
+            yield from new_videos()
+            logger.info(f"当前已加载 {parsed_cards} 个视频")
             
+            # 检查是否已达到最大视频数
+            if total_videos > 0 and parsed_cards >= total_videos:
+                logger.info("已加载所有视频，停止点击")
+                break
+        
+        logger.info(f"最终获取 {len(seen_urls)} 个唯一视频")
+        self.last_listing_reached_end = exhausted or (total_videos > 0 and parsed_cards >= total_videos)
+        if not self.last_listing_reached_end:
+            logger.warning(f"列表没有加载到末尾（已加载 {parsed_cards}/{total_videos or '未知'} 个视频）")
+        # 录制展开完成后的列表页（包含全部卡片）
+        self._archive_page(talks_url, self.driver.page_source, "listing")
+    
+    def listing_max_clicks(self, talks_url: str, total_videos: int) -> int:
+        """
+        "Show 24 more"的点击次数：按"of N"总数计算，总数未知时最多50次；
+        非热度排序设上限 LISTING_MAX_CLICKS 防止网站错误导致无限点击，热度排序的列表尾部就是后N，必须展开到底
+        """
+        if total_videos <= 0:
+            return 50
+        clicks_needed = (total_videos + 23) // 24 - 1
+        if parse_qs(urlparse(talks_url).query).get('sort') == ['popular']:
+            return clicks_needed
+        return min(clicks_needed, LISTING_MAX_CLICKS)
+    
+    def talks_url_with_sort(self, talks_url: str, sort: str) -> str:
+        """替换 /talks URL 中的排序方式，其余参数保持不变"""
+        parts = urlparse(talks_url)
+        query = parse_qs(parts.query, keep_blank_values=True)
+        query['sort'] = [sort]
+        return urlunparse(parts._replace(query=urlencode(query, doseq=True)))
+    
+    def _parse_listing_html(self, html: str) -> tuple:
+        """
+        解析已保存的列表页源码（回放模式），返回 ("of N"总数, 视频列表)；
+        选择器与浏览器模式的卡片解析一致，内嵌JSON中已有的视频直接使用
+        """
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(html, 'html.parser')
+        json_videos = {v.id: v for v in self._extract_talks_from_json(html)}
+        
+        total_videos = 0
+        count_elem = soup.select_one("p.text-textPrimary-onLight.font-normal.body2")
+        match = re.search(r'of (\d+)', count_elem.get_text()) if count_elem else None
+        if match:
+            total_videos = int(match.group(1))
+        
+        def text_of(card, selector):
+            elem = card.select_one(selector)
+            return elem.get_text(strip=True) if elem else ""
+        
+        videos = []
+        seen_urls = set()
+        for card in soup.select("div.xs-tui\\:col-span-1 > a.relative[href*='/talks/']"):
+            url = card.get('href') or ""
+            if not url:
+                continue
+            if not url.startswith('http'):
+                url = self.base_url + url
+            video = json_videos.get(talk_id_from_url(url))
+            if video is None:
+                img = card.select_one("img[alt]")
+                duration = text_of(card, "div.absolute.bottom-2.right-2 span.font-semibold")
+                video = TEDVideo(
+                    title=text_of(card, "span.text-textPrimary-onLight.font-bold.subheader2") or (img.get('alt') if img else "") or "未知标题",
+                    speaker=text_of(card, "p.text-textTertiary-onLight.label1.uppercase.font-semibold")
+                    or text_of(card, "p.text-textTertiary-onLight.label1:not(.uppercase)") or "未知演讲者",
+                    duration=duration if re.match(r'\d{1,2}:\d{2}', duration) else "未知时长",
+                    views=0,
+                    publish_date="",
+                    topic="",
+                    url=url,
+                    id=talk_id_from_url(url)
+                )
+            if video.url not in seen_urls:
+                seen_urls.add(video.url)
+                videos.append(video)
+        return total_videos, videos
+    
+    def _extract_talks_from_json(self, html: str) -> List[TEDVideo]:
+        """从列表页源码的__NEXT_DATA__内嵌JSON中提取视频（页面没有内嵌数据时返回空列表）"""
+        from next_data import talks_from_html
+        return talks_from_html(html, self.base_url)
+    
+    def get_videos_by_talks_url(self, talks_url: str, should_stop: Optional[Callable[[], bool]] = None) -> List[TEDVideo]:
+        """根据/talks URL抓取视频列表，直接从DOM提取数据；should_stop返回True时停止展开，返回已加载的视频"""
+        videos = []
+        self.last_listing_complete = True
+        try:
+            for video in self.iter_videos_by_talks_url(talks_url):
+                videos.append(video)
+                if should_stop and should_stop():
+                    logger.warning(f"列表展开被提前停止，已加载 {len(videos)} 个视频")
+                    self.last_listing_complete = False
+                    break
         except Exception as e:
             logger.error(f"抓取视频列表失败: {e}")
-            return []
+            self.last_listing_complete = False
+        return videos
 
     def build_talks_url_from_config(self, topics: List[str], sort: str = 'newest') -> str:
         """根据配置生成 /talks 搜索URL, 支持 topics[n] & sort & page"""
@@ -385,17 +622,34 @@ class TEDEdgeScraper:
         logger.info(f"去重前: {len(videos)} 个视频, 去重后: {len(unique_videos)} 个视频")
         return unique_videos
     
+    def _duration_minutes(self, duration: str) -> float:
+        """时长文本转分钟数（mm:ss 或 "N min"），无法识别时返回0"""
+        duration_str = duration.lower()
+        if ':' in duration_str:
+            parts = duration_str.split(':')
+            if len(parts) == 2:
+                return int(parts[0]) + int(parts[1]) / 60
+            return int(parts[0])
+        if 'min' in duration_str:
+            return float(re.findall(r'\d+', duration_str)[0])
+        return 0
+    
+    def video_in_duration_range(self, video: TEDVideo, min_minutes: float, max_minutes: float) -> bool:
+        """单个视频是否满足时长范围（流水线逐个判断时使用）"""
+        return min_minutes <= self._duration_minutes(video.duration) <= max_minutes
+    
+    def video_in_year_range(self, video: TEDVideo, start_year: int, end_year: int) -> bool:
+        """单个视频是否满足发布年份范围，没有发布时间的视频不满足"""
+        return bool(video.publish_date) and start_year <= int(video.publish_date) <= end_year
+    
     def filter_videos_by_date(self, videos: List[TEDVideo], start_year: int = 2018, end_year: int = 2025) -> List[TEDVideo]:
         """根据发布时间筛选视频"""
         filtered_videos = []
         
         for video in videos:
             try:
-                if video.publish_date:
-                    date_str = video.publish_date
-                    
-                    if start_year <= int(date_str) <= end_year:
-                        filtered_videos.append(video)
+                if self.video_in_year_range(video, start_year, end_year):
+                    filtered_videos.append(video)
             except Exception as e:
                 logger.warning(f"解析视频日期失败: {video.title} - {e}")
                 continue
@@ -409,19 +663,7 @@ class TEDEdgeScraper:
         
         for video in videos:
             try:
-                duration_str = video.duration.lower()
-                if ':' in duration_str:
-                    parts = duration_str.split(':')
-                    if len(parts) == 2:
-                        minutes = int(parts[0]) + int(parts[1]) / 60
-                    else:
-                        minutes = int(parts[0])
-                elif 'min' in duration_str:
-                    minutes = float(re.findall(r'\d+', duration_str)[0])
-                else:
-                    minutes = 0
-                
-                if min_minutes <= minutes <= max_minutes:
+                if self.video_in_duration_range(video, min_minutes, max_minutes):
                     filtered_videos.append(video)
                     
             except Exception as e:
@@ -433,14 +675,18 @@ class TEDEdgeScraper:
     
     def get_video_views_and_date(self, video: TEDVideo) -> tuple:
         """获取视频播放量和发布年份"""
-        if not self.driver:
-            self.setup_driver()
-        
-        self.driver.get(video.url)
-        time.sleep(2)  # 给页面基本加载留出时间
-        
-        # 获取页面HTML源码
-        html = self.driver.page_source
+        html = self._browser_page_source(video.url)
+        if not html:
+            return 0, ""
+        return self._parse_views_and_date(html)
+    
+    def _parse_views_and_date(self, html: str) -> tuple:
+        """从视频页面HTML中提取播放量和发布年份：优先使用__NEXT_DATA__内嵌数据，缺失时回退到正则"""
+        from next_data import apply_talk_page
+        probe = TEDVideo(title="", speaker="", duration="", views=0, publish_date="", topic="", url="")
+        if apply_talk_page(probe, html) and probe.views and probe.publish_date:
+            logger.info(f"内嵌数据: 播放量 {probe.views}，发布年份 {probe.publish_date}")
+            return probe.views, probe.publish_date
         
         # 1. 提取播放量
         views = 0
@@ -502,81 +748,123 @@ class TEDEdgeScraper:
 
    
     
-    def get_video_transcript(self, video: TEDVideo, index: int, file_head: str) -> str:
-        """获取视频演讲文稿并保存到文件"""
-        try:
-            if not self.driver:
-                self.setup_driver()
-            
-            logger.info(f"访问视频页面以获取演讲稿: {video.title} - {video.url}")
-            self.driver.get(video.url)
-            time.sleep(2)  # 给页面基本加载留出时间
-            
-            # 获取页面HTML源码
-            html = self.driver.page_source
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # 查找包含演讲稿的script标签
-            script_tag = soup.find('script', type='application/ld+json', attrs={'data-next-head': ''})
-            
-            if not script_tag:
-                # 尝试其他可能的script标签
-                script_tags = soup.find_all('script', type='application/ld+json')
-                for tag in script_tags:
-                    if 'transcript' in tag.string:
-                        script_tag = tag
-                        break
-            
-            if script_tag:
-                try:
-                    # 解析JSON数据
-                    json_data = json.loads(script_tag.string)
-                    
-                    # 提取演讲稿
-                    transcript = json_data.get('transcript', '')
-                    
-                    if not transcript:
-                        logger.warning("找到script标签但未找到transcript字段")
-                        return ""
-                    
-                    # 确保transcripts目录存在
-                    os.makedirs('transcripts', exist_ok=True)
-                    
-                    # 格式化索引为3位数
-                    index_str = f"{index:03d}"
-                    
-                    # 生成文件名
-                    filename = f"{file_head}_view_{index_str}.txt"
-                    filepath = os.path.join('transcripts', filename)
-                    
-                    # 保存演讲稿到文件
-                    with open(filepath, 'w', encoding='utf-8') as f:
-                        f.write(transcript)
-                    
-                    logger.info(f"演讲稿已成功保存到 {filepath}")
-                    logger.info(f"演讲稿长度: {len(transcript)} 字符")
-                    
-                    return transcript
-                except Exception as e:
-                    logger.error(f"解析JSON数据失败: {e}")
-                    # 保存JSON内容用于调试
+    def save_transcript_file(self, transcript: str, index: int, file_head: str) -> str:
+        """将演讲稿保存到 transcripts/{file_head}_view_{index:03d}.txt，返回文件路径"""
+        # 确保transcripts目录存在
+        os.makedirs('transcripts', exist_ok=True)
+        
+        # 格式化索引为3位数
+        index_str = f"{index:03d}"
+        
+        # 生成文件名
+        filename = f"{file_head}_view_{index_str}.txt"
+        filepath = os.path.join('transcripts', filename)
+        
+        # 保存演讲稿到文件
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(transcript)
+        
+        logger.info(f"演讲稿已成功保存到 {filepath}")
+        logger.info(f"演讲稿长度: {len(transcript)} 字符")
+        return filepath
+    
+    def _extract_transcript(self, html: str, dump_on_failure: bool = False) -> str:
+        """从视频页面HTML的ld+json中提取演讲稿，dump_on_failure时保存失败的页面/JSON用于调试"""
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # 查找包含演讲稿的script标签
+        script_tag = soup.find('script', type='application/ld+json', attrs={'data-next-head': ''})
+        
+        if not script_tag:
+            # 尝试其他可能的script标签
+            script_tags = soup.find_all('script', type='application/ld+json')
+            for tag in script_tags:
+                if 'transcript' in (tag.string or ''):
+                    script_tag = tag
+                    break
+        
+        if script_tag:
+            try:
+                # 解析JSON数据
+                json_data = json.loads(script_tag.string)
+                
+                # 提取演讲稿
+                transcript = json_data.get('transcript', '')
+                
+                if not transcript:
+                    logger.warning("找到script标签但未找到transcript字段")
+                return transcript
+            except Exception as e:
+                logger.error(f"解析JSON数据失败: {e}")
+                # 保存JSON内容用于调试
+                if dump_on_failure:
                     try:
                         with open('failed_json.json', 'w', encoding='utf-8') as f:
                             f.write(script_tag.string)
                         logger.info("失败的JSON已保存到 failed_json.json 用于调试")
                     except:
                         pass
-            else:
-                logger.error("未找到包含演讲稿的script标签")
-                # 保存页面HTML用于调试
+        else:
+            logger.error("未找到包含演讲稿的script标签")
+            # 保存页面HTML用于调试
+            if dump_on_failure:
                 with open('transcript_page.html', 'w', encoding='utf-8') as f:
                     f.write(html)
                 logger.info("页面HTML已保存到 transcript_page.html 用于调试")
+        return ""
+    
+    def get_video_transcript(self, video: TEDVideo, index: int, file_head: str, use_browser: bool = True) -> str:
+        """获取视频演讲文稿并保存到文件；use_browser=False时通过HTTP获取页面（不启动浏览器）"""
+        try:
+            logger.info(f"访问视频页面以获取演讲稿: {video.title} - {video.url}")
+            html = self._browser_page_source(video.url) if use_browser else self.fetch_page_html(video.url)
+            if not html:
+                return ""
+            transcript = self._extract_transcript(html, dump_on_failure=True)
+            if transcript:
+                self.save_transcript_file(transcript, index, file_head)
+                return transcript
             
         except Exception as e:
             logger.error(f"获取视频文稿失败: {video.title} - {e}")
         
         return ""
+    
+    def fetch_page_html(self, url: str) -> Optional[str]:
+        """通过HTTP会话获取页面HTML（不经过浏览器，可在多个线程中并发调用），失败返回None"""
+        if self.replaying:
+            return self._archived_page(url)
+        try:
+            resp = self.session.get(url, timeout=PAGE_LOAD_TIMEOUT)
+            resp.raise_for_status()
+            self._archive_page(url, resp.text)
+            return resp.text
+        except Exception as e:
+            logger.warning(f"HTTP获取页面失败: {url} - {e}")
+            return None
+    
+    def get_video_details(self, video: TEDVideo, html: Optional[str] = None) -> bool:
+        """
+        一次页面加载同时提取播放量、发布年份和演讲稿（演讲稿暂存在内存中，
+        排名确定后直接写文件，无需再次访问页面）；未传入html时通过HTTP获取
+        """
+        if html is None:
+            html = self.fetch_page_html(video.url)
+        if not html:
+            return False
+        from next_data import talk_page_data
+        from ted_api import apply_talk_data
+        # 内嵌数据一次给出播放量、日期、时长、演讲者和主题；缺失的字段再回退到正则/ld+json
+        talk = talk_page_data(html)
+        if talk:
+            apply_talk_data(video, talk)
+        if not (talk and video.views and video.publish_date):
+            views, publish_date = self._parse_views_and_date(html)
+            video.views = views or video.views
+            video.publish_date = publish_date or video.publish_date
+        video.transcript = (talk or {}).get('transcript') or self._extract_transcript(html)
+        return True
 
 
     
@@ -590,9 +878,16 @@ class TEDEdgeScraper:
         return top_videos, bottom_videos
     
     def save_results(self, top_videos: List[TEDVideo], bottom_videos: List[TEDVideo], filename: str = "ted_videos_edge_results.xlsx"):
-        """保存结果到Excel文件"""
+        """保存结果到Excel文件；开启演讲稿分析时追加特征列，并写入组间对比工作表"""
         try:
+            import pandas as pd
             data = []
+            features, summary, distinctive = {}, [], []
+            if self.analyze_transcripts:
+                from transcript_analytics import analyze_groups, log_top_phrases, merge_features
+                features, summary, distinctive = analyze_groups(
+                    top_videos, bottom_videos, self._duration_minutes, ANALYTICS_WORKERS, ANALYTICS_CHUNK_SIZE)
+                log_top_phrases(distinctive)
             
             for i, video in enumerate(top_videos, 1):
                 data.append({
@@ -607,6 +902,8 @@ class TEDEdgeScraper:
                     'URL': video.url
                     #'演讲文稿': video.transcript
                 })
+                if self.analyze_transcripts:
+                    merge_features(data[-1], features.get(video.url))
             
             for i, video in enumerate(bottom_videos, 1):
                 data.append({
@@ -621,26 +918,387 @@ class TEDEdgeScraper:
                     'URL': video.url
                     #'演讲文稿': video.transcript
                 })
+                if self.analyze_transcripts:
+                    merge_features(data[-1], features.get(video.url))
             
             df = pd.DataFrame(data)
-            df.to_excel(filename, index=False, engine='openpyxl')
+            if summary:
+                with pd.ExcelWriter(filename, engine='openpyxl') as writer:
+                    df.to_excel(writer, index=False)
+                    pd.DataFrame(summary).to_excel(writer, sheet_name='组间对比', index=False)
+                    pd.DataFrame(distinctive).to_excel(writer, sheet_name='短语对比', index=False)
+            else:
+                df.to_excel(filename, index=False, engine='openpyxl')
             logger.info(f"结果已保存到 {filename}")
             
         except Exception as e:
             logger.error(f"保存结果失败: {e}")
 
+def load_topic_listings(scraper: TEDEdgeScraper, store, topics: List[str], sort: str = 'newest',
+                        max_age_hours: float = TOPIC_CACHE_HOURS,
+                        should_stop: Optional[Callable[[], bool]] = None) -> List[TEDVideo]:
+    """
+    按单个主题和排序方式缓存/talks列表，返回这些主题的视频（按ID合并）：
+    1. 缓存未过期的主题直接使用缓存，不访问网络
+    2. 过期的主题先读取"of N"总数，与缓存相同则只更新检查时间
+    3. 未缓存或总数变化的主题才展开列表（未展开完整的列表不写入缓存）
+    增删一个主题只需抓取变化的部分，任意主题组合都由已缓存的单主题集合合并得到；
+    should_stop返回True时不再检查剩余主题，使用已有缓存；
+    录制模式下不使用缓存，全部主题重新展开（回放时归档中需要每个主题完整的列表页）
+    """
+    topics = [t.strip().lower() for t in topics if t.strip()]
+    if scraper.recording:
+        stale = topics
+        logger.info(f"录制模式：不使用主题列表缓存，{len(topics)} 个主题全部展开并写入归档")
+    else:
+        stale = store.stale_topics(topics, max_age_hours, sort)
+        logger.info(f"主题列表缓存：{len(topics) - len(stale)}/{len(topics)} 个主题命中，{len(stale)} 个需要检查")
+    partial_ids = []
+    for idx, topic in enumerate(stale, 1):
+        if should_stop and should_stop():
+            logger.warning(f"停止检查剩余 {len(stale) - idx + 1} 个主题，使用已有缓存")
+            break
+        url = scraper.build_talks_url_from_config([topic], sort=sort)
+        cached_total, _, cached_ids = store.get_topic_listing(topic, sort)
+        if cached_ids and not scraper.recording:
+            total = scraper.get_listing_total(url)
+            if total > 0 and total == cached_total:
+                logger.info(f"主题 {topic} 总数未变化（{total}），沿用缓存的 {len(cached_ids)} 个视频")
+                store.touch_topic_listing(topic, sort)
+                continue
+        logger.info(f"展开主题列表 {idx}/{len(stale)}: {topic}（缓存总数 {cached_total}）")
+        videos = scraper.remove_duplicates(scraper.get_videos_by_talks_url(url, should_stop))
+        if not videos:
+            logger.warning(f"主题 {topic} 未获取到视频，保留原有缓存")
+            continue
+        store.upsert_static(videos)
+        if scraper.last_listing_complete:
+            store.set_topic_listing(topic, scraper.last_listing_total or len(videos), videos, sort)
+        else:
+            logger.warning(f"主题 {topic} 列表未展开完整，本次使用已加载的 {len(videos)} 个视频，不更新缓存")
+            partial_ids.extend(v.id for v in videos)
+    ids = list(dict.fromkeys(store.topic_listing_union(topics, sort) + partial_ids))
+    logger.info(f"{len(topics)} 个主题合并后共 {len(ids)} 个视频")
+    return store.load_videos(ids)
+
+def store_fetched_videos(scraper: TEDEdgeScraper, store, videos: List[TEDVideo]):
+    """写入获取到的详情；回放模式下按页面的录制时间记录播放量观测"""
+    groups: Dict[Optional[str], List[TEDVideo]] = {}
+    for video in videos:
+        groups.setdefault(scraper.observed_at(video.url), []).append(video)
+    for observed_at, group in groups.items():
+        store.upsert_videos(group, observed_at)
+
+def fetch_views_and_dates(scraper: TEDEdgeScraper, videos: List[TEDVideo], store=None, use_api: bool = False,
+                          use_browser: bool = True):
+    """
+    获取播放量和发布年份：use_api时先批量查询GraphQL API，API未返回的视频再逐个访问页面
+    （use_browser=False时通过HTTP获取页面并解析内嵌数据，不启动浏览器），
+    逐个获取的结果每 VIEWS_COMMIT_EVERY 个批量写入本地目录；
+    回放模式下在进程池中并行解析归档的视频页（同时取得演讲稿）
+    """
+    pending = list(videos)
+    if scraper.replaying:
+        from page_archive import replay_details
+        replay_details(scraper.archive, pending, ARCHIVE_REPLAY_WORKERS)
+        if store:
+            # 同时保存解析出的演讲稿，排名后直接写文件，无需再读归档
+            store_fetched_videos(scraper, store, pending)
+        return
+    if use_api and pending:
+        from ted_api import TEDGraphQLClient, fetch_details_via_api
+        pending = fetch_details_via_api(TEDGraphQLClient(API_URL, API_BATCH_SIZE), pending)
+        if store:
+            missing_ids = {id(v) for v in pending}
+            store.record_views_many([v for v in videos if id(v) not in missing_ids])
+    
+    fetched = []
+    try:
+        for i, video in enumerate(pending):
+            logger.info(f"获取播放量 {i+1}/{len(pending)}: {video.title}")
+            if use_browser:
+                video.views, video.publish_date = scraper.get_video_views_and_date(video)
+            elif not scraper.get_video_details(video):
+                logger.warning(f"HTTP获取详情失败，跳过: {video.url}")
+            if store and video.views:
+                fetched.append(video)
+                if len(fetched) >= VIEWS_COMMIT_EVERY:
+                    store.record_views_many(fetched)
+                    fetched = []
+            time.sleep(1)
+    finally:
+        # 中途出错时已获取的播放量也写入目录
+        if fetched:
+            store.record_views_many(fetched)
+
+def fetch_transcripts(scraper: TEDEdgeScraper, top_videos: List[TEDVideo], bottom_videos: List[TEDVideo], store=None,
+                      use_api: bool = False, fetch_missing: bool = True, file_prefix: str = "", use_browser: bool = True):
+    """
+    获取前N和后N视频的演讲稿；已有演讲稿（如来自本地目录或API）的视频直接写文件，不再访问页面，
+    fetch_missing=False时只写已有的演讲稿；file_prefix加在演讲稿文件名前（批量任务区分各任务的文件）；
+    use_browser=False时缺失的演讲稿通过HTTP获取页面
+    """
+    if use_api:
+        from ted_api import TEDGraphQLClient, fetch_details_via_api
+        without_transcript = [v for v in top_videos + bottom_videos if not v.transcript]
+        if without_transcript:
+            fetch_details_via_api(TEDGraphQLClient(API_URL, API_BATCH_SIZE), without_transcript, with_transcript=True)
+    
+    for file_head, label, group in ((f"{file_prefix}hight", "高", top_videos), (f"{file_prefix}low", "低", bottom_videos)):
+        logger.info(f"开始获取{len(group)}条{label}播放量视频的演讲稿...")
+        for i, video in enumerate(group):
+            if video.transcript:
+                scraper.save_transcript_file(video.transcript, i + 1, file_head)
+                if store:
+                    store.save_transcript(video)
+                continue
+            if not fetch_missing:
+                continue
+            logger.info(f"获取{label}播放量视频文稿 {i+1}/{len(group)}: {video.title}")
+            video.transcript = scraper.get_video_transcript(video, i + 1, file_head, use_browser)
+            if store:
+                store.save_transcript(video)
+            if not scraper.replaying:
+                time.sleep(1)
+
+def run_refresh(scraper: TEDEdgeScraper, talks_url: str, use_api: bool = False):
+    """
+    增量刷新模式：
+    1. 列表"of N"总数与上次相同时跳过列表展开，直接使用本地目录中的视频
+    2. 只访问新视频和播放量已过期（超过REFRESH_STALE_HOURS）的视频详情页
+    3. 每次观测到的播放量追加到时间序列表 views_history
+    录制模式下列表总是展开、全部视频都访问详情页，保证回放时归档中页面齐全
+    """
+    from talk_store import TalkStore
+    store = TalkStore(scraper.catalogue_db)
+    try:
+        total = scraper.get_listing_total(talks_url)
+        known_total, known_ids = store.get_listing(talks_url)
+        if total > 0 and total == known_total and known_ids and not scraper.recording:
+            logger.info(f"列表总数未变化（{total}），跳过列表展开，使用目录中的 {len(known_ids)} 个视频")
+            unique_videos = store.load_videos(known_ids)
+        else:
+            logger.info(f"列表总数变化（{known_total} -> {total}），重新展开列表")
+            unique_videos = scraper.remove_duplicates(scraper.get_videos_by_talks_url(talks_url))
+            if unique_videos:
+                store.upsert_static(unique_videos)
+                store.set_listing(talks_url, scraper.last_listing_total or total, unique_videos)
+        
+        listing_ids = [v.id for v in unique_videos]
+        filtered_videos = store.query_videos(min_minutes=MIN_DURATION, max_minutes=MAX_DURATION, ids=listing_ids)
+        if not filtered_videos:
+            logger.warning("时长筛选后没有视频，将使用去重后的全部视频")
+            filtered_videos = list(unique_videos)
+        
+        stale_videos = list(filtered_videos) if scraper.recording else store.select_stale(filtered_videos, REFRESH_STALE_HOURS)
+        logger.info(f"需要刷新播放量的视频: {len(stale_videos)}/{len(filtered_videos)} 个")
+        fetch_views_and_dates(scraper, stale_videos, store=store, use_api=use_api)
+        
+        top_videos, bottom_videos = store.query_top_bottom(
+            TOP_VIDEOS_COUNT, START_YEAR, END_YEAR, ids=[v.id for v in filtered_videos])
+        fetch_transcripts(scraper, top_videos, bottom_videos, store, use_api=use_api)
+        scraper.save_results(top_videos, bottom_videos)
+        logger.info("增量刷新完成！")
+    finally:
+        store.close()
+
+def run_pipeline(scraper: TEDEdgeScraper, talks_url: str, autotune: bool = False) -> bool:
+    """
+    流水线模式：列表展开 -> 时长筛选 -> 详情获取 -> 时间筛选 各阶段用有界队列连接并行执行，
+    列表每加载一批视频就立即进入后续阶段；详情页通过HTTP获取，同一次加载同时取得演讲稿，
+    只有最终的前N/后N排名需要等待全部视频处理完；
+    autotune时详情获取的并发数由调节器根据吞吐量、延迟和错误率自动调整；
+    返回结果是否完整（列表出错或没有加载到末尾时为False，结果只基于已产出的视频）
+    """
+    from pipeline import StreamingPipeline
+    seen_urls = set()
+    tuner = None
+    detail_workers = PIPELINE_DETAIL_WORKERS
+    if autotune:
+        from autotune import ConcurrencyTuner
+        tuner = ConcurrencyTuner(AUTOTUNE_MIN_WORKERS, AUTOTUNE_MAX_WORKERS, AUTOTUNE_WINDOW,
+                                 AUTOTUNE_MAX_LATENCY, AUTOTUNE_MAX_ERROR_RATE)
+        detail_workers = tuner.max_workers
+        # 连接池不小于最大并发数，避免并发增加后连接被反复丢弃重建
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=tuner.max_workers)
+        scraper.session.mount("https://", adapter)
+        scraper.session.mount("http://", adapter)
+    
+    def duration_stage(video: TEDVideo) -> Optional[TEDVideo]:
+        if video.url in seen_urls:
+            return None
+        seen_urls.add(video.url)
+        return video if scraper.video_in_duration_range(video, MIN_DURATION, MAX_DURATION) else None
+    
+    def detail_stage(video: TEDVideo) -> Optional[TEDVideo]:
+        ok = tuner.call(scraper.get_video_details, video) if tuner else scraper.get_video_details(video)
+        if not scraper.replaying:
+            time.sleep(REQUEST_DELAY)
+        if ok:
+            logger.info(f"详情: {video.title} | 播放量 {video.views} | {video.publish_date}")
+        return video if ok else None
+    
+    def date_stage(video: TEDVideo) -> Optional[TEDVideo]:
+        return video if scraper.video_in_year_range(video, START_YEAR, END_YEAR) else None
+    
+    pipeline = StreamingPipeline(PIPELINE_QUEUE_SIZE)
+    pipeline.add_stage("时长筛选", duration_stage)
+    pipeline.add_stage("详情获取", detail_stage, detail_workers)
+    pipeline.add_stage("时间筛选", date_stage)
+    filtered_videos = pipeline.run(scraper.iter_videos_by_talks_url(talks_url))
+    if tuner:
+        tuner.log_summary()
+    complete = not pipeline.incomplete and scraper.last_listing_reached_end
+    if not complete:
+        logger.warning(f"列表没有完整产出（数据源产出 {pipeline.produced} 个视频）："
+                       f"以下前N/后N只基于已处理的视频，不是完整列表的排名")
+    
+    # 唯一的屏障：排名需要全部视频的播放量
+    from talk_store import TalkStore
+    store = TalkStore(scraper.catalogue_db)
+    try:
+        store_fetched_videos(scraper, store, filtered_videos)
+        top_videos, bottom_videos = store.query_top_bottom(TOP_VIDEOS_COUNT, ids=[v.id for v in filtered_videos])
+        fetch_transcripts(scraper, top_videos, bottom_videos, store)
+        scraper.save_results(top_videos, bottom_videos)
+        logger.info("流水线模式执行完成！" if complete else "流水线模式执行完成（结果不完整）")
+    finally:
+        store.close()
+    return complete
+
+def run_from_catalogue(scraper: TEDEdgeScraper):
+    """只查询本地目录（不访问网络）：按config中的主题、时长、年份范围直接用索引查询前N和后N"""
+    from talk_store import TalkStore
+    store = TalkStore(scraper.catalogue_db)
+    try:
+        top_videos, bottom_videos = store.query_top_bottom(
+            TOP_VIDEOS_COUNT, START_YEAR, END_YEAR, MIN_DURATION, MAX_DURATION, topics=TOPICS)
+        fetch_transcripts(scraper, top_videos, bottom_videos, fetch_missing=False)
+        scraper.save_results(top_videos, bottom_videos)
+        logger.info("目录查询完成！")
+    finally:
+        store.close()
+
+def run_sitemap_discovery(scraper: TEDEdgeScraper):
+    """
+    sitemap发现模式（不需要浏览器）：
+    1. 流式读取sitemap，只取lastmod晚于上次运行的视频
+    2. 新增/变化视频的时长、主题等静态信息通过GraphQL API批量获取并写入本地目录
+    3. 在本地目录上按主题、时长筛选，只刷新过期的播放量，其余流程与默认模式相同
+    API未返回的视频通过HTTP获取页面并解析内嵌数据，全程不启动浏览器
+    """
+    from talk_store import TalkStore
+    from sitemap_discovery import SitemapDiscovery
+    from ted_api import TEDGraphQLClient, fetch_details_via_api
+    store = TalkStore(scraper.catalogue_db)
+    try:
+        discovery = SitemapDiscovery(SITEMAP_URL, session=scraper.session)
+        since = store.get_meta('sitemap_lastmod')
+        logger.info(f"从sitemap发现视频（上次lastmod: {since or '无'}）")
+        changed_videos = list(discovery.discover(since))
+        
+        missing = []
+        if changed_videos:
+            store.upsert_static(changed_videos)
+            client = TEDGraphQLClient(API_URL, API_BATCH_SIZE)
+            missing = fetch_details_via_api(client, changed_videos)
+            store.upsert_videos(changed_videos)
+        if missing:
+            # 下次运行仍从旧的lastmod开始，补齐这些视频的详情
+            logger.warning(f"{len(missing)} 个新视频未能获取详情，下次运行将重新获取")
+        elif discovery.max_lastmod:
+            store.set_meta('sitemap_lastmod', discovery.max_lastmod.isoformat())
+        
+        filtered_videos = store.query_videos(min_minutes=MIN_DURATION, max_minutes=MAX_DURATION, topics=TOPICS)
+        
+        stale_videos = store.select_stale(filtered_videos, REFRESH_STALE_HOURS)
+        logger.info(f"需要刷新播放量的视频: {len(stale_videos)}/{len(filtered_videos)} 个")
+        fetch_views_and_dates(scraper, stale_videos, store=store, use_api=True, use_browser=False)
+        
+        top_videos, bottom_videos = store.query_top_bottom(
+            TOP_VIDEOS_COUNT, START_YEAR, END_YEAR, MIN_DURATION, MAX_DURATION, topics=TOPICS)
+        fetch_transcripts(scraper, top_videos, bottom_videos, store, use_api=True, use_browser=False)
+        scraper.save_results(top_videos, bottom_videos)
+        logger.info("sitemap模式执行完成！")
+    finally:
+        store.close()
+
+def export_parquet(db_path: str):
+    """把本地目录导出为Parquet数据集（--parquet）"""
+    from talk_store import TalkStore
+    from parquet_export import export_catalogue
+    store = TalkStore(db_path)
+    try:
+        export_catalogue(store)
+    except Exception as e:
+        logger.error(f"Parquet导出失败: {e}")
+    finally:
+        store.close()
+
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(description="TED Edge 爬取器")
     parser.add_argument("--search-url", dest="search_url", type=str, default="", help="粘贴TED /talks 搜索URL")
-    parser.add_argument("--sort", dest="sort", type=str, default=SORT, choices=["newest","oldest"], help="排序：newest 或 oldest（默认读取config）")
+    parser.add_argument("--sort", dest="sort", type=str, default=SORT, choices=["newest","oldest","popular"], help="排序：newest、oldest 或 popular（默认读取config）；popular 时只获取列表两端的视频详情")
+    parser.add_argument("--print-url", dest="print_url", action="store_true", help="只打印由config生成的 /talks 搜索URL后退出（不启动浏览器）")
+    parser.add_argument("--api", dest="api", action="store_true", help="通过TED GraphQL API批量获取播放量、发布时间和演讲稿，API未返回的视频再访问页面")
+    parser.add_argument("--discover", dest="discover", type=str, default="listing", choices=["listing", "sitemap"], help="视频发现方式：listing 浏览器展开/talks列表（默认）；sitemap 通过HTTP读取sitemap，不需要浏览器")
+    parser.add_argument("--pipeline", dest="pipeline", action="store_true", help="流水线模式：列表展开、详情获取、筛选并行执行，详情页同时取得演讲稿")
+    parser.add_argument("--from-catalogue", dest="from_catalogue", action="store_true", help="只查询本地目录数据库（不访问网络），按config的范围直接输出前N/后N")
+    parser.add_argument("--parquet", dest="parquet", action="store_true", help="运行结束后把本地目录（含演讲稿）导出为按年份/主题分区的Parquet数据集")
+    parser.add_argument("--analyze", dest="analyze", action="store_true", help="保存结果前并行分析演讲稿（词数、语速、词汇丰富度、高频短语），并输出高/低播放量组对比")
+    parser.add_argument("--record", dest="record", nargs="?", const=ARCHIVE_DIR, default="", help="录制模式：把获取的列表页和视频页写入压缩归档（默认目录见config）")
+    parser.add_argument("--replay", dest="replay", nargs="?", const=ARCHIVE_DIR, default="", help="回放模式：从归档重跑全部流程，不访问网络，视频页并行解析")
+    parser.add_argument("--autotune", dest="autotune", action="store_true", help="流水线模式下根据吞吐量、延迟和错误率自动调整详情获取的并发数（隐含 --pipeline）")
+    parser.add_argument("--batch", dest="batch", type=str, default="", help="批量任务：读取JSON任务文件，共用一次列表展开和详情获取，为每组条件分别输出结果")
+    parser.add_argument("--refresh", dest="refresh", action="store_true", help="增量刷新：只访问新视频和播放量过期的视频，并记录播放量时间序列")
+    parser.add_argument("--time-budget", dest="time_budget", type=float, default=0, help="时间预算（秒）：按价值顺序获取，截止前停止派发并写出当前最好的结果和覆盖率报告")
     args = parser.parse_args()
 
+    if args.print_url:
+        print(TEDEdgeScraper().build_talks_url_from_config(TOPICS, sort=args.sort))
+        return
+
+    if args.record and args.replay:
+        parser.error("--record 与 --replay 不能同时使用")
+    if args.time_budget > 0:
+        conflicts = [flag for flag, used in (
+            ("--api", args.api), ("--refresh", args.refresh), ("--pipeline", args.pipeline), ("--autotune", args.autotune),
+            ("--batch", args.batch), ("--from-catalogue", args.from_catalogue),
+            ("--discover sitemap", args.discover == "sitemap")) if used]
+        if conflicts:
+            parser.error(f"--time-budget 不能与 {'、'.join(conflicts)} 同时使用")
+    
     scraper = TEDEdgeScraper()
+    scraper.analyze_transcripts = args.analyze
+    if args.record or args.replay:
+        from page_archive import PageArchive
+        scraper.archive = PageArchive(args.record or args.replay, "record" if args.record else "replay")
+        logger.info(f"页面归档: {scraper.archive.root_dir}（{'录制' if args.record else '回放'}，已有 {len(scraper.archive)} 条记录）")
+    if args.replay:
+        # 归档中的播放量是录制时的旧数据：回放写入单独的目录数据库（每次重建），不影响正式目录
+        scraper.catalogue_db = scraper.archive.replay_catalogue
+        if os.path.exists(scraper.catalogue_db):
+            os.remove(scraper.catalogue_db)
+        logger.info(f"回放结果写入 {scraper.catalogue_db}，不修改正式目录 {CATALOGUE_DB}")
+    if args.replay and (args.api or args.discover == "sitemap"):
+        # 归档只包含页面，API和sitemap的响应无法回放
+        logger.warning("回放模式下忽略 --api 和 --discover sitemap，全部从归档页面解析")
+        args.api = False
+        args.discover = "listing"
     
     try:
-        # 设置Edge浏览器驱动
-        scraper.setup_driver()
+        # Edge浏览器驱动在第一次访问页面时按需启动
+        if args.from_catalogue:
+            run_from_catalogue(scraper)
+            return
+        if args.batch:
+            from batch_runner import run_batch
+            run_batch(scraper, args.batch, sort=args.sort, use_api=args.api)
+            return
+        if args.discover == "sitemap":
+            run_sitemap_discovery(scraper)
+            return
         
         # 优先使用用户提供的 /talks 搜索URL；否则使用 config 构造
         custom_search_url = (args.search_url or '').strip()
@@ -651,59 +1309,99 @@ def main():
         end_year = END_YEAR
         top_videos_count = TOP_VIDEOS_COUNT
         
-        all_videos = []
         if custom_search_url:
-            all_videos = scraper.get_videos_by_talks_url(custom_search_url)
+            url = custom_search_url
         else:
             # 用 config 里的 TOPICS 生成 /talks URL 并抓取（保留 topics[n] 与 sort）
             # 注意：/talks 支持多主题组合，因此我们将 TOPICS 作为一组条件一次性抓取
             url = scraper.build_talks_url_from_config(TOPICS, sort=args.sort)
             logger.info(f"使用配置生成的URL: {url}")
-            all_videos = scraper.get_videos_by_talks_url(url)
-        
-        logger.info(f"总共获取到 {len(all_videos)} 个视频")
-        
-        # 去重
-        unique_videos = scraper.remove_duplicates(all_videos)
-        logger.info(f"去重后共有 {len(unique_videos)} 个视频")
-        
-        # 根据时长筛选 当前阶段无法获取发布时间
-        filtered_videos = scraper.filter_videos_by_duration(unique_videos, min_duration, max_duration)
-
-        # 如果筛选后没有视频，使用原始去重后的视频（可能是因为日期未正确提取）
-        if not filtered_videos:
-            logger.warning("时长筛选后没有视频，将使用去重后的全部视频")
-            filtered_videos = list(unique_videos)
-        
-        # 获取播放量信息
-        logger.info("开始获取视频播放量 发布时间...")
-        for i, video in enumerate(filtered_videos):
-            logger.info(f"获取播放量 {i+1}/{len(filtered_videos)}: {video.title}")
-            video.views, video.publish_date = scraper.get_video_views_and_date(video)
-            time.sleep(1)
         
-        # 根据日期筛选
-        filtered_videos = scraper.filter_videos_by_date(filtered_videos, start_year, end_year)
+        if args.refresh:
+            run_refresh(scraper, url, use_api=args.api)
+            return
+        if args.time_budget > 0:
+            from time_budget import run_time_budget
+            run_time_budget(scraper, url, args.time_budget, custom_url=bool(custom_search_url), sort=args.sort)
+            return
+        if args.pipeline or args.autotune:
+            if not run_pipeline(scraper, url, autotune=args.autotune):
+                logger.warning("流水线结果不完整：列表未完整获取，请检查日志后重新运行")
+            return
         
-        # 获取前100和后100的视频
-        top_videos, bottom_videos = scraper.get_top_and_bottom_videos(filtered_videos, top_videos_count)
+        from talk_store import TalkStore
+        store = TalkStore(scraper.catalogue_db)
         
-        # 获取前100条视频的演讲稿
-        logger.info("开始获取前100条高播放量视频的演讲稿...")
-        for i, video in enumerate(top_videos):
-            logger.info(f"获取高播放量视频文稿 {i+1}/{len(top_videos)}: {video.title}")
-            video.transcript = scraper.get_video_transcript(video, i + 1, "hight")
-            time.sleep(1)
-
-        # 获取后100条视频的演讲稿
-        logger.info("开始获取后100条低播放量视频的演讲稿...")
-        for i, video in enumerate(bottom_videos):
-            logger.info(f"获取低播放量视频文稿 {i+1}/{len(bottom_videos)}: {video.title}")
-            video.transcript = scraper.get_video_transcript(video, i + 1, "low")
-            time.sleep(1)
+        def expand_listing(listing_url: str) -> List[TEDVideo]:
+            all_videos = scraper.get_videos_by_talks_url(listing_url)
+            logger.info(f"总共获取到 {len(all_videos)} 个视频")
+            
+            # 去重
+            videos = scraper.remove_duplicates(all_videos)
+            logger.info(f"去重后共有 {len(videos)} 个视频")
+            
+            # 列表结果批量写入本地目录
+            store.upsert_static(videos)
+            return videos
         
-        # 保存结果
-        scraper.save_results(top_videos, bottom_videos)
+        try:
+            bracket = args.sort == "popular"
+            if custom_search_url or bracket:
+                # 自定义URL和热度区间选择需要该列表本身（及其顺序），直接展开
+                unique_videos = expand_listing(url)
+                if bracket and not scraper.last_listing_reached_end:
+                    # 没有加载到列表末尾时，已加载部分的尾部不是真正的后N，不能按列表两端选择
+                    logger.warning(f"热度排序列表没有加载到末尾（已加载 {len(unique_videos)}/{scraper.last_listing_total} 个），"
+                                   f"改为按newest排序获取全部视频的详情后排名")
+                    bracket = False
+                    if custom_search_url:
+                        unique_videos = expand_listing(scraper.talks_url_with_sort(url, 'newest'))
+                    else:
+                        unique_videos = load_topic_listings(scraper, store, TOPICS, 'newest')
+            else:
+                # config主题：由单主题列表缓存合并，只抓取缺失或变化的主题
+                unique_videos = load_topic_listings(scraper, store, TOPICS, args.sort)
+            
+            # 时长筛选由索引查询完成 当前阶段无法获取发布时间
+            filtered_videos = store.query_videos(
+                min_minutes=min_duration, max_minutes=max_duration, ids=[v.id for v in unique_videos])
+            
+            # 如果筛选后没有视频，使用原始去重后的视频（可能是因为日期未正确提取）
+            if not filtered_videos:
+                logger.warning("时长筛选后没有视频，将使用去重后的全部视频")
+                filtered_videos = list(unique_videos)
+            
+            if bracket:
+                # 列表按热度排序：只从两端逐批获取详情，直到前N和后N稳定
+                from selection import PopularityBracket
+                by_id = {v.id: v for v in filtered_videos}
+                ranked = [by_id[v.id] for v in unique_videos if v.id in by_id]
+                logger.info("开始按热度区间获取视频播放量 发布时间...")
+                top_videos, bottom_videos = PopularityBracket(
+                    ranked, top_videos_count,
+                    lambda batch: fetch_views_and_dates(scraper, batch, store=store, use_api=args.api),
+                    lambda video: scraper.video_in_year_range(video, start_year, end_year),
+                    SELECTION_STEP, SELECTION_STABLE_BATCHES,
+                ).run()
+            else:
+                # 获取播放量信息
+                logger.info("开始获取视频播放量 发布时间...")
+                fetch_started = datetime.now().isoformat(timespec='seconds')
+                fetch_views_and_dates(scraper, filtered_videos, store=store, use_api=args.api)
+                
+                # 根据日期筛选，获取前100和后100的视频；只用本次获取到的播放量排名
+                # （回放时播放量按页面的录制时间记录，且回放目录每次重建，不需要按时间过滤）
+                top_videos, bottom_videos = store.query_top_bottom(
+                    top_videos_count, start_year, end_year, ids=[v.id for v in filtered_videos],
+                    checked_since=None if scraper.replaying else fetch_started)
+            
+            # 获取前100和后100条视频的演讲稿
+            fetch_transcripts(scraper, top_videos, bottom_videos, store, use_api=args.api)
+            
+            # 保存结果
+            scraper.save_results(top_videos, bottom_videos)
+        finally:
+            store.close()
         
         logger.info("程序执行完成！")
         
@@ -711,6 +1409,11 @@ def main():
         logger.error(f"程序执行失败: {e}")
     finally:
         scraper.close_driver()
+        if scraper.archive is not None:
+            scraper.archive.close()
+        # 所有模式（包括提前返回的模式）结束后都按需导出
+        if args.parquet:
+            export_parquet(scraper.catalogue_db)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试：并发数自动调节（使用注入延迟的本地替身服务器，不访问TED网站）
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from autotune import ConcurrencyTuner
+from standin_server import StandinServer
+
+def capacity_server(capacity, latency, reject_over=None):
+    """
+    替身服务器：同时只能处理 capacity 个请求（其余排队，延迟随之增加），每个请求耗时 latency 秒；
+    reject_over 给出时，正在处理的请求超过该数目直接返回503
+    """
+    slots = threading.Semaphore(capacity)
+    state = {'inflight': 0}
+    lock = threading.Lock()
+
+    def handler(method, path, body):
+        with lock:
+            state['inflight'] += 1
+            inflight = state['inflight']
+        try:
+            if reject_over is not None and inflight > reject_over:
+                return 503, "text/plain", b"busy"
+            with slots:
+                time.sleep(latency)
+            return 200, "text/html", b"<html>ok</html>"
+        finally:
+            with lock:
+                state['inflight'] -= 1
+    return StandinServer(handler)
+
+def drive(tuner, url, requests_total):
+    """按最大并发数创建线程，通过调节器发出请求"""
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=tuner.max_workers))
+
+    def fetch(i):
+        return tuner.call(lambda: session.get(f"{url}/talks/t_{i}", timeout=10).status_code == 200)
+
+    with ThreadPoolExecutor(max_workers=tuner.max_workers) as pool:
+        return list(pool.map(fetch, range(requests_total)))
+
+def test_ramps_up_to_server_capacity_and_stops():
+    tuner = ConcurrencyTuner(min_workers=1, max_workers=16, window=16, max_latency=1.0, min_gain=0.15)
+    with capacity_server(capacity=4, latency=0.05) as server:
+        results = drive(tuner, server.url, 320)
+
+    assert all(results)
+    actions = [d['action'] for d in tuner.decisions]
+    assert "增加" in actions
+    # 超过服务器容量后吞吐量不再提升，调节器回退，最终停在容量附近而不是最大线程数
+    assert "回退" in actions
+    assert 2 <= tuner.limit <= 8
+
+def test_backs_off_when_errors_appear():
+    tuner = ConcurrencyTuner(min_workers=1, max_workers=16, window=10, max_latency=1.0, max_error_rate=0.05)
+    with capacity_server(capacity=16, latency=0.02, reject_over=3) as server:
+        drive(tuner, server.url, 200)
+
+    backoffs = [d for d in tuner.decisions if d['action'] == "退避"]
+    assert backoffs and all(d['after'] < d['before'] for d in backoffs)
+    assert tuner.limit <= 4
+
+def test_latency_bound_limits_concurrency():
+    tuner = ConcurrencyTuner(min_workers=2, max_workers=16, window=10, max_latency=0.12, min_gain=0.0)
+    # 容量2，每个请求0.05秒：并发不超过4时排队延迟约0.10秒，达到5时至少0.125秒，超过0.12秒的上限
+    with capacity_server(capacity=2, latency=0.05) as server:
+        drive(tuner, server.url, 160)
+
+    first_backoff = next(i for i, d in enumerate(tuner.decisions) if d['action'] == "退避")
+    bound = 4
+    after_backoff = tuner.decisions[first_backoff:]
+    # 退避后连续保持 probe_after 个窗口会试探加1（到 bound+1），试探窗口的延迟越界，下一次决策立即退回 bound 以内；
+    # 因此 bound+1 只出现在试探窗口中，上限从不超过 bound+1，也不会在 bound+1 停留
+    assert all(d['after'] <= bound + 1 for d in after_backoff)
+    assert all(d['after'] <= bound for d in after_backoff if d['before'] > bound)
+    if tuner.decisions[-1]['after'] > bound:
+        assert tuner.decisions[-1]['action'] == "试探"
+
+if __name__ == "__main__":
+    test_ramps_up_to_server_capacity_and_stops()
+    test_backs_off_when_errors_appear()
+    test_latency_bound_limits_concurrency()
+    print("✓ 并发调节测试通过")
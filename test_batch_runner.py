@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试：批量任务（回放归档作为共用的抓取结果，不访问TED网站）
+"""
+
+import json
+import os
+import tempfile
+
+import batch_runner
+from batch_runner import BatchJob, load_jobs, plan_topics, run_batch
+from page_archive import PageArchive
+from ted_scraper_edge import TEDEdgeScraper
+from testing_fixtures import record_archive, talk_page
+
+TOPIC_SLUGS = {"love": range(0, 10), "trust": range(5, 15), "fear": range(12, 20)}
+
+def talk_truth(i):
+    """第i个视频的 (播放量, 年份, 时长秒数)"""
+    return 1000 * (i + 1), 2015 + i % 8, 600 if i % 2 else 840
+
+def record_crawl(root):
+    """录制三个主题列表和全部视频页"""
+    listings = {topic: [(f"t_{i}", f"Talk {i}", f"{talk_truth(i)[2] // 60}:00") for i in slugs]
+                for topic, slugs in TOPIC_SLUGS.items()}
+    pages = {f"t_{i}": talk_page(f"t_{i}", talk_truth(i)[0], talk_truth(i)[1], talk_truth(i)[2], f"Talk {i}",
+                                 f"words of talk {i}") for i in range(20)}
+    record_archive(root, listings, pages)
+
+def expected(job):
+    """按任务条件直接从真值计算前N/后N（两组均按播放量从高到低）"""
+    slugs = {i for topic in job.topics for i in TOPIC_SLUGS[topic]}
+    eligible = sorted((i for i in slugs
+                       if job.start_year <= talk_truth(i)[1] <= job.end_year
+                       and job.min_duration * 60 <= talk_truth(i)[2] <= job.max_duration * 60),
+                      key=lambda i: talk_truth(i)[0], reverse=True)
+    top = eligible[:job.count]
+    bottom = eligible[-job.count:] if len(eligible) >= job.count else []
+    return [f"t_{i}" for i in top], [f"t_{i}" for i in bottom]
+
+class CountingScraper(TEDEdgeScraper):
+    """记录列表展开次数和各任务保存的结果"""
+
+    def __init__(self):
+        super().__init__()
+        self.expanded = []
+        self.saved = {}
+
+    def iter_videos_by_talks_url(self, talks_url):
+        self.expanded.append(talks_url)
+        return super().iter_videos_by_talks_url(talks_url)
+
+    def save_results(self, top_videos, bottom_videos, filename="ted_videos_edge_results.xlsx"):
+        self.saved[filename] = ([v.id for v in top_videos], [v.id for v in bottom_videos])
+
+def test_load_jobs_and_plan_topics():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "jobs.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"jobs": [{"name": "a", "topics": ["Love ", "trust"], "count": 3}, {"topics": ["fear", "love"]}]}, f)
+        jobs = load_jobs(path)
+        assert [job.name for job in jobs] == ["a", "job2"]
+        assert jobs[0].topics == ["love", "trust"] and jobs[0].output == "ted_videos_a.xlsx"
+        assert plan_topics(jobs) == ["love", "trust", "fear"]
+
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump([{"name": "same"}, {"name": "same"}], f)
+        try:
+            load_jobs(path)
+            assert False, "任务名重复时应报错"
+        except ValueError:
+            pass
+
+def test_jobs_share_one_crawl_and_stay_independent():
+    cwd = os.getcwd()
+    original_fetch = batch_runner.fetch_views_and_dates
+    with tempfile.TemporaryDirectory() as tmp:
+        archive_dir = os.path.join(tmp, "archive")
+        record_crawl(archive_dir)
+        jobs = [
+            {"name": "love_short", "topics": ["love", "trust"], "start_year": 2015, "end_year": 2022,
+             "min_duration": 6, "max_duration": 12, "count": 2, "output": "love_short.xlsx"},
+            {"name": "fear_long", "topics": ["fear"], "start_year": 2016, "end_year": 2020,
+             "min_duration": 12, "max_duration": 18, "count": 2, "output": "fear_long.xlsx"},
+            {"name": "everything", "topics": ["love", "trust", "fear"], "start_year": 2015, "end_year": 2022,
+             "min_duration": 0, "max_duration": 60, "count": 3, "output": "everything.xlsx"},
+        ]
+        with open(os.path.join(tmp, "jobs.json"), "w", encoding="utf-8") as f:
+            json.dump(jobs, f)
+
+        scraper = CountingScraper()
+        scraper.archive = PageArchive(archive_dir, "replay")
+        scraper.catalogue_db = os.path.join(tmp, "catalogue.db")
+        detail_batches = []
+
+        def counting_fetch(scraper, videos, **kwargs):
+            detail_batches.append(sorted(v.id for v in videos))
+            return original_fetch(scraper, videos, **kwargs)
+
+        os.chdir(tmp)
+        batch_runner.fetch_views_and_dates = counting_fetch
+        try:
+            run_batch(scraper, "jobs.json")
+        finally:
+            batch_runner.fetch_views_and_dates = original_fetch
+            os.chdir(cwd)
+
+        # 每个主题列表展开一次，所有视频的详情在一次获取中完成
+        assert len(scraper.expanded) == 3
+        assert len(detail_batches) == 1 and detail_batches[0] == sorted(f"t_{i}" for i in range(20))
+        for spec in jobs:
+            job = BatchJob(**spec)
+            assert scraper.saved[job.output] == expected(job), job.name
+            top, bottom = expected(job)
+            for prefix, group in (("hight", top), ("low", bottom)):
+                for index, slug in enumerate(group, 1):
+                    with open(os.path.join(tmp, "transcripts", f"{job.name}_{prefix}_view_{index:03d}.txt"), encoding="utf-8") as f:
+                        assert f.read() == f"words of talk {slug[2:]}"
+
+if __name__ == "__main__":
+    test_load_jobs_and_plan_topics()
+    test_jobs_share_one_crawl_and_stay_independent()
+    print("✓ 批量任务测试通过")
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试：浏览器看门狗与浏览器回收（替身psutil和替身浏览器，不启动Edge）
+"""
+
+import sys
+import types
+
+from selenium.common.exceptions import WebDriverException
+
+import ted_scraper_edge
+from driver_watchdog import DriverWatchdog
+from ted_scraper_edge import TEDEdgeScraper
+
+def fake_psutil(rss_mb, children):
+    """替身psutil：rss_mb 为 {pid: 常驻内存MB}，不在其中的子进程视为已退出"""
+    module = types.ModuleType("psutil")
+
+    class NoSuchProcess(Exception):
+        pass
+
+    class AccessDenied(Exception):
+        pass
+
+    class Process:
+        def __init__(self, pid):
+            self.pid = pid
+
+        def children(self, recursive=False):
+            return [Process(pid) for pid in children]
+
+        def memory_info(self):
+            if self.pid not in rss_mb:
+                raise NoSuchProcess(self.pid)
+            return types.SimpleNamespace(rss=rss_mb[self.pid] * 1024 * 1024)
+
+    module.Process, module.NoSuchProcess, module.AccessDenied = Process, NoSuchProcess, AccessDenied
+    return module
+
+DRIVER = types.SimpleNamespace(service=types.SimpleNamespace(process=types.SimpleNamespace(pid=1)))
+
+def test_page_and_timeout_thresholds():
+    watchdog = DriverWatchdog(max_pages=5, max_rss_mb=0, max_timeouts=2)
+    for _ in range(4):
+        watchdog.record_page()
+    assert watchdog.recycle_reason(DRIVER) is None
+    watchdog.record_timeout()
+    assert watchdog.recycle_reason(DRIVER) == "已访问 5 个页面"
+
+    # 连续超时：中间成功访问一次就重新计数
+    watchdog = DriverWatchdog(max_pages=0, max_rss_mb=0, max_timeouts=2)
+    watchdog.record_timeout()
+    watchdog.record_page()
+    watchdog.record_timeout()
+    assert watchdog.recycle_reason(DRIVER) is None
+    watchdog.record_timeout()
+    assert watchdog.recycle_reason(DRIVER) == "连续超时 2 次"
+    watchdog.reset()
+    assert (watchdog.pages, watchdog.consecutive_timeouts) == (0, 0)
+
+def test_memory_check_sums_process_tree():
+    saved = sys.modules.get("psutil")
+    try:
+        # 驱动进程400MB + 浏览器子进程700MB，另一个子进程已退出
+        sys.modules["psutil"] = fake_psutil({1: 400, 2: 700}, children=[2, 3])
+        watchdog = DriverWatchdog(max_pages=0, max_rss_mb=1000, rss_check_interval=3)
+        watchdog.record_page()
+        watchdog.record_page()
+        assert watchdog.recycle_reason(DRIVER) is None and watchdog.last_rss_mb is None
+        watchdog.record_page()
+        assert watchdog.recycle_reason(DRIVER) == "浏览器内存 1100 MB 超过阈值 1000 MB"
+
+        watchdog.max_rss_mb = 2000
+        assert watchdog.recycle_reason(DRIVER) is None and watchdog.last_rss_mb == 1100
+
+        # 未安装psutil时跳过内存检查
+        sys.modules["psutil"] = None
+        assert watchdog.browser_rss_mb(DRIVER) is None
+        assert watchdog.recycle_reason(DRIVER) is None
+    finally:
+        if saved is None:
+            sys.modules.pop("psutil", None)
+        else:
+            sys.modules["psutil"] = saved
+
+class FakeDriver:
+    def __init__(self, crash_urls, visited):
+        self.crash_urls = crash_urls
+        self.visited = visited
+
+    def get(self, url):
+        if url in self.crash_urls:
+            raise WebDriverException("session deleted because of page crash")
+        self.visited.append(url)
+
+class FlakyBrowserScraper(TEDEdgeScraper):
+    """按 launches 依次决定每次启动浏览器成功（True）或失败（False）"""
+
+    def __init__(self, launches, crash_urls=()):
+        super().__init__()
+        self.launches = list(launches)
+        self.crash_urls = set(crash_urls)
+        self.visited = []
+        self.started = 0
+
+    def setup_driver(self):
+        if self.driver:
+            return
+        if not self.launches.pop(0):
+            raise Exception("Edge启动失败")
+        self.started += 1
+        self.driver = FakeDriver(self.crash_urls, self.visited)
+        self.watchdog.reset()
+
+    def close_driver(self):
+        self.driver = None
+
+def test_failed_relaunch_only_fails_the_current_page():
+    saved = ted_scraper_edge.DRIVER_RESTART_ATTEMPTS, ted_scraper_edge.DRIVER_RESTART_BACKOFF
+    ted_scraper_edge.DRIVER_RESTART_ATTEMPTS, ted_scraper_edge.DRIVER_RESTART_BACKOFF = 3, 0
+    try:
+        # 浏览器崩溃后连续3次重启失败：当前页面失败，下一个页面重新启动浏览器后正常访问
+        scraper = FlakyBrowserScraper([True, False, False, False, True], crash_urls=["crash"])
+        assert scraper._load_page("crash") is False
+        assert scraper.driver is None and scraper.launches == [True]
+        assert scraper._load_page("next") is True
+        assert scraper.visited == ["next"] and scraper.watchdog.recycle_count == 1
+
+        # 达到页面数阈值时先回收再访问，重启失败一次后退避重试成功
+        scraper = FlakyBrowserScraper([True, False, True])
+        scraper.watchdog = DriverWatchdog(max_pages=2, max_rss_mb=0, max_timeouts=3)
+        assert all(scraper._load_page(url) for url in ("a", "b", "c"))
+        assert scraper.visited == ["a", "b", "c"] and scraper.started == 2 and scraper.watchdog.pages == 1
+    finally:
+        ted_scraper_edge.DRIVER_RESTART_ATTEMPTS, ted_scraper_edge.DRIVER_RESTART_BACKOFF = saved
+
+if __name__ == "__main__":
+    test_page_and_timeout_thresholds()
+    test_memory_check_sums_process_tree()
+    test_failed_relaunch_only_fails_the_current_page()
+    print("✓ 浏览器看门狗测试通过")
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试：延迟导入（在全新解释器中导入，检查重依赖没有被提前加载）
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+# 只在真正需要时才导入的重依赖（浏览器、Excel、Parquet、HTML解析）
+HEAVY_MODULES = ("selenium", "webdriver_manager", "pandas", "numpy", "pyarrow", "bs4", "openpyxl", "psutil")
+
+PROBE = """
+import json, runpy, sys
+{setup}
+print(json.dumps(sorted({{name.split('.')[0] for name in sys.modules}} & set({heavy!r}))))
+"""
+
+def loaded_heavy_modules(setup: str) -> list:
+    """在全新解释器中执行setup，返回其后已加载的重依赖"""
+    code = PROBE.format(setup=setup, heavy=HEAVY_MODULES)
+    result = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def test_import_does_not_load_heavy_dependencies():
+    assert loaded_heavy_modules("import ted_scraper_edge") == []
+
+def test_print_url_does_not_load_heavy_dependencies():
+    setup = ("sys.argv = ['ted_scraper_edge.py', '--print-url']\n"
+             "runpy.run_path('ted_scraper_edge.py', run_name='__main__')")
+    assert loaded_heavy_modules(setup) == []
+
+if __name__ == "__main__":
+    test_import_does_not_load_heavy_dependencies()
+    test_print_url_does_not_load_heavy_dependencies()
+    print("✓ 延迟导入测试通过")
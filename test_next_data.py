@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试：页面内嵌数据（__NEXT_DATA__）提取与回退到DOM/正则解析（固定HTML，不访问TED网站）
+"""
+
+
+from next_data import apply_talk_page, extract_next_data, talk_page_data, talks_from_html
+from ted_scraper_edge import TEDEdgeScraper, TEDVideo
+from testing_fixtures import listing_card, next_data_script
+
+TALK_A = {"slug": "talk_a", "title": "Talk A", "presenterDisplayName": "Ann", "duration": 845,
+          "viewedCount": 1200, "publishedAt": "2019-05-01T00:00:00Z", "topics": {"nodes": [{"name": "love"}]}}
+TALK_B = {"slug": "talk_b", "title": "Talk B", "duration": 600}
+
+LISTING_PAYLOAD = {"props": {"pageProps": {"videos": {"nodes": [TALK_A, {"wrapper": {"items": [TALK_B, TALK_A]}}]},
+                                           "meta": {"slug": "not-a-talk"}}}}
+
+def test_extract_next_data():
+    assert extract_next_data(f"<html>{next_data_script({'a': 1})}</html>") == {"a": 1}
+    assert extract_next_data("<html><body>no data</body></html>") is None
+    assert extract_next_data('<script id="__NEXT_DATA__" type="application/json">{"a": </script>') is None
+    assert extract_next_data(None) is None
+
+def test_talks_from_listing_payload():
+    videos = talks_from_html(next_data_script(LISTING_PAYLOAD))
+    # 任意层级的视频节点都被找到，按slug去重并保持页面顺序；没有标题的节点不是视频
+    assert [v.id for v in videos] == ["talk_a", "talk_b"]
+    a = videos[0]
+    assert (a.title, a.speaker, a.duration, a.views, a.publish_date, a.topic) == \
+        ("Talk A", "Ann", "14:05", 1200, "2019", "love")
+    assert a.url == "https://www.ted.com/talks/talk_a"
+    assert talks_from_html("<html></html>") == []
+
+def test_talk_page_data_merges_transcript():
+    payload = {"props": {"pageProps": {"videoData": TALK_A, "transcriptData": {"translation": {
+        "paragraphs": [{"cues": [{"text": "Hello\nworld."}, {"text": "Bye."}]}]}}}}}
+    talk = talk_page_data(next_data_script(payload))
+    assert talk["slug"] == "talk_a" and talk["transcript"] == "Hello world. Bye."
+    assert talk_page_data(next_data_script({"props": {"pageProps": {}}})) is None
+
+    video = TEDVideo("未知标题", "", "", 0, "", "", "https://www.ted.com/talks/talk_a")
+    assert apply_talk_page(video, next_data_script(payload))
+    assert (video.title, video.views, video.publish_date, video.transcript) == \
+        ("Talk A", 1200, "2019", "Hello world. Bye.")
+    assert not apply_talk_page(video, "<html></html>")
+
+def test_listing_falls_back_to_dom_cards():
+    scraper = TEDEdgeScraper()
+    cards = listing_card("talk_a", "Card A", "14:05") + listing_card("talk_c", "Card C", "9:30")
+    count = '<p class="text-textPrimary-onLight font-normal body2">2 of 57</p>'
+
+    # 内嵌数据中有的视频使用内嵌数据，没有的视频由卡片解析
+    total, videos = scraper._parse_listing_html(count + cards + next_data_script(LISTING_PAYLOAD))
+    assert total == 57
+    assert [(v.id, v.title, v.views) for v in videos] == [("talk_a", "Talk A", 1200), ("talk_c", "Card C", 0)]
+
+    # __NEXT_DATA__ 损坏或缺失时全部回退到卡片解析
+    broken = '<script id="__NEXT_DATA__" type="application/json">{not json</script>'
+    for html in (count + cards + broken, count + cards):
+        total, videos = scraper._parse_listing_html(html)
+        assert [(v.id, v.title, v.duration) for v in videos] == [("talk_a", "Card A", "14:05"), ("talk_c", "Card C", "9:30")]
+
+def test_talk_page_falls_back_to_regex():
+    scraper = TEDEdgeScraper()
+    html = ('<div class="mr-1 flex items-center gap-1">3,456 plays</div>'
+            '<div class="text-sm text-gray-900"> • March 2017 </div>'
+            '<script type="application/ld+json" data-next-head="">{"transcript": "From ld json."}</script>'
+            '<script id="__NEXT_DATA__" type="application/json">{broken</script>')
+    assert scraper._parse_views_and_date(html) == (3456, "2017")
+
+    video = TEDVideo("Talk", "", "", 0, "", "", "https://www.ted.com/talks/talk_x")
+    assert scraper.get_video_details(video, html)
+    assert (video.views, video.publish_date, video.transcript) == (3456, "2017", "From ld json.")
+
+if __name__ == "__main__":
+    test_extract_next_data()
+    test_talks_from_listing_payload()
+    test_talk_page_data_merges_transcript()
+    test_listing_falls_back_to_dom_cards()
+    test_talk_page_falls_back_to_regex()
+    print("✓ 内嵌数据提取测试通过")
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试：页面归档的录制与回放（临时目录，不访问TED网站）
+"""
+
+import os
+import sys
+import tempfile
+
+import ted_scraper_edge
+from page_archive import PageArchive
+from talk_store import TalkStore
+from ted_scraper_edge import TEDEdgeScraper, TEDVideo, load_topic_listings
+from testing_fixtures import listing_page, record_archive, talk_page
+
+def record_fixture(root):
+    """录制一个主题列表和三个视频页"""
+    record_archive(root, {"love": [(f"t_{i}", f"Talk {i}", "14:00") for i in range(3)]},
+                   {f"t_{i}": talk_page(f"t_{i}", 1000 * (i + 1), 2019) for i in range(3)})
+
+def test_archive_round_trip():
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = PageArchive(tmp, "record")
+        archive.record("https://www.ted.com/talks/a", "<html>first</html>")
+        archive.record("https://www.ted.com/talks/a", "<html>second</html>")
+        archive.close()
+
+        replay = PageArchive(tmp, "replay")
+        assert len(replay) == 2
+        assert replay.get("https://www.ted.com/talks/a") == "<html>second</html>"
+        assert replay.get("https://www.ted.com/talks/missing") is None
+        assert replay.observed_at("https://www.ted.com/talks/a")
+
+def test_replay_leaves_live_catalogue_untouched():
+    cwd = os.getcwd()
+    saved = sys.argv, ted_scraper_edge.CATALOGUE_DB, ted_scraper_edge.TOPICS
+    with tempfile.TemporaryDirectory() as tmp:
+        live_db = os.path.join(tmp, "live.db")
+        live = TalkStore(live_db)
+        live.upsert_videos([TEDVideo("Talk 0", "A", "14:00", 5, "2019", "love", "https://www.ted.com/talks/t_0")])
+        before = (live.conn.execute("SELECT * FROM views_history").fetchall(),
+                  live.conn.execute("SELECT views, views_checked_at FROM talks").fetchall())
+        before = [list(map(tuple, rows)) for rows in before]
+        live.close()
+
+        root = os.path.join(tmp, "archive")
+        record_fixture(root)
+        os.chdir(tmp)
+        sys.argv = ["ted_scraper_edge.py", "--replay", root]
+        ted_scraper_edge.CATALOGUE_DB, ted_scraper_edge.TOPICS = live_db, ["love"]
+        try:
+            ted_scraper_edge.main()
+        finally:
+            os.chdir(cwd)
+            sys.argv, ted_scraper_edge.CATALOGUE_DB, ted_scraper_edge.TOPICS = saved
+
+        live = TalkStore(live_db)
+        after = [list(map(tuple, live.conn.execute(sql).fetchall())) for sql in (
+            "SELECT * FROM views_history", "SELECT views, views_checked_at FROM talks")]
+        live.close()
+        assert after == before
+
+        # 回放结果在单独的数据库中，观测时间为录制时间
+        archive = PageArchive(root, "replay")
+        replayed = TalkStore(archive.replay_catalogue)
+        try:
+            rows = replayed.conn.execute("SELECT talk_id, observed_at, views FROM views_history ORDER BY talk_id").fetchall()
+            assert [(r['talk_id'], r['views']) for r in rows] == [("t_0", 1000), ("t_1", 2000), ("t_2", 3000)]
+            assert all(r['observed_at'] == archive.observed_at(f"https://www.ted.com/talks/{r['talk_id']}") for r in rows)
+        finally:
+            replayed.close()
+
+class SiteScraper(TEDEdgeScraper):
+    """用固定页面代替浏览器的爬取器：与浏览器模式相同，只读取总数时不录制，展开完成后才录制列表页"""
+
+    def __init__(self, site):
+        super().__init__()
+        self.site = site  # URL -> 页面源码
+        self.expanded = []
+
+    def get_listing_total(self, talks_url):
+        if self.replaying:
+            return super().get_listing_total(talks_url)
+        return self._parse_listing_html(self.site[talks_url])[0]
+
+    def iter_videos_by_talks_url(self, talks_url):
+        if self.replaying:
+            yield from super().iter_videos_by_talks_url(talks_url)
+            return
+        self.expanded.append(talks_url)
+        self.last_listing_total, videos = self._parse_listing_html(self.site[talks_url])
+        yield from videos
+        self._archive_page(talks_url, self.site[talks_url], "listing")
+
+def test_record_with_warm_topic_cache_replays():
+    urls = {topic: TEDEdgeScraper().build_talks_url_from_config([topic]) for topic in ("love", "trust")}
+    site = {urls["love"]: listing_page([("a", "Talk a", "14:00"), ("b", "Talk b", "14:00")]),
+            urls["trust"]: listing_page([("b", "Talk b", "14:00"), ("c", "Talk c", "14:00")])}
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TalkStore(os.path.join(tmp, "live.db"))
+        try:
+            # 普通运行后缓存是热的：love 在有效期内，trust 已过期但总数未变化，两者都不会再展开
+            load_topic_listings(SiteScraper(site), store, ["love", "trust"])
+            store.conn.execute("UPDATE topic_listings SET checked_at = '2000-01-01T00:00:00' WHERE topic = 'trust'")
+            recorder = SiteScraper(site)
+            recorder.archive = PageArchive(os.path.join(tmp, "archive"), "record")
+            recorded = load_topic_listings(recorder, store, ["love", "trust"])
+            recorder.archive.close()
+        finally:
+            store.close()
+        assert [v.id for v in recorded] == ["a", "b", "c"]
+        assert recorder.expanded == [urls["love"], urls["trust"]]
+
+        # 回放使用全新的目录：每个主题的列表页都在归档中
+        replayer = TEDEdgeScraper()
+        replayer.archive = PageArchive(os.path.join(tmp, "archive"), "replay")
+        assert sorted(replayer.archive.urls("listing")) == sorted(urls.values())
+        fresh = TalkStore(":memory:")
+        try:
+            assert [v.id for v in load_topic_listings(replayer, fresh, ["love", "trust"])] == ["a", "b", "c"]
+        finally:
+            fresh.close()
+
+if __name__ == "__main__":
+    test_archive_round_trip()
+    test_replay_leaves_live_catalogue_untouched()
+    test_record_with_warm_topic_cache_replays()
+    print("✓ 页面归档测试通过")
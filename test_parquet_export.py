@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试：Parquet导出（临时目录中的目录数据库，不访问TED网站）
+"""
+
+import os
+import sys
+import tempfile
+
+import pyarrow.parquet as pq
+
+import ted_scraper_edge
+from parquet_export import MARKER_FILE, export_catalogue
+from talk_store import TalkStore
+from ted_scraper_edge import TEDVideo
+from testing_fixtures import video
+
+def make_catalogue(db_path):
+    """三个视频：单主题、多主题、无主题"""
+    store = TalkStore(db_path)
+    store.upsert_videos([
+        TEDVideo("Alone", "A", "10:00", 500, "2019", "love", "https://www.ted.com/talks/alone", "words", "alone"),
+        TEDVideo("Both", "B", "12:00", 900, "2019", "love, trust", "https://www.ted.com/talks/both", "", "both"),
+        TEDVideo("None", "C", "08:00", 100, "2020", "", "https://www.ted.com/talks/none", "", "none"),
+    ])
+    return store
+
+def test_topic_filter_finds_multi_topic_talks():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = make_catalogue(os.path.join(tmp, "c.db"))
+        root = os.path.join(tmp, "parquet")
+        try:
+            assert export_catalogue(store, root, row_group_size=2)
+        finally:
+            store.close()
+
+        trust = pq.read_table(root, filters=[("topic", "=", "trust")]).to_pydict()
+        assert trust["id"] == ["both"]
+        love = pq.read_table(root, filters=[("year", "=", 2019), ("topic", "=", "love")]).to_pydict()
+        assert sorted(love["id"]) == ["alone", "both"]
+
+        # 不按主题筛选时每个视频只取 is_primary 行
+        primary = pq.read_table(root, filters=[("is_primary", "=", True)]).to_pydict()
+        assert sorted(primary["id"]) == ["alone", "both", "none"]
+        row = primary["id"].index("alone")
+        assert primary["transcript"][row] == "words" and primary["views"][row] == 500
+        assert primary["topic"][primary["id"].index("none")] == "unknown"
+
+def test_topics_come_from_topic_listings():
+    with tempfile.TemporaryDirectory() as tmp:
+        # 列表卡片不带主题：主题归属只记录在主题列表缓存中
+        store = TalkStore(os.path.join(tmp, "c.db"))
+        talks = [video("a", 100, "2019", topic=""), video("b", 200, "2019", topic=""), video("c", 300, "2020", topic="")]
+        root = os.path.join(tmp, "parquet")
+        try:
+            store.upsert_videos(talks)
+            store.set_topic_listing("trust", 2, talks[1:])
+            store.set_topic_listing("love", 2, talks[:2])
+            assert export_catalogue(store, root)
+        finally:
+            store.close()
+
+        assert sorted(os.listdir(os.path.join(root, "year=2019"))) == ["topic=love", "topic=trust"]
+        assert sorted(pq.read_table(root, filters=[("topic", "=", "love")]).to_pydict()["id"]) == ["a", "b"]
+        primary = pq.read_table(root, filters=[("is_primary", "=", True)]).to_pydict()
+        rows = {talk_id: (topic, topics) for talk_id, topic, topics in zip(primary["id"], primary["topic"], primary["topics"])}
+        assert rows == {"a": ("love", "love"), "b": ("trust", "trust,love"), "c": ("trust", "trust")}
+
+def test_refuses_to_overwrite_foreign_directory():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = make_catalogue(os.path.join(tmp, "c.db"))
+        foreign = os.path.join(tmp, "notes")
+        os.makedirs(foreign)
+        with open(os.path.join(foreign, "keep.txt"), "w") as f:
+            f.write("keep")
+        try:
+            assert not export_catalogue(store, foreign)
+            assert os.path.exists(os.path.join(foreign, "keep.txt"))
+
+            # 上次的导出目录（带标记文件）可以被替换，且不留下临时目录
+            root = os.path.join(tmp, "parquet")
+            assert export_catalogue(store, root)
+            assert os.path.exists(os.path.join(root, MARKER_FILE))
+            assert export_catalogue(store, root)
+            assert sorted(os.listdir(tmp)) == ["c.db", "notes", "parquet"]
+        finally:
+            store.close()
+
+def test_parquet_flag_exports_after_early_return_mode():
+    cwd = os.getcwd()
+    argv, db = sys.argv, ted_scraper_edge.CATALOGUE_DB
+    with tempfile.TemporaryDirectory() as tmp:
+        make_catalogue(os.path.join(tmp, "c.db")).close()
+        os.chdir(tmp)
+        ted_scraper_edge.CATALOGUE_DB = os.path.join(tmp, "c.db")
+        sys.argv = ["ted_scraper_edge.py", "--from-catalogue", "--parquet"]
+        try:
+            ted_scraper_edge.main()
+            assert os.path.exists(os.path.join(tmp, "ted_parquet", MARKER_FILE))
+            assert pq.read_table(os.path.join(tmp, "ted_parquet")).num_rows == 4
+        finally:
+            os.chdir(cwd)
+            sys.argv, ted_scraper_edge.CATALOGUE_DB = argv, db
+
+if __name__ == "__main__":
+    test_topic_filter_finds_multi_topic_talks()
+    test_topics_come_from_topic_listings()
+    test_refuses_to_overwrite_foreign_directory()
+    test_parquet_flag_exports_after_early_return_mode()
+    print("✓ Parquet导出测试通过")
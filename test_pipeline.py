@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试：流式流水线（桩阶段，不访问TED网站）
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+import ted_scraper_edge
+from pipeline import StreamingPipeline
+from ted_scraper_edge import TEDEdgeScraper, run_pipeline
+from testing_fixtures import video
+
+def run_with_timeout(pipeline, source, timeout=10):
+    """在线程中运行流水线，超时未结束视为死锁"""
+    box = {}
+    thread = threading.Thread(target=lambda: box.setdefault('results', pipeline.run(source)), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "流水线未结束（死锁）"
+    return box['results']
+
+def test_stages_filter_and_transform():
+    pipeline = StreamingPipeline(queue_size=4)
+    pipeline.add_stage("偶数", lambda x: x if x % 2 == 0 else None)
+    pipeline.add_stage("平方", lambda x: x * x, workers=3)
+    pipeline.add_stage("小于1000", lambda x: x if x < 1000 else None, workers=2)
+    results = run_with_timeout(pipeline, range(100))
+
+    assert sorted(results) == [x * x for x in range(0, 32, 2)]
+    assert pipeline.produced == 100 and not pipeline.incomplete
+    first, second, third = pipeline.stages
+    assert (first.passed, first.dropped) == (50, 50)
+    assert second.passed == 50 and (third.passed, third.dropped) == (16, 34)
+
+def test_failing_stage_does_not_deadlock():
+    def flaky(x):
+        if x % 5 == 0:
+            raise ValueError(f"bad item {x}")
+        return x
+
+    def source():
+        yield from range(20)
+        raise RuntimeError("listing broke")
+
+    pipeline = StreamingPipeline(queue_size=2)
+    pipeline.add_stage("不稳定", flaky, workers=2)
+    pipeline.add_stage("透传", lambda x: x)
+    results = run_with_timeout(pipeline, source())
+
+    # 数据源中途出错和阶段抛出异常都只影响对应的item，已处理的结果照常返回
+    assert sorted(results) == [x for x in range(20) if x % 5]
+    assert pipeline.stages[0].failed == 4 and pipeline.produced == 20
+    # 数据源出错：标记结果不完整
+    assert pipeline.incomplete
+
+def test_bounded_queues_apply_backpressure():
+    queue_size = 2
+    started = []
+    lead = []
+
+    def source():
+        for i in range(40):
+            # 数据源领先慢速阶段的条数：受队列长度限制，不会一次读完整个列表
+            lead.append(i - len(started))
+            yield i
+
+    def slow(x):
+        started.append(x)
+        time.sleep(0.005)
+        return x
+
+    pipeline = StreamingPipeline(queue_size=queue_size)
+    pipeline.add_stage("慢速", slow)
+    results = run_with_timeout(pipeline, source())
+
+    assert results == list(range(40))
+    # 队列中最多 queue_size 条，加上慢速阶段正在处理的1条和数据源正在放入的1条
+    assert max(lead) <= queue_size + 2
+
+class BrokenListingScraper(TEDEdgeScraper):
+    """列表产出几个视频后出错；详情直接按slug给出播放量和演讲稿"""
+
+    def iter_videos_by_talks_url(self, talks_url):
+        self.last_listing_reached_end = False
+        for i in range(4):
+            yield video(f"t_{i}")
+        raise RuntimeError("listing broke")
+
+    def get_video_details(self, item, html=None):
+        item.views, item.publish_date = 1000 * (int(item.id[2:]) + 1), "2019"
+        item.transcript = f"talk {item.id}"
+        return True
+
+def test_run_pipeline_reports_incomplete_listing():
+    cwd = os.getcwd()
+    saved = ted_scraper_edge.TOP_VIDEOS_COUNT, ted_scraper_edge.REQUEST_DELAY
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        scraper = BrokenListingScraper()
+        scraper.catalogue_db = os.path.join(tmp, "catalogue.db")
+        scraper.save_results = lambda top, bottom, filename=None: results.update(top=[v.id for v in top])
+        ted_scraper_edge.TOP_VIDEOS_COUNT, ted_scraper_edge.REQUEST_DELAY = 2, 0
+        os.chdir(tmp)
+        try:
+            complete = run_pipeline(scraper, "https://www.ted.com/talks")
+        finally:
+            os.chdir(cwd)
+            ted_scraper_edge.TOP_VIDEOS_COUNT, ted_scraper_edge.REQUEST_DELAY = saved
+
+    # 已产出的视频照常排名写出，但返回结果不完整
+    assert complete is False
+    assert results["top"] == ["t_3", "t_2"]
+
+if __name__ == "__main__":
+    test_stages_filter_and_transform()
+    test_failing_stage_does_not_deadlock()
+    test_bounded_queues_apply_backpressure()
+    test_run_pipeline_reports_incomplete_listing()
+    print("✓ 流水线测试通过")
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试：按热度排序的区间选择（模拟列表和详情获取，不访问TED网站）
+"""
+
+import os
+import random
+import sys
+import tempfile
+
+import ted_scraper_edge
+from page_archive import PageArchive
+from selection import PopularityBracket
+from ted_scraper_edge import TEDEdgeScraper, TEDVideo
+from testing_fixtures import listing_page, record_archive, talk_page
+
+def make_listing(total, seed=0):
+    """按热度排列的模拟列表：播放量大致递减（带噪声），偶数位置的视频在年份范围内"""
+    rng = random.Random(seed)
+    truth = {}
+    ranked = []
+    for i in range(total):
+        url = f"https://www.ted.com/talks/t_{i}"
+        truth[url] = (int(1e7 / (i + 1) * rng.uniform(0.7, 1.3)) + 1, "2019" if i % 2 == 0 else "2010")
+        ranked.append(TEDVideo(f"Talk {i}", "", "14:00", 0, "", "", url, id=f"t_{i}"))
+    return ranked, truth
+
+def in_window(video):
+    return video.publish_date == "2019"
+
+def expected(ranked, truth, count, exclude=()):
+    """全量访问时的前N/后N"""
+    eligible = sorted((v for v in ranked if v.url not in exclude and truth[v.url][1] == "2019"),
+                      key=lambda v: truth[v.url][0], reverse=True)
+    return [v.url for v in eligible[:count]], [v.url for v in eligible[-count:]]
+
+def test_converges_without_fetching_the_middle():
+    ranked, truth = make_listing(2000)
+    fetched = []
+
+    def fetch(batch):
+        fetched.extend(batch)
+        for video in batch:
+            video.views, video.publish_date = truth[video.url]
+
+    bracket = PopularityBracket(ranked, 20, fetch, in_window, step=50, stable_batches=2)
+    top, bottom = bracket.run()
+
+    assert ([v.url for v in top], [v.url for v in bottom]) == expected(ranked, truth, 20)
+    assert bracket.fetch_count == len(fetched) < len(ranked) / 2
+
+def test_failed_batches_do_not_end_the_bracket():
+    ranked, truth = make_listing(400)
+    # 尾部第2、3批（位置340-379）全部获取失败；更靠内的位置330-339放几个播放量极低的视频
+    failed = {v.url for v in ranked[340:380]}
+    for i in range(330, 340, 2):
+        truth[ranked[i].url] = (i - 320, "2019")
+
+    def fetch(batch):
+        for video in batch:
+            views, year = truth[video.url]
+            # 获取失败时播放量为0，发布年份来自本地目录
+            video.views, video.publish_date = (0, year) if video.url in failed else (views, year)
+
+    top, bottom = PopularityBracket(ranked, 10, fetch, in_window, step=20, stable_batches=2).run()
+
+    assert all(v.views for v in top + bottom)
+    assert ([v.url for v in top], [v.url for v in bottom]) == expected(ranked, truth, 10, exclude=failed)
+
+def test_meeting_brackets_match_full_ranking():
+    ranked, truth = make_listing(60)
+
+    def fetch(batch):
+        for video in batch:
+            video.views, video.publish_date = truth[video.url]
+
+    bracket = PopularityBracket(ranked, 25, fetch, in_window, step=10, stable_batches=2)
+    top, bottom = bracket.run()
+    assert bracket.fetch_count == len(ranked)
+    assert ([v.url for v in top], [v.url for v in bottom]) == expected(ranked, truth, 25)
+
+def test_listing_click_cap():
+    scraper = TEDEdgeScraper()
+    popular = scraper.build_talks_url_from_config(["love", "science"], sort="popular")
+    newest = scraper.talks_url_with_sort(popular, "newest")
+    assert newest == scraper.build_talks_url_from_config(["love", "science"], sort="newest")
+    # 热度排序必须展开到底；其他排序受点击上限约束；总数未知时最多50次
+    assert scraper.listing_max_clicks(popular, 10000) == 416
+    assert scraper.listing_max_clicks(newest, 10000) == ted_scraper_edge.LISTING_MAX_CLICKS
+    assert scraper.listing_max_clicks(newest, 240) == 9
+    assert scraper.listing_max_clicks(popular, 0) == 50
+
+def test_truncated_popular_listing_falls_back_to_full_ranking():
+    cwd, argv = os.getcwd(), sys.argv
+    saved = ted_scraper_edge.TOPICS, ted_scraper_edge.TOP_VIDEOS_COUNT, TEDEdgeScraper.save_results
+    results = {}
+    cards = [(f"t_{i}", f"Talk {i}", "14:00") for i in range(10)]
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "archive")
+        # 播放量按 t_0 > t_1 > ... > t_9 递减；热度排序列表只加载到 t_2（"3 of 10"），newest列表完整
+        record_archive(root, {"love": cards},
+                       {f"t_{i}": talk_page(f"t_{i}", 1000 * (10 - i), 2019, transcript=f"talk {i}") for i in range(10)})
+        archive = PageArchive(root, "record")
+        archive.record(TEDEdgeScraper().build_talks_url_from_config(["love"], sort="popular"),
+                       listing_page(cards[:3], total=10), "listing")
+        archive.close()
+
+        ted_scraper_edge.TOPICS, ted_scraper_edge.TOP_VIDEOS_COUNT = ["love"], 2
+        TEDEdgeScraper.save_results = lambda self, top, bottom, filename=None: results.update(
+            top=[v.id for v in top], bottom=[v.id for v in bottom])
+        sys.argv = ["ted_scraper_edge.py", "--replay", root, "--sort", "popular"]
+        os.chdir(tmp)
+        try:
+            ted_scraper_edge.main()
+        finally:
+            os.chdir(cwd)
+            sys.argv = argv
+            ted_scraper_edge.TOPICS, ted_scraper_edge.TOP_VIDEOS_COUNT, TEDEdgeScraper.save_results = saved
+
+    # 截断列表的尾部 t_1/t_2 不是后N：改用完整的newest列表排名，得到真正的后N
+    assert results["top"] == ["t_0", "t_1"]
+    assert sorted(results["bottom"]) == ["t_8", "t_9"]
+
+if __name__ == "__main__":
+    test_converges_without_fetching_the_middle()
+    test_failed_batches_do_not_end_the_bracket()
+    test_meeting_brackets_match_full_ranking()
+    test_listing_click_cap()
+    test_truncated_popular_listing_falls_back_to_full_ranking()
+    print("✓ 区间选择测试通过")
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试：Edge驱动路径缓存与Cookie同意检查（临时缓存目录，浏览器版本探测和浏览器均为替身）
+"""
+
+import json
+import os
+import tempfile
+
+import webdriver_manager.microsoft
+
+import setup_edge_driver
+from setup_edge_driver import resolve_driver_path, save_driver_cache
+from ted_scraper_edge import TEDEdgeScraper
+
+class EdgeProbe:
+    """替身版本探测：记录 get_edge_version / 驱动版本查询 / 自动下载的调用次数"""
+
+    def __init__(self, tmp, fingerprint, version, local_driver_version="120.0.2210.91"):
+        self.tmp = tmp
+        self.fingerprint = fingerprint
+        self.version = version
+        self.local_driver = os.path.join(tmp, "msedgedriver.exe")
+        self.local_driver_version = local_driver_version
+        self.calls = []
+        with open(self.local_driver, "w") as f:
+            f.write("driver")
+
+    def install(self):
+        probe = self
+
+        class FakeManager:
+            def install(self):
+                probe.calls.append("download")
+                path = os.path.join(probe.tmp, f"downloaded_{probe.version}.exe")
+                with open(path, "w") as f:
+                    f.write("driver")
+                return path
+
+        saved = (setup_edge_driver.get_edge_fingerprint, setup_edge_driver.get_edge_version,
+                 setup_edge_driver.check_existing_driver, setup_edge_driver.get_driver_version,
+                 webdriver_manager.microsoft.EdgeChromiumDriverManager)
+        setup_edge_driver.get_edge_fingerprint = lambda: self.fingerprint
+        setup_edge_driver.get_edge_version = lambda: self.calls.append("version") or self.version
+        setup_edge_driver.check_existing_driver = lambda: self.local_driver
+        setup_edge_driver.get_driver_version = lambda path: self.local_driver_version
+        webdriver_manager.microsoft.EdgeChromiumDriverManager = FakeManager
+        return saved
+
+    @staticmethod
+    def restore(saved):
+        (setup_edge_driver.get_edge_fingerprint, setup_edge_driver.get_edge_version,
+         setup_edge_driver.check_existing_driver, setup_edge_driver.get_driver_version,
+         webdriver_manager.microsoft.EdgeChromiumDriverManager) = saved
+
+def test_driver_cache_hits_and_invalidation():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_file = os.path.join(tmp, "drivers", "driver_cache.json")
+        probe = EdgeProbe(tmp, "edge|1|100", "120.0.2210.133")
+        saved = probe.install()
+        try:
+            # 首次解析：本地驱动主版本与浏览器一致，写入缓存
+            assert resolve_driver_path(cache_file) == probe.local_driver
+            with open(cache_file, encoding="utf-8") as f:
+                cache = json.load(f)
+            assert cache == {"driver_path": os.path.abspath(probe.local_driver),
+                             "browser_version": "120.0.2210.133", "fingerprint": "edge|1|100"}
+
+            # 指纹未变：直接使用缓存，不探测浏览器版本
+            probe.calls.clear()
+            assert resolve_driver_path(cache_file) == os.path.abspath(probe.local_driver)
+            assert probe.calls == []
+
+            # 指纹变化但版本相同（如浏览器被重新安装）：沿用缓存并更新指纹
+            probe.fingerprint = "edge|2|100"
+            assert resolve_driver_path(cache_file) == os.path.abspath(probe.local_driver)
+            assert probe.calls == ["version"]
+            with open(cache_file, encoding="utf-8") as f:
+                assert json.load(f)["fingerprint"] == "edge|2|100"
+
+            # 浏览器升级到新的主版本：本地旧驱动不再匹配，自动下载新驱动并更新缓存
+            probe.fingerprint, probe.version = "edge|3|120", "121.0.2277.83"
+            probe.calls.clear()
+            downloaded = resolve_driver_path(cache_file)
+            assert downloaded.endswith("downloaded_121.0.2277.83.exe") and probe.calls == ["version", "download"]
+            with open(cache_file, encoding="utf-8") as f:
+                assert json.load(f)["browser_version"] == "121.0.2277.83"
+        finally:
+            EdgeProbe.restore(saved)
+
+def test_driver_cache_falls_back_when_stale():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_file = os.path.join(tmp, "driver_cache.json")
+        probe = EdgeProbe(tmp, "edge|1|100", "120.0.2210.133")
+        saved = probe.install()
+        try:
+            # 缓存的驱动文件已被删除：重新解析
+            save_driver_cache(cache_file, {"driver_path": os.path.join(tmp, "gone.exe"),
+                                           "browser_version": "120.0.2210.133", "fingerprint": "edge|1|100"})
+            assert resolve_driver_path(cache_file) == probe.local_driver
+
+            # 驱动加载失败时调用方清空缓存：下次重新解析
+            save_driver_cache(cache_file, {})
+            probe.calls.clear()
+            assert resolve_driver_path(cache_file) == probe.local_driver and probe.calls == ["version"]
+
+            # 无法定位浏览器也无法探测版本：只能信任仍然存在的缓存驱动
+            probe.fingerprint, probe.version = None, None
+            assert resolve_driver_path(cache_file) == os.path.abspath(probe.local_driver)
+        finally:
+            EdgeProbe.restore(saved)
+
+class ConsentBrowser:
+    """替身浏览器：保存Cookie，Cookie弹窗按钮始终可点击"""
+
+    def __init__(self, cookies):
+        self.cookies = cookies
+        self.clicks = 0
+
+    def get_cookie(self, name):
+        return self.cookies.get(name)
+
+    def find_element(self, by, value):
+        browser = self
+
+        class Button:
+            def is_displayed(self):
+                return True
+
+            def is_enabled(self):
+                return True
+
+            def click(self):
+                browser.clicks += 1
+                browser.cookies["OptanonAlertBoxClosed"] = {"name": "OptanonAlertBoxClosed"}
+
+        return Button()
+
+def test_cookie_consent_follows_the_browser_cookie():
+    scraper = TEDEdgeScraper()
+    scraper.driver = ConsentBrowser({})
+    scraper.accept_cookies()
+    assert scraper.driver.clicks == 1
+    # 同意Cookie存在时不再等待弹窗
+    scraper.accept_cookies()
+    assert scraper.driver.clicks == 1
+    # Cookie过期或被清除后重新点击同意
+    scraper.driver.cookies.clear()
+    scraper.accept_cookies()
+    assert scraper.driver.clicks == 2
+
+if __name__ == "__main__":
+    test_driver_cache_hits_and_invalidation()
+    test_driver_cache_falls_back_when_stale()
+    test_cookie_consent_follows_the_browser_cookie()
+    print("✓ Edge驱动缓存测试通过")
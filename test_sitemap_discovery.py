@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试：sitemap视频发现（使用本地替身服务器提供的sitemap，不访问TED网站）
+"""
+
+import gzip
+import io
+
+from sitemap_discovery import SitemapDiscovery, iter_sitemap_entries
+from standin_server import StandinServer
+
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+def _urlset(entries):
+    urls = "".join(f"<url><loc>{loc}</loc><lastmod>{lastmod}</lastmod></url>" for loc, lastmod in entries)
+    return f'<?xml version="1.0" encoding="UTF-8"?><urlset {NS}>{urls}</urlset>'.encode()
+
+def make_fixtures(base):
+    """sitemap索引 + 两个视频sitemap（其中一个gzip压缩）+ 一个无关sitemap"""
+    index = (
+        f'<?xml version="1.0" encoding="UTF-8"?><sitemapindex {NS}>'
+        f'<sitemap><loc>{base}/sitemaps/talks-1.xml</loc><lastmod>2024-01-10</lastmod></sitemap>'
+        f'<sitemap><loc>{base}/sitemaps/talks-2.xml.gz</loc><lastmod>2024-03-05T08:00:00Z</lastmod></sitemap>'
+        f'<sitemap><loc>{base}/sitemaps/speakers.xml</loc><lastmod>2024-03-05</lastmod></sitemap>'
+        f'</sitemapindex>'
+    ).encode()
+    talks_1 = _urlset([
+        ("https://www.ted.com/talks/old_talk_a", "2023-06-01"),
+        ("https://www.ted.com/talks/old_talk_b", "2024-01-10T00:00:00+00:00"),
+        ("https://www.ted.com/talks/old_talk_b/transcript", "2024-01-10"),
+    ])
+    talks_2 = gzip.compress(_urlset([
+        ("https://www.ted.com/talks/new_talk_c", "2024-03-01T12:00:00Z"),
+        ("https://www.ted.com/talks/updated_talk_a2", "2024-03-05T08:00:00Z"),
+        ("https://www.ted.com/talks/stable_talk_d", "2023-12-31"),
+    ]))
+    speakers = _urlset([("https://www.ted.com/speakers/someone", "2024-03-05")])
+    return {
+        "/sitemap.xml": index,
+        "/sitemaps/talks-1.xml": talks_1,
+        "/sitemaps/talks-2.xml.gz": talks_2,
+        "/sitemaps/speakers.xml": speakers,
+    }
+
+def run_discovery(since=None):
+    fixtures = {}
+    server = StandinServer(lambda method, path, body: (200, "application/xml", fixtures[path]))
+    fixtures.update(make_fixtures(server.url))
+    with server:
+        discovery = SitemapDiscovery(server.url + "/sitemap.xml")
+        videos = list(discovery.discover(since))
+    return discovery, videos, [path for _, path in server.requests]
+
+def test_full_discovery_emits_only_talk_pages():
+    discovery, videos, paths = run_discovery()
+
+    assert [v.id for v in videos] == ["old_talk_a", "old_talk_b", "new_talk_c", "updated_talk_a2", "stable_talk_d"]
+    assert videos[2].url == "https://www.ted.com/talks/new_talk_c"
+    assert "/sitemaps/speakers.xml" not in paths
+    assert discovery.max_lastmod.isoformat() == "2024-03-05T08:00:00+00:00"
+
+def test_incremental_discovery_uses_lastmod():
+    _, videos, paths = run_discovery(since="2024-01-10T00:00:00+00:00")
+
+    assert [v.id for v in videos] == ["new_talk_c", "updated_talk_a2"]
+    # 子sitemap lastmod未晚于上次运行，整个跳过不下载
+    assert "/sitemaps/talks-1.xml" not in paths
+
+def test_streaming_parser_yields_entries_incrementally():
+    urls = [(f"https://www.ted.com/talks/t_{i}", "2024-01-01") for i in range(2000)]
+    stream = io.BytesIO(_urlset(urls))
+    entries = iter_sitemap_entries(stream)
+
+    assert next(entries) == ("https://www.ted.com/talks/t_0", "2024-01-01")
+    assert sum(1 for _ in entries) == 1999
+
+if __name__ == "__main__":
+    test_full_discovery_emits_only_talk_pages()
+    test_incremental_discovery_uses_lastmod()
+    test_streaming_parser_yields_entries_incrementally()
+    print("✓ sitemap发现测试通过")
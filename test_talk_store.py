@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试：本地视频目录（内存/临时SQLite数据库，不访问TED网站）
+"""
+
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+
+import ted_scraper_edge
+from talk_store import TalkStore, duration_seconds, publish_year
+from page_archive import PageArchive
+from ted_scraper_edge import TEDEdgeScraper, TEDVideo, fetch_views_and_dates, load_topic_listings
+from testing_fixtures import listing_page, record_archive, video
+
+def test_schema_and_parsers():
+    store = TalkStore(":memory:")
+    try:
+        tables = {r['name'] for r in store.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert {"talks", "talk_topics", "views_history", "topic_listings", "topic_listing_talks", "meta"} <= tables
+        indexes = {r['name'] for r in store.conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert {"idx_talks_year", "idx_talks_duration", "idx_talks_views", "idx_talk_topics_topic"} <= indexes
+    finally:
+        store.close()
+    assert duration_seconds("14:05") == 845 and duration_seconds("1:02:03") == 3723
+    assert duration_seconds("未知时长") is None
+    assert publish_year("2019-03-01") == 2019 and publish_year("") is None
+
+def test_migrates_old_database():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "old.db")
+        conn = sqlite3.connect(path)
+        conn.execute("""CREATE TABLE talks (id TEXT PRIMARY KEY, url TEXT NOT NULL, title TEXT, speaker TEXT,
+                        duration TEXT, publish_date TEXT, topic TEXT, views INTEGER, views_checked_at TEXT,
+                        transcript TEXT, first_seen_at TEXT)""")
+        conn.execute("INSERT INTO talks (id, url, duration, publish_date, views) VALUES "
+                     "('old', 'https://www.ted.com/talks/old', '12:30', '2016', 7)")
+        conn.commit()
+        conn.close()
+
+        store = TalkStore(path)
+        try:
+            row = store.conn.execute("SELECT year, duration_seconds, views FROM talks WHERE id = 'old'").fetchone()
+            assert tuple(row) == (2016, 750, 7)
+            assert [v.id for v in store.query_videos(start_year=2016, min_minutes=12)] == ["old"]
+        finally:
+            store.close()
+
+def test_record_views_many_appends_history():
+    store = TalkStore(":memory:")
+    try:
+        talks = [video("a", 100, "2019"), video("b", 0, "")]
+        store.upsert_static(talks)
+        store.record_views_many(talks, "2024-01-01T00:00:00")
+        talks[0].views, talks[0].publish_date = 150, ""
+        store.record_views_many(talks, "2024-02-01T00:00:00")
+
+        assert store.views_history("a") == [("2024-01-01T00:00:00", 100), ("2024-02-01T00:00:00", 150)]
+        # 播放量为0视为获取失败，不写入；空的发布时间不覆盖已有值
+        assert store.views_history("b") == []
+        a, b = store.load_videos(["a", "b"])
+        assert (a.views, a.publish_date) == (150, "2019")
+        assert b.views == 0
+        row = store.conn.execute("SELECT year, views_checked_at FROM talks WHERE id = 'a'").fetchone()
+        assert tuple(row) == (2019, "2024-02-01T00:00:00")
+    finally:
+        store.close()
+
+def test_upsert_static_keeps_known_fields():
+    store = TalkStore(":memory:")
+    try:
+        store.upsert_videos([TEDVideo("Real title", "Real speaker", "14:00", 10, "2019", "love",
+                                      "https://www.ted.com/talks/a", "transcript text")])
+        store.upsert_static([TEDVideo("未知标题", "未知演讲者", "未知时长", 0, "", "", "https://www.ted.com/talks/a")])
+        stored = store.load_videos(["a"])[0]
+        assert (stored.title, stored.speaker, stored.duration, stored.views, stored.topic) == \
+            ("Real title", "Real speaker", "14:00", 10, "love")
+        assert stored.transcript == "transcript text"
+    finally:
+        store.close()
+
+def test_select_stale():
+    store = TalkStore(":memory:")
+    try:
+        fresh, old, no_date, new = video("fresh", 5, "2019"), video("old", 5, "2019"), video("nodate", 5), video("new")
+        store.upsert_static([fresh, old, no_date])
+        now = datetime.now()
+        store.record_views_many([fresh, no_date], now.isoformat(timespec='seconds'))
+        store.record_views_many([old], (now - timedelta(hours=30)).isoformat(timespec='seconds'))
+
+        stale = store.select_stale([fresh, old, no_date, new], max_age_hours=24)
+        assert [v.id for v in stale] == ["old", "nodate", "new"]
+    finally:
+        store.close()
+
+def ranking_store():
+    """12个视频：年份2015-2020交替，时长10/14分钟交替，主题love或trust，一个获取播放量失败"""
+    store = TalkStore(":memory:")
+    talks = [video(f"t{i:02d}", 100 * (i + 1), str(2015 + i % 6), "10:00" if i % 2 else "14:00",
+                   "love" if i < 6 else "trust, fear") for i in range(12)]
+    talks.append(video("failed", 0, "", "14:00", "love"))
+    store.upsert_videos(talks)
+    return store
+
+def test_query_filters():
+    store = ranking_store()
+    try:
+        assert [v.id for v in store.query_videos(start_year=2019, end_year=2020)] == ["t04", "t05", "t10", "t11"]
+        assert {v.id for v in store.query_videos(min_minutes=12, max_minutes=15)} == \
+            {"t00", "t02", "t04", "t06", "t08", "t10", "failed"}
+        assert {v.id for v in store.query_videos(topics=["fear"])} == {f"t{i:02d}" for i in range(6, 12)}
+        assert {v.id for v in store.query_videos(topics=["Love "], max_minutes=12)} == {"t01", "t03", "t05"}
+    finally:
+        store.close()
+
+def test_id_filter_uses_temp_table():
+    store = ranking_store()
+    try:
+        # 超过SQLite参数个数上限的ID列表，且每次查询替换上一次的ID集合
+        ids = ["t03", "t07"] + [f"missing_{i}" for i in range(5000)]
+        assert [v.id for v in store.query_videos(ids=ids)] == ["t03", "t07"]
+        assert [v.id for v in store.query_videos(ids=["t08"])] == ["t08"]
+        assert store.query_videos(ids=[]) == []
+    finally:
+        store.close()
+
+def test_query_top_bottom_ordering():
+    store = ranking_store()
+    try:
+        top, bottom = store.query_top_bottom(3)
+        assert [v.id for v in top] == ["t11", "t10", "t09"]
+        # 后N同样按播放量从高到低排列；获取播放量失败的视频不参与排名
+        assert [v.id for v in bottom] == ["t02", "t01", "t00"]
+
+        top, bottom = store.query_top_bottom(2, start_year=2016, end_year=2017, topics=["trust"])
+        assert [v.id for v in top] == ["t08", "t07"] and [v.id for v in bottom] == ["t08", "t07"]
+
+        # 满足条件的视频不足N个时后N为空
+        top, bottom = store.query_top_bottom(5, ids=["t00", "t01", "failed"])
+        assert [v.id for v in top] == ["t01", "t00"] and bottom == []
+    finally:
+        store.close()
+
+def test_ranking_uses_only_views_checked_this_run():
+    store = ranking_store()
+    try:
+        # 本次运行只刷新了 t00-t09：t10/t11 获取失败，目录中只有上次的播放量
+        run_started = "2030-01-01T00:00:00"
+        store.record_views_many([video(f"t{i:02d}", 100 * (i + 1), str(2015 + i % 6)) for i in range(10)],
+                                "2030-01-01T00:05:00")
+        top, bottom = store.query_top_bottom(3, checked_since=run_started)
+        assert [v.id for v in top] == ["t09", "t08", "t07"]
+        assert [v.id for v in bottom] == ["t02", "t01", "t00"]
+    finally:
+        store.close()
+
+class FlakyDetailScraper(TEDEdgeScraper):
+    """按slug给出播放量，slug以 failed 开头的视频获取失败"""
+
+    def get_video_views_and_date(self, item):
+        return (0, "") if item.id.startswith("failed") else (int(item.id[1:]), "2019")
+
+class CountingStore(TalkStore):
+    def __init__(self):
+        super().__init__(":memory:")
+        self.batches = []
+
+    def record_views_many(self, videos, observed_at=None):
+        videos = list(videos)
+        self.batches.append([v.id for v in videos])
+        super().record_views_many(videos, observed_at)
+
+def test_fetched_views_are_written_in_batches():
+    saved = ted_scraper_edge.VIEWS_COMMIT_EVERY
+    ted_scraper_edge.VIEWS_COMMIT_EVERY = 2
+    store = CountingStore()
+    try:
+        talks = [video("t1"), video("failed"), video("t2"), video("t3")]
+        store.upsert_static(talks)
+        fetch_views_and_dates(FlakyDetailScraper(), talks, store=store)
+        # 获取失败的视频不写入；每2个一批，最后不足一批的也写入
+        assert store.batches == [["t1", "t2"], ["t3"]]
+        assert [(v.id, v.views) for v in store.query_videos(ids=["t1", "t3", "failed"])] == \
+            [("failed", 0), ("t1", 1), ("t3", 3)]
+    finally:
+        ted_scraper_edge.VIEWS_COMMIT_EVERY = saved
+        store.close()
+
+class ListingScraper(TEDEdgeScraper):
+    """按 (主题, 排序) 返回固定列表的替身爬取器，记录展开和读取总数的次数"""
+
+    def __init__(self, listings):
+        super().__init__()
+        self.listings = listings  # (topic, sort) -> [slug, ...]
+        self.expanded = []
+        self.totals_read = []
+
+    def _key(self, url):
+        for (topic, sort) in self.listings:
+            if url == self.build_talks_url_from_config([topic], sort=sort):
+                return topic, sort
+        raise AssertionError(url)
+
+    def get_listing_total(self, talks_url):
+        key = self._key(talks_url)
+        self.totals_read.append(key)
+        return len(self.listings[key])
+
+    def iter_videos_by_talks_url(self, talks_url):
+        key = self._key(talks_url)
+        self.expanded.append(key)
+        self.last_listing_total = len(self.listings[key])
+        for slug in self.listings[key]:
+            yield video(slug, topic=key[0])
+
+def test_topic_listing_cache_revalidation():
+    store = TalkStore(":memory:")
+    scraper = ListingScraper({("love", "newest"): ["a", "b", "c"], ("trust", "newest"): ["c", "d"],
+                              ("love", "oldest"): ["z", "y"]})
+    try:
+        ids = [v.id for v in load_topic_listings(scraper, store, ["love", "trust"], "newest")]
+        assert ids == ["a", "b", "c", "d"]
+        assert scraper.expanded == [("love", "newest"), ("trust", "newest")]
+
+        # 有效期内：不访问网络
+        scraper.expanded.clear()
+        assert len(load_topic_listings(scraper, store, ["love", "trust"], "newest")) == 4
+        assert scraper.expanded == [] and scraper.totals_read == []
+
+        # 过期但"of N"总数不变：只读取总数，更新检查时间
+        checked_before = store.get_topic_listing("love")[1]
+        store.conn.execute("UPDATE topic_listings SET checked_at = '2000-01-01T00:00:00'")
+        load_topic_listings(scraper, store, ["love", "trust"], "newest", max_age_hours=24)
+        assert scraper.expanded == [] and len(scraper.totals_read) == 2
+        assert store.get_topic_listing("love")[1] >= checked_before
+
+        # 总数变化的主题重新展开，另一个主题沿用缓存
+        scraper.listings[("trust", "newest")] = ["c", "d", "e"]
+        store.conn.execute("UPDATE topic_listings SET checked_at = '2000-01-01T00:00:00'")
+        ids = [v.id for v in load_topic_listings(scraper, store, ["love", "trust"], "newest")]
+        assert scraper.expanded == [("trust", "newest")]
+        assert ids == ["a", "b", "c", "d", "e"]
+
+        # 不同排序分别缓存：newest的缓存不会当作oldest使用
+        scraper.expanded.clear()
+        assert [v.id for v in load_topic_listings(scraper, store, ["love"], "oldest")] == ["z", "y"]
+        assert scraper.expanded == [("love", "oldest")]
+        assert store.get_topic_listing("love", "newest")[2] == ["a", "b", "c"]
+    finally:
+        store.close()
+
+def test_topic_union_matches_combined_listing():
+    per_topic = {"love": ["a", "b", "c"], "trust": ["c", "d"], "fear": ["e", "a", "f"]}
+    topics = list(per_topic)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "archive")
+        cards = lambda slugs: [(slug, f"Talk {slug}", "14:00") for slug in slugs]
+        record_archive(root, {topic: cards(slugs) for topic, slugs in per_topic.items()}, {})
+        # 多主题URL的列表：TED多主题筛选为并集，按发布时间混排
+        archive = PageArchive(root, "record")
+        combined_url = TEDEdgeScraper().build_talks_url_from_config(topics, sort="newest")
+        archive.record(combined_url, listing_page(cards(["f", "e", "d", "c", "b", "a"])), "listing")
+        archive.close()
+
+        scraper = TEDEdgeScraper()
+        scraper.archive = PageArchive(root, "replay")
+        expanded = []
+        iter_listing = scraper.iter_videos_by_talks_url
+        scraper.iter_videos_by_talks_url = lambda url: expanded.append(url) or iter_listing(url)
+        store = TalkStore(":memory:")
+        try:
+            combined = {v.id for v in scraper.get_videos_by_talks_url(combined_url)}
+            expanded.clear()
+            merged = [v.id for v in load_topic_listings(scraper, store, topics, "newest")]
+            # 没有缓存时每个主题各展开一次；合并去重后与多主题列表是同一组视频
+            assert expanded == [scraper.build_talks_url_from_config([t], sort="newest") for t in topics]
+            assert sorted(merged) == sorted(combined) == ["a", "b", "c", "d", "e", "f"]
+        finally:
+            store.close()
+            scraper.archive.close()
+
+def test_incomplete_listing_is_not_cached():
+    store = TalkStore(":memory:")
+    scraper = ListingScraper({("love", "newest"): ["a", "b", "c"]})
+    try:
+        videos = load_topic_listings(scraper, store, ["love"], "newest", should_stop=lambda: len(scraper.expanded) > 0)
+        assert [v.id for v in videos] == ["a"]
+        assert store.get_topic_listing("love") == (0, None, [])
+        assert store.stale_topics(["love"], 24) == ["love"]
+    finally:
+        store.close()
+
+def test_old_topic_cache_is_rebuilt():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "old.db")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE topic_listings (topic TEXT PRIMARY KEY, total_count INTEGER, checked_at TEXT)")
+        conn.execute("CREATE TABLE topic_listing_talks (topic TEXT NOT NULL, talk_id TEXT NOT NULL)")
+        conn.execute("INSERT INTO topic_listings VALUES ('love', 3, '2024-01-01T00:00:00')")
+        conn.commit()
+        conn.close()
+
+        store = TalkStore(path)
+        try:
+            assert store.stale_topics(["love"], 24) == ["love"]
+            store.set_topic_listing("love", 1, [video("a")], "popular")
+            assert store.get_topic_listing("love", "popular")[2] == ["a"]
+        finally:
+            store.close()
+
+if __name__ == "__main__":
+    test_schema_and_parsers()
+    test_migrates_old_database()
+    test_record_views_many_appends_history()
+    test_upsert_static_keeps_known_fields()
+    test_select_stale()
+    test_query_filters()
+    test_id_filter_uses_temp_table()
+    test_query_top_bottom_ordering()
+    test_ranking_uses_only_views_checked_this_run()
+    test_fetched_views_are_written_in_batches()
+    test_topic_listing_cache_revalidation()
+    test_topic_union_matches_combined_listing()
+    test_incomplete_listing_is_not_cached()
+    test_old_topic_cache_is_rebuilt()
+    print("✓ 本地目录测试通过")
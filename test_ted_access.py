@@ -5,7 +5,6 @@
 """
 
 import requests
-from bs4 import BeautifulSoup
 from ted_scraper_edge import TEDEdgeScraper
 from config import TOPICS, SORT
 
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试：GraphQL批量客户端（使用本地替身API，不访问TED网站）
+"""
+
+import json
+import os
+import re
+import tempfile
+
+import ted_scraper_edge
+from standin_server import StandinServer
+from ted_api import TEDGraphQLClient, fetch_details_via_api
+from ted_scraper_edge import TEDEdgeScraper, TEDVideo, fetch_transcripts, fetch_views_and_dates
+from testing_fixtures import talk_page
+
+TALKS = {
+    f"talk_{i}": {
+        "id": str(1000 + i),
+        "slug": f"talk_{i}",
+        "title": f"Talk {i}",
+        "presenterDisplayName": f"Speaker {i}",
+        "duration": 840 + i,
+        "viewedCount": 10000 * (i + 1),
+        "publishedAt": f"{2015 + i}-03-01T15:00:00Z",
+        "topics": {"nodes": [{"name": "love"}, {"name": "trust"}]},
+    }
+    for i in range(7)
+}
+
+def standin_api(method, path, body):
+    """替身GraphQL接口：按别名返回视频、演讲稿和分页数据；变量类型与字段参数类型不符时整个请求报错"""
+    request = json.loads(body)
+    query, variables = request["query"], request["variables"]
+    declared = dict(re.findall(r'\$(\w+): (\w+!?)', query.split("{", 1)[0]))
+    for field, arg, expected in (("video", "slug", "String!"), ("translation", "videoId", "ID!")):
+        for var in re.findall(rf'{field}\({arg}: \$(\w+)', query):
+            if declared.get(var) != expected:
+                error = {"message": f"Variable ${var} of type {declared.get(var)} used in position expecting {expected}"}
+                return 200, "application/json", json.dumps({"errors": [error], "data": None}).encode()
+    data = {}
+    if "videos(first:" in query:
+        slugs = sorted(TALKS)
+        start = int(variables["after"] or 0)
+        end = start + variables["first"]
+        data["videos"] = {
+            "pageInfo": {"hasNextPage": end < len(slugs), "endCursor": str(end)},
+            "nodes": [TALKS[s] for s in slugs[start:end]],
+        }
+    for alias, var in re.findall(r'(t\d+): video\(slug: \$(s\d+)', query):
+        data[alias] = TALKS.get(variables[var])
+    for alias, var in re.findall(r'(x\d+): translation\(videoId: \$(v\d+)', query):
+        slug = variables[var]
+        data[alias] = {"paragraphs": [{"cues": [{"text": f"Hello from\n{slug}."}, {"text": "Thanks."}]}]} if slug in TALKS else None
+    return 200, "application/json", json.dumps({"data": data}).encode()
+
+def test_fetch_talks_batches_requests():
+    with StandinServer(standin_api) as server:
+        client = TEDGraphQLClient(server.url + "/graphql", batch_size=3)
+        slugs = [f"talk_{i}" for i in range(7)] + ["missing_talk"]
+        talks = client.fetch_talks(slugs)
+
+    assert len(server.requests) == 3  # 8个slug，每批3个
+    assert set(talks) == {f"talk_{i}" for i in range(7)}
+    assert talks["talk_2"]["viewedCount"] == 30000
+
+def test_fetch_details_fills_videos_and_reports_missing():
+    videos = [
+        TEDVideo("未知标题", "未知演讲者", "未知时长", 0, "", "", "https://www.ted.com/talks/talk_4"),
+        TEDVideo("Listed title", "Listed speaker", "14:01", 0, "", "", "https://www.ted.com/talks/gone"),
+    ]
+    with StandinServer(standin_api) as server:
+        client = TEDGraphQLClient(server.url + "/graphql", batch_size=10)
+        missing = fetch_details_via_api(client, videos, with_transcript=True)
+
+    video = videos[0]
+    assert (video.title, video.speaker, video.duration) == ("Talk 4", "Speaker 4", "14:04")
+    assert (video.views, video.publish_date, video.topic) == (50000, "2019", "love,trust")
+    assert video.transcript == "Hello from talk_4. Thanks."
+    assert missing == [videos[1]]
+    assert len(server.requests) == 1
+
+def test_iter_talks_follows_pagination():
+    with StandinServer(standin_api) as server:
+        client = TEDGraphQLClient(server.url + "/graphql")
+        slugs = [talk["slug"] for talk in client.iter_talks(page_size=3)]
+
+    assert slugs == sorted(TALKS)
+    assert len(server.requests) == 3
+
+class NoBrowserScraper(TEDEdgeScraper):
+    def setup_driver(self):
+        raise AssertionError("不应启动浏览器")
+
+def test_api_misses_fall_back_to_http_pages():
+    def standin_site(method, path, body):
+        if path.startswith("/talks/"):
+            slug = path.rsplit("/", 1)[-1]
+            return 200, "text/html", talk_page(slug, 777, 2020, transcript=f"Page of {slug}.").encode()
+        return standin_api(method, path, body)
+
+    saved, cwd = ted_scraper_edge.API_URL, os.getcwd()
+    with StandinServer(standin_site) as server, tempfile.TemporaryDirectory() as tmp:
+        ted_scraper_edge.API_URL = server.url + "/graphql"
+        os.chdir(tmp)
+        try:
+            videos = [TEDVideo("Talk 1", "", "14:01", 0, "", "", "https://www.ted.com/talks/talk_1"),
+                      TEDVideo("Gone", "", "14:00", 0, "", "", server.url + "/talks/gone")]
+            scraper = NoBrowserScraper()
+            # API未返回的视频通过HTTP获取视频页（sitemap模式不启动浏览器）
+            fetch_views_and_dates(scraper, videos, use_api=True, use_browser=False)
+            assert [(v.views, v.publish_date) for v in videos] == [(20000, "2016"), (777, "2020")]
+            videos[1].transcript = ""
+            fetch_transcripts(scraper, videos[:1], videos[1:], use_api=True, use_browser=False)
+            assert sorted(os.listdir("transcripts")) == ["hight_view_001.txt", "low_view_001.txt"]
+        finally:
+            os.chdir(cwd)
+            ted_scraper_edge.API_URL = saved
+
+    assert [v.transcript for v in videos] == ["Hello from talk_1. Thanks.", "Page of gone."]
+    assert scraper.driver is None
+
+if __name__ == "__main__":
+    test_fetch_talks_batches_requests()
+    test_fetch_details_fills_videos_and_reports_missing()
+    test_iter_talks_follows_pagination()
+    test_api_misses_fall_back_to_http_pages()
+    print("✓ GraphQL客户端测试通过")
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试：时间预算模式（模拟时钟和回放归档，不访问TED网站）
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+
+import ted_scraper_edge
+import time_budget
+from page_archive import PageArchive
+from talk_store import TalkStore
+from ted_scraper_edge import TEDEdgeScraper
+from testing_fixtures import record_archive, talk_page, video
+from time_budget import BudgetScheduler, Deadline, prioritize_candidates, run_time_budget
+
+class FakeClock:
+    """手动推进的时钟（线程安全）"""
+
+    def __init__(self):
+        self.now = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            return self.now
+
+    def advance(self, seconds):
+        with self._lock:
+            self.now += seconds
+
+def test_deadline_honours_reserve():
+    clock = FakeClock()
+    deadline = Deadline(100, reserve=30, clock=clock)
+    clock.advance(69)
+    assert not deadline.expired() and deadline.remaining() == 31
+    clock.advance(1)
+    assert deadline.expired() and deadline.elapsed() == 70
+
+def test_scheduler_stops_dispatching_at_reserve():
+    clock = FakeClock()
+    done = []
+
+    def task(item):
+        clock.advance(10)
+        return item != 3
+
+    stats = BudgetScheduler(Deadline(100, reserve=30, clock=clock), workers=1).run(
+        range(20), task, lambda item, ok: done.append((item, ok)))
+    # 已用0、10……60秒时各派发一个任务，70秒时剩余时间等于预留时间，停止派发
+    assert stats == {'total': 20, 'dispatched': 7, 'succeeded': 6, 'failed': 1, 'skipped': 13}
+    assert [item for item, _ in done] == list(range(7)) and (3, False) in done
+
+def test_scheduler_drains_in_flight_requests():
+    clock = FakeClock()
+    started = threading.Semaphore(0)
+    release = threading.Event()
+    result = {}
+
+    def task(item):
+        started.release()
+        release.wait(5)
+        return True
+
+    scheduler = BudgetScheduler(Deadline(100, reserve=30, clock=clock), workers=2)
+    runner = threading.Thread(target=lambda: result.update(scheduler.run(range(10), task)))
+    runner.start()
+    assert started.acquire(timeout=5) and started.acquire(timeout=5)
+    # 两个请求进行中时到达预留时间：不再派发，但进行中的请求正常完成
+    clock.advance(80)
+    release.set()
+    runner.join(5)
+    assert not runner.is_alive()
+    assert result == {'total': 10, 'dispatched': 2, 'succeeded': 2, 'failed': 0, 'skipped': 8}
+
+def test_prioritize_candidates():
+    in_window = lambda v: v.publish_date == "2019"
+    known = [video(f"k{i}", 100 * (i + 1), "2019") for i in range(6)]
+    unknown = [video("u0"), video("u1")]
+    old = video("old", 5000, "2010")
+    ordered, skipped = prioritize_candidates(unknown[:1] + known + [old] + unknown[1:], 2, in_window)
+    # 上次排名两端各2个最先，其次是没有数据的视频，最后是排名居中的视频；已知年份不在范围内的跳过
+    assert [v.id for v in ordered] == ["k5", "k0", "k4", "k1", "u0", "u1", "k3", "k2"]
+    assert [v.id for v in skipped] == ["old"]
+
+    # 热度排序列表：按列表名次从两端向中间
+    ranked_ids = ["u1", "k0", "k1", "u0"]
+    ordered, _ = prioritize_candidates([video("u0"), video("u1"), video("k0"), video("k1")], 1, in_window, ranked_ids)
+    assert [v.id for v in ordered] == ["u1", "u0", "k0", "k1"]
+
+def test_budget_run_writes_partial_results_and_coverage():
+    clock = FakeClock()
+    cwd = os.getcwd()
+    saved = (time_budget.Deadline, time_budget.TOPICS, time_budget.TIME_BUDGET_RESERVE, time_budget.TIME_BUDGET_WORKERS)
+    with tempfile.TemporaryDirectory() as tmp:
+        archive_dir = os.path.join(tmp, "archive")
+        record_archive(archive_dir, {"love": [(f"t_{i}", f"Talk {i}", "14:00") for i in range(12)]},
+                       {f"t_{i}": talk_page(f"t_{i}", 10000 + i, 2019, transcript=f"talk {i}") for i in range(12)})
+        # 本地目录中已有上次的数据：t_0-t_8 有播放量，t_9/t_10 已知年份不在范围内，t_11 从未获取过
+        store = TalkStore(os.path.join(tmp, "catalogue.db"))
+        store.upsert_videos([video(f"t_{i}", 100 * (i + 1), "2019") for i in range(9)]
+                            + [video("t_9", 50, "2010"), video("t_10", 60, "2010")], "2024-01-01T00:00:00")
+        store.close()
+
+        scraper = TEDEdgeScraper()
+        scraper.archive = PageArchive(archive_dir, "replay")
+        scraper.catalogue_db = os.path.join(tmp, "catalogue.db")
+        fetch = scraper.get_video_details
+
+        def slow_fetch(video, html=None):
+            clock.advance(10)
+            return fetch(video, html)
+
+        scraper.get_video_details = slow_fetch
+        time_budget.Deadline = lambda budget, reserve: Deadline(budget, reserve, clock)
+        time_budget.TOPICS, time_budget.TIME_BUDGET_RESERVE, time_budget.TIME_BUDGET_WORKERS = ["love"], 30, 1
+        os.chdir(tmp)
+        try:
+            run_time_budget(scraper, "", 100)
+            with open(os.path.join(tmp, "coverage_report.json"), encoding="utf-8") as f:
+                report = json.load(f)
+        finally:
+            os.chdir(cwd)
+            time_budget.Deadline, time_budget.TOPICS, time_budget.TIME_BUDGET_RESERVE, time_budget.TIME_BUDGET_WORKERS = saved
+
+    # 7个请求后到达预留时间：上次排名两端的视频已刷新，居中的 t_3/t_4 和从未获取的 t_11 被跳过
+    assert not report['complete'] and report['elapsed_seconds'] == 70
+    assert report['listing'] == {'videos': 12, 'after_duration_filter': 12, 'incomplete': []}
+    assert report['details'] == {'total': 10, 'dispatched': 7, 'succeeded': 7, 'failed': 0, 'skipped': 3,
+                                 'out_of_window': 2}
+    assert report['results']['top'] == 9 and report['results']['bottom'] == 0
+    assert report['results']['stale_views'] == 2
+    assert sorted(report['results']['stale_urls']) == ["https://www.ted.com/talks/t_3", "https://www.ted.com/talks/t_4"]
+    # 演讲稿阶段开始时已到预留时间：未刷新的两个视频没有演讲稿，只计入跳过
+    assert report['transcripts'] == {'needed': 9, 'available': 7, 'fetched': 0, 'failed': 0, 'skipped': 2}
+
+def test_time_budget_rejects_other_modes():
+    argv = sys.argv
+    try:
+        for flag in ("--refresh", "--api"):
+            sys.argv = ["ted_scraper_edge.py", "--time-budget", "60", flag]
+            try:
+                ted_scraper_edge.main()
+                assert False, f"--time-budget 与 {flag} 同时使用时应报错"
+            except SystemExit as e:
+                assert e.code == 2
+    finally:
+        sys.argv = argv
+
+if __name__ == "__main__":
+    test_deadline_honours_reserve()
+    test_scheduler_stops_dispatching_at_reserve()
+    test_scheduler_drains_in_flight_requests()
+    test_prioritize_candidates()
+    test_budget_run_writes_partial_results_and_coverage()
+    test_time_budget_rejects_other_modes()
+    print("✓ 时间预算测试通过")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试：演讲稿分析（纯计算，不访问TED网站）
+"""
+
+import random
+
+from ted_scraper_edge import TEDEdgeScraper, TEDVideo
+from transcript_analytics import analyze_groups, mattr, merge_features, ngrams, tokenize, transcript_features
+
+def test_tokenize_keeps_numbers_and_contractions():
+    assert tokenize("Don't PANIC: 42 reasons, it's fine!") == ["don't", "panic", "42", "reasons", "it's", "fine"]
+    assert tokenize(None) == []
+
+def test_mattr_shorter_than_window_is_ttr():
+    words = ["a", "b", "a", "c"]
+    assert mattr(words, window=10) == 0.75
+    assert mattr([], window=10) == 0.0
+
+def test_mattr_longer_than_window():
+    # 两个词交替：每个窗口都只有2个不同词
+    assert abs(mattr(["x", "y"] * 150, window=100) - 2 / 100) < 1e-12
+    # 全部不同的词：每个窗口的TTR都是1
+    assert abs(mattr([f"w{i}" for i in range(250)], window=100) - 1.0) < 1e-12
+    # 手工计算：窗口3，共3个窗口 [a b a] [b a c] [a c d]，TTR依次为 2/3、1、1
+    assert abs(mattr(["a", "b", "a", "c", "d"], window=3) - (2 / 3 + 1 + 1) / 3) < 1e-12
+
+def test_ngrams_skip_stopword_only_phrases():
+    counts = ngrams(tokenize("of the people and of the world"), 2)
+    assert "of the" not in counts
+    assert counts["the people"] == 1 and counts["the world"] == 1
+
+def test_transcript_features():
+    features, phrases = transcript_features("climate change is real. climate change matters.", minutes=0.5)
+    assert features["词数"] == 7
+    assert features["不同词数"] == 5
+    assert features["语速(词/分钟)"] == 14.0
+    assert features["高频短语"].startswith("climate change")
+    assert phrases["climate change"] == 2
+    empty, _ = transcript_features("", minutes=10)
+    assert empty["语速(词/分钟)"] is None and empty["词汇丰富度(MATTR)"] is None
+
+def make_group(prefix, vocabulary, count, rng):
+    return [TEDVideo(f"{prefix} {i}", "", "10:00", 0, "2019", "", f"https://www.ted.com/talks/{prefix}_{i}",
+                     " ".join(rng.choice(vocabulary) for _ in range(300)))
+            for i in range(count)]
+
+def test_process_pool_matches_serial_run():
+    rng = random.Random(7)
+    top = make_group("top", ["hope", "future", "together", "build", "dream", "people"], 12, rng)
+    bottom = make_group("low", ["data", "model", "error", "system", "people", "result"], 9, rng)
+    bottom.append(TEDVideo("no transcript", "", "10:00", 0, "2019", "", "https://www.ted.com/talks/empty"))
+    minutes = TEDEdgeScraper()._duration_minutes
+
+    serial = analyze_groups(top, bottom, minutes, workers=1, chunk_size=1000)
+    parallel = analyze_groups(top, bottom, minutes, workers=3, chunk_size=4)
+    assert parallel == serial
+
+    features, summary, distinctive = parallel
+    assert len(features) == 21
+    assert summary[0]["特征"] == "词数" and summary[0]["高播放量均值"] == 300
+    assert distinctive[0]["高播放量组次数"] > distinctive[0]["低播放量组次数"]
+    assert merge_features({}, None)["词数"] is None
+
+if __name__ == "__main__":
+    test_tokenize_keeps_numbers_and_contractions()
+    test_mattr_shorter_than_window_is_ttr()
+    test_mattr_longer_than_window()
+    test_ngrams_skip_stopword_only_phrases()
+    test_transcript_features()
+    test_process_pool_matches_serial_run()
+    print("✓ 演讲稿分析测试通过")
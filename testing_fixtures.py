@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试共用的数据构造：视频对象、列表页/视频页源码和录制好的页面归档（供各 test_*.py 导入，不访问TED网站）
+"""
+
+import json
+from typing import Dict, List, Optional, Tuple
+
+from page_archive import PageArchive
+from ted_scraper_edge import TEDEdgeScraper, TEDVideo
+
+def talk_url(slug: str) -> str:
+    return f"https://www.ted.com/talks/{slug}"
+
+def video(slug: str, views: int = 0, year: str = "", duration: str = "14:00", topic: str = "love",
+          speaker: str = "Speaker") -> TEDVideo:
+    """标题为 "Talk {slug}"、ID为slug的视频"""
+    return TEDVideo(f"Talk {slug}", speaker, duration, views, year, topic, talk_url(slug), id=slug)
+
+def next_data_script(payload: Dict) -> str:
+    return f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(payload)}</script>'
+
+def listing_card(slug: str, title: str, duration: str = "14:00") -> str:
+    """/talks 列表页中的一个视频卡片（与浏览器模式的卡片选择器一致）"""
+    return (f'<div class="xs-tui:col-span-1"><a class="relative" href="/talks/{slug}">'
+            f'<span class="text-textPrimary-onLight font-bold subheader2">{title}</span>'
+            f'<div class="absolute bottom-2 right-2"><span class="font-semibold">{duration}</span></div></a></div>')
+
+def listing_page(cards: List[Tuple[str, str, str]], total: Optional[int] = None) -> str:
+    """展开完成的列表页源码：cards 为 (slug, 标题, 时长)，total 为"of N"总数（默认等于卡片数）"""
+    total = len(cards) if total is None else total
+    return (f'<p class="text-textPrimary-onLight font-normal body2">{len(cards)} of {total}</p>'
+            + "".join(listing_card(*card) for card in cards))
+
+def talk_page(slug: str, views: int, year: int, duration: Optional[int] = None, title: str = "",
+              transcript: str = "") -> str:
+    """视频页源码：__NEXT_DATA__ 给出播放量、发布日期（及可选的时长秒数、标题），演讲稿放在 ld+json 中"""
+    data = {"slug": slug, "viewedCount": views, "publishedAt": f"{year}-03-01"}
+    if title:
+        data["title"] = title
+    if duration:
+        data["duration"] = duration
+    html = next_data_script({"props": {"pageProps": {"videoData": data}}})
+    if transcript:
+        html += f'<script type="application/ld+json" data-next-head="">{json.dumps({"transcript": transcript})}</script>'
+    return html
+
+def record_archive(root: str, listings: Dict[str, List[Tuple[str, str, str]]], pages: Dict[str, str],
+                   sort: str = "newest"):
+    """录制归档：listings 为 {主题: 卡片列表}（按单主题URL录制），pages 为 {slug: 视频页源码}"""
+    scraper = TEDEdgeScraper()
+    archive = PageArchive(root, "record")
+    for topic, cards in listings.items():
+        archive.record(scraper.build_talks_url_from_config([topic], sort=sort), listing_page(cards), "listing")
+    for slug, html in pages.items():
+        archive.record(talk_url(slug), html, "talk")
+    archive.close()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+时间预算模式（--time-budget 秒）
+调度平台给每次运行固定的时间槽，普通流程只在最后一步写结果，超时就什么都得不到。
+本模式按价值安排剩余工作，持续检查已用时间，截止前停止派发新请求、等待进行中的请求完成，然后一定写出结果：
+  1. 列表覆盖：使用单主题列表缓存，只检查过期的主题，时间不足时直接使用已有缓存
+  2. 候选视频的播放量：先获取最可能进入前N/后N的视频（上次播放量排名的两端，或热度排序列表的两端），
+     其次是从未获取过详情的视频，最后是排名居中的视频；已知发布年份不在范围内的视频无需访问
+  3. 排名确定后按名次获取仍缺少的演讲稿
+本次未能刷新的视频使用本地目录中上次的播放量参与排名；结果与覆盖率报告一起写出，
+报告列出各阶段完成了多少、跳过了多少，以及结果中有多少视频使用的是旧数据
+"""
+
+import json
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from config import TOPICS, START_YEAR, END_YEAR, MIN_DURATION, MAX_DURATION, TOP_VIDEOS_COUNT
+from config import REQUEST_DELAY, TOPIC_CACHE_HOURS, TIME_BUDGET_RESERVE, TIME_BUDGET_WORKERS, COVERAGE_REPORT_FILE
+from ted_scraper_edge import TEDEdgeScraper, TEDVideo, fetch_transcripts, load_topic_listings, store_fetched_videos
+
+logger = logging.getLogger(__name__)
+
+class Deadline:
+    """运行截止时间：为写出结果预留 reserve 秒，剩余时间不足预留时 expired() 为True；clock 默认为单调时钟"""
+
+    def __init__(self, budget: float, reserve: float = 0.0, clock: Callable[[], float] = time.monotonic):
+        self.budget = budget
+        self.reserve = reserve
+        self.clock = clock
+        self.start = clock()
+
+    def elapsed(self) -> float:
+        return self.clock() - self.start
+
+    def remaining(self) -> float:
+        return self.budget - self.elapsed()
+
+    def expired(self) -> bool:
+        return self.remaining() <= self.reserve
+
+class BudgetScheduler:
+    """
+    按给定顺序派发任务，同时进行的任务不超过 workers 个；
+    截止时间临近时停止派发新任务，等待进行中的任务完成后返回
+    """
+
+    def __init__(self, deadline: Deadline, workers: int = 4):
+        self.deadline = deadline
+        self.workers = max(1, workers)
+
+    def run(self, items: Iterable[Any], fn: Callable[[Any], Any],
+            on_done: Optional[Callable[[Any, bool], None]] = None, label: str = "任务") -> Dict[str, int]:
+        """
+        fn(item) 在线程池中执行，返回真值表示成功；on_done(item, ok) 在调用线程中执行（可直接写入SQLite）；
+        返回 {'total', 'dispatched', 'succeeded', 'failed', 'skipped'}
+        """
+        items = list(items)
+        stats = {'total': len(items), 'dispatched': 0, 'succeeded': 0, 'failed': 0, 'skipped': 0}
+        in_flight = {}
+        next_index = 0
+        stopped = False
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while True:
+                while not stopped and next_index < len(items) and len(in_flight) < self.workers:
+                    if self.deadline.expired():
+                        stopped = True
+                        logger.warning(f"{label}：剩余时间 {self.deadline.remaining():.0f}s 已到预留时间，停止派发，"
+                                       f"等待 {len(in_flight)} 个进行中的请求完成，跳过 {len(items) - next_index} 个")
+                        break
+                    in_flight[executor.submit(fn, items[next_index])] = items[next_index]
+                    next_index += 1
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = in_flight.pop(future)
+                    try:
+                        ok = bool(future.result())
+                    except Exception as e:
+                        logger.warning(f"{label}失败: {e}")
+                        ok = False
+                    stats['succeeded' if ok else 'failed'] += 1
+                    if on_done:
+                        on_done(item, ok)
+        stats['dispatched'] = next_index
+        stats['skipped'] = len(items) - next_index
+        logger.info(f"{label}：完成 {stats['succeeded']}/{stats['total']}，失败 {stats['failed']}，跳过 {stats['skipped']}"
+                    f"（已用 {self.deadline.elapsed():.0f}s）")
+        return stats
+
+def _outside_in(ranked: List[TEDVideo]) -> List[TEDVideo]:
+    """按名次从两端向中间交替排列：第1、倒数第1、第2、倒数第2……"""
+    order = []
+    i, j = 0, len(ranked) - 1
+    while i <= j:
+        order.append(ranked[i])
+        if i < j:
+            order.append(ranked[j])
+        i += 1
+        j -= 1
+    return order
+
+def prioritize_candidates(videos: List[TEDVideo], count: int, in_window: Callable[[TEDVideo], bool],
+                          ranked_ids: Optional[List[str]] = None) -> Tuple[List[TEDVideo], List[TEDVideo]]:
+    """
+    按获取价值排列候选视频，返回 (待获取, 无需获取)：
+    ranked_ids 给出热度排序列表的顺序时按列表名次，否则按本地目录中上次的播放量排名；
+    排名两端各 count 个最先，其次是没有任何排名依据的视频，最后是排名居中的视频；
+    已知发布年份且不在范围内的视频不可能进入结果，无需获取
+    """
+    skipped = [v for v in videos if v.publish_date and not in_window(v)]
+    skipped_ids = {v.id for v in skipped}
+    candidates = [v for v in videos if v.id not in skipped_ids]
+    if ranked_ids is not None:
+        position = {talk_id: i for i, talk_id in enumerate(ranked_ids)}
+        ranked = sorted((v for v in candidates if v.id in position), key=lambda v: position[v.id])
+    else:
+        ranked = sorted((v for v in candidates if v.views), key=lambda v: v.views, reverse=True)
+    ranked_set = {v.id for v in ranked}
+    unranked = [v for v in candidates if v.id not in ranked_set]
+    order = _outside_in(ranked)
+    edge = min(len(order), 2 * count)
+    return order[:edge] + unranked + order[edge:], skipped
+
+def _interleave(top_videos: List[TEDVideo], bottom_videos: List[TEDVideo]) -> List[Tuple[str, int, TEDVideo]]:
+    """前N与后N按名次交替：(组, 名次, 视频)，时间不足时两组的前几名都有演讲稿"""
+    order = []
+    for i in range(max(len(top_videos), len(bottom_videos))):
+        for group, videos in (("top", top_videos), ("bottom", bottom_videos)):
+            if i < len(videos):
+                order.append((group, i + 1, videos[i]))
+    return order
+
+def write_coverage_report(report: Dict, path: str = COVERAGE_REPORT_FILE):
+    """写出覆盖率报告（JSON）并在日志中输出摘要"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    listing, details, transcripts = report['listing'], report['details'], report['transcripts']
+    logger.info(f"覆盖率报告已保存到 {path}：用时 {report['elapsed_seconds']}s/{report['budget_seconds']}s，"
+                f"{'全部完成' if report['complete'] else '部分完成'}")
+    logger.info(f"  列表：{listing['videos']} 个视频，未完成的主题/列表 {len(listing['incomplete'])} 个")
+    logger.info(f"  播放量：本次获取 {details['succeeded']}/{details['total']}，失败 {details['failed']}，"
+                f"跳过 {details['skipped']}，年份不在范围内无需获取 {details['out_of_window']}")
+    logger.info(f"  结果：前/后 {report['results']['top']}/{report['results']['bottom']} 个，"
+                f"其中 {report['results']['stale_views']} 个使用上次的播放量；"
+                f"演讲稿 {transcripts['available']}/{transcripts['needed']}")
+
+def run_time_budget(scraper: TEDEdgeScraper, talks_url: str, budget_seconds: float, custom_url: bool = False,
+                    sort: str = 'newest', output: str = "ted_videos_edge_results.xlsx"):
+    """在给定的秒数内完成尽可能多的高价值工作，截止前写出当前最好的完整结果和覆盖率报告"""
+    from talk_store import TalkStore
+    deadline = Deadline(budget_seconds, TIME_BUDGET_RESERVE)
+    scheduler = BudgetScheduler(deadline, TIME_BUDGET_WORKERS)
+    logger.info(f"时间预算 {budget_seconds:.0f}s（预留 {TIME_BUDGET_RESERVE}s 写出结果），详情获取 {scheduler.workers} 个线程")
+    if deadline.expired():
+        logger.warning("时间预算不超过预留时间，只使用本地目录中已有的数据")
+
+    def in_window(video: TEDVideo) -> bool:
+        return scraper.video_in_year_range(video, START_YEAR, END_YEAR)
+
+    store = TalkStore(scraper.catalogue_db)
+    try:
+        # 1. 列表覆盖
+        incomplete = []
+        if custom_url or sort == "popular":
+            # 自定义URL和热度顺序需要该列表本身，展开到截止前为止
+            videos = scraper.remove_duplicates(scraper.get_videos_by_talks_url(talks_url, deadline.expired))
+            store.upsert_static(videos)
+            if not scraper.last_listing_complete:
+                incomplete.append(talks_url)
+        else:
+            videos = load_topic_listings(scraper, store, TOPICS, sort, should_stop=deadline.expired)
+            incomplete = store.stale_topics(TOPICS, TOPIC_CACHE_HOURS, sort)
+        listing_ids = [v.id for v in videos]
+        filtered = store.query_videos(min_minutes=MIN_DURATION, max_minutes=MAX_DURATION, ids=listing_ids)
+
+        # 2. 按价值获取播放量
+        ordered, out_of_window = prioritize_candidates(
+            filtered, TOP_VIDEOS_COUNT, in_window, listing_ids if sort == "popular" else None)
+        logger.info(f"候选视频 {len(filtered)} 个：待获取 {len(ordered)} 个，已知年份不在范围内 {len(out_of_window)} 个")
+        fresh = set()
+
+        def fetch_details(video: TEDVideo) -> bool:
+            ok = scraper.get_video_details(video)
+            if not scraper.replaying:
+                time.sleep(REQUEST_DELAY)
+            return ok
+
+        def details_done(video: TEDVideo, ok: bool):
+            if ok:
+                fresh.add(video.id)
+                store_fetched_videos(scraper, store, [video])
+
+        details = scheduler.run(ordered, fetch_details, details_done, label="播放量获取")
+
+        # 3. 用当前最好的数据确定排名，按名次补齐演讲稿
+        top_videos, bottom_videos = store.query_top_bottom(
+            TOP_VIDEOS_COUNT, START_YEAR, END_YEAR, ids=[v.id for v in filtered])
+        ranked = top_videos + bottom_videos
+        missing = [item for item in _interleave(top_videos, bottom_videos) if not item[2].transcript]
+
+        def fetch_transcript(item) -> bool:
+            video = item[2]
+            html = scraper.fetch_page_html(video.url)
+            if not html:
+                return False
+            video.transcript = scraper._extract_transcript(html)
+            if not scraper.replaying:
+                time.sleep(REQUEST_DELAY)
+            return bool(video.transcript)
+
+        transcripts = scheduler.run(missing, fetch_transcript, lambda item, ok: store.save_transcript(item[2]),
+                                    label="演讲稿获取")
+
+        # 4. 写出结果：已有的演讲稿写文件，不再访问页面
+        fetch_transcripts(scraper, top_videos, bottom_videos, store, fetch_missing=False)
+        scraper.save_results(top_videos, bottom_videos, output)
+
+        complete = (not incomplete and not details['skipped'] and not details['failed']
+                    and not transcripts['skipped'] and not transcripts['failed'])
+        write_coverage_report({
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'budget_seconds': budget_seconds,
+            'elapsed_seconds': round(deadline.elapsed(), 1),
+            'complete': complete,
+            'listing': {'videos': len(videos), 'after_duration_filter': len(filtered), 'incomplete': incomplete},
+            'details': {**details, 'out_of_window': len(out_of_window)},
+            'transcripts': {'needed': len(ranked), 'available': sum(1 for v in ranked if v.transcript),
+                            'fetched': transcripts['succeeded'], 'failed': transcripts['failed'],
+                            'skipped': transcripts['skipped']},
+            'results': {'output': output, 'top': len(top_videos), 'bottom': len(bottom_videos),
+                        'stale_views': sum(1 for v in ranked if v.id not in fresh),
+                        'stale_urls': [v.url for v in ranked if v.id not in fresh]},
+        })
+        logger.info("时间预算模式执行完成！")
+    finally:
+        store.close()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+演讲稿分析（--analyze）
+对前N/后N视频的演讲稿计算词数、语速（词/分钟，基于TEDVideo.duration）、词汇丰富度（TTR与MATTR）和高频短语，
+演讲稿按块分发到进程池并行计算，数千篇演讲稿的耗时随CPU核数下降；
+结果按视频合并为Excel中的特征列，并给出高播放量组与低播放量组的对比汇总
+"""
+
+import logging
+import math
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from statistics import mean, median
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+MATTR_WINDOW = 100  # MATTR滑动窗口词数，TTR随篇幅增长而下降，MATTR可在不同长度的演讲稿之间比较
+
+# 短语统计时忽略全部由这些词组成的n-gram
+STOPWORDS = frozenset("""
+a an the and or but if so of to in on at by for with from as is are was were be been being am
+i you he she it we they me him her us them my your his its our their this that these those
+there here what which who whom not no do does did have has had will would can could should
+just very really like about up out then than too also all some any one
+""".split())
+
+# 每个视频的特征列（Excel列名）
+FEATURE_COLUMNS = ['词数', '不同词数', '语速(词/分钟)', '词汇丰富度(TTR)', '词汇丰富度(MATTR)', '高频短语']
+
+def tokenize(text: str) -> List[str]:
+    """英文演讲稿分词：小写，保留数字和 don't 这类缩写"""
+    return WORD_PATTERN.findall((text or "").lower())
+
+def mattr(words: List[str], window: int = MATTR_WINDOW) -> float:
+    """滑动窗口平均TTR；词数不足一个窗口时退化为TTR"""
+    if not words:
+        return 0.0
+    if len(words) <= window:
+        return len(set(words)) / len(words)
+    counts = Counter(words[:window])
+    total = len(counts)
+    for i in range(window, len(words)):
+        counts[words[i]] += 1
+        old = words[i - window]
+        counts[old] -= 1
+        if counts[old] == 0:
+            del counts[old]
+        total += len(counts)
+    return total / window / (len(words) - window + 1)
+
+def ngrams(words: List[str], n: int) -> Counter:
+    """n-gram频次，跳过全部由停用词组成的短语"""
+    return Counter(
+        " ".join(gram) for gram in zip(*(words[i:] for i in range(n)))
+        if not all(word in STOPWORDS for word in gram)
+    )
+
+def transcript_features(text: str, minutes: float, top_phrases: int = 5) -> Tuple[Dict, Counter]:
+    """单篇演讲稿的特征和其 2-gram/3-gram 频次"""
+    words = tokenize(text)
+    phrases = ngrams(words, 2) + ngrams(words, 3)
+    features = {
+        '词数': len(words),
+        '不同词数': len(set(words)),
+        '语速(词/分钟)': round(len(words) / minutes, 1) if words and minutes > 0 else None,
+        '词汇丰富度(TTR)': round(len(set(words)) / len(words), 4) if words else None,
+        '词汇丰富度(MATTR)': round(mattr(words), 4) if words else None,
+        '高频短语': ", ".join(p for p, _ in phrases.most_common(top_phrases)),
+    }
+    return features, phrases
+
+def _analyze_chunk(chunk: List[Tuple[str, str, str, float]]) -> Tuple[List[Tuple[str, Dict]], Dict[str, Counter]]:
+    """进程池任务：处理一块 (url, 组, 演讲稿, 时长分钟)，返回各视频特征和按组合并的短语频次"""
+    results = []
+    group_phrases: Dict[str, Counter] = {}
+    for url, group, text, minutes in chunk:
+        features, phrases = transcript_features(text, minutes)
+        results.append((url, features))
+        group_phrases.setdefault(group, Counter()).update(phrases)
+    return results, group_phrases
+
+def _distinctive_phrases(high: Counter, low: Counter, limit: int) -> List[Dict]:
+    """两组中出现频率差异最大的短语（加1平滑的对数频率比，正值偏向高播放量组）"""
+    high_total = sum(high.values()) or 1
+    low_total = sum(low.values()) or 1
+    candidates = [p for p, c in (high + low).items() if c >= 3]
+    scored = []
+    for phrase in candidates:
+        ratio = math.log2(((high[phrase] + 1) / high_total) / ((low[phrase] + 1) / low_total))
+        scored.append({'短语': phrase, '高播放量组次数': high[phrase], '低播放量组次数': low[phrase],
+                       '对数频率比': round(ratio, 3)})
+    scored.sort(key=lambda row: row['对数频率比'], reverse=True)
+    if len(scored) <= 2 * limit:
+        return scored
+    return scored[:limit] + scored[-limit:]
+
+def _summary_rows(features: Dict[str, Dict], groups: Dict[str, List[str]]) -> List[Dict]:
+    """数值特征按组汇总：均值、中位数及两组均值之差"""
+    rows = []
+    for column in FEATURE_COLUMNS[:-1]:
+        row = {'特征': column}
+        means = {}
+        for label, urls in groups.items():
+            values = [features[url][column] for url in urls if url in features and features[url][column] is not None]
+            means[label] = mean(values) if values else None
+            row[f'{label}均值'] = round(means[label], 4) if values else None
+            row[f'{label}中位数'] = round(median(values), 4) if values else None
+        high, low = means.values()
+        row['均值差(高-低)'] = round(high - low, 4) if high is not None and low is not None else None
+        rows.append(row)
+    return rows
+
+def analyze_groups(top_videos, bottom_videos, duration_minutes, workers: int = 0, chunk_size: int = 50,
+                   top_ngrams: int = 20) -> Tuple[Dict[str, Dict], List[Dict], List[Dict]]:
+    """
+    分析两组视频的演讲稿，duration_minutes 把时长文本转为分钟数；
+    返回 (按URL的特征, 组间数值对比, 组间差异最大的短语)
+    """
+    labels = ('高播放量', '低播放量')
+    groups = {label: [v.url for v in group if v.transcript]
+              for label, group in zip(labels, (top_videos, bottom_videos))}
+    items = [(v.url, label, v.transcript, duration_minutes(v.duration))
+             for label, group in zip(labels, (top_videos, bottom_videos)) for v in group if v.transcript]
+    if not items:
+        logger.warning("没有可分析的演讲稿")
+        return {}, [], []
+
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    workers = min(workers or os.cpu_count() or 1, len(chunks))
+    logger.info(f"开始分析 {len(items)} 篇演讲稿：{len(chunks)} 块，{workers} 个进程")
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunk_results = list(executor.map(_analyze_chunk, chunks))
+    else:
+        # 只有一块时直接在当前进程计算，省去启动进程池的开销
+        chunk_results = [_analyze_chunk(chunk) for chunk in chunks]
+
+    features: Dict[str, Dict] = {}
+    phrases = {label: Counter() for label in labels}
+    for results, group_phrases in chunk_results:
+        features.update(results)
+        for label, counter in group_phrases.items():
+            phrases[label].update(counter)
+
+    summary = _summary_rows(features, groups)
+    distinctive = _distinctive_phrases(phrases[labels[0]], phrases[labels[1]], top_ngrams)
+    for row in summary:
+        logger.info(f"  {row['特征']}: 高播放量均值 {row['高播放量均值']}，低播放量均值 {row['低播放量均值']}")
+    return features, summary, distinctive
+
+def log_top_phrases(distinctive: List[Dict], limit: int = 5):
+    """日志中输出两组最具区分度的短语"""
+    if not distinctive:
+        return
+    logger.info("高播放量组更常用: " + ", ".join(row['短语'] for row in distinctive[:limit]))
+    logger.info("低播放量组更常用: " + ", ".join(row['短语'] for row in distinctive[::-1][:limit]))
+
+def merge_features(row: Dict, features: Optional[Dict]) -> Dict:
+    """把某个视频的特征列追加到结果行（没有演讲稿的视频特征列留空）"""
+    for column in FEATURE_COLUMNS:
+        row[column] = (features or {}).get(column)
+    return row